@@ -0,0 +1,366 @@
+"""Execution resources of every pool and router entry point.
+
+Deploys a router and one pool for each size in [--min-tokens, --max-tokens] on
+the Starknet testing framework, invokes every external and view of
+mammoth_pool.cairo and mammoth_router.cairo against it and writes the
+resources of each call to a JSON report:
+
+    python -m benchmarks.bench_resources --output bench_resources.json
+    python -m benchmarks.bench_resources --output new.json --baseline bench_resources.json
+
+Externals are sent through the account like a user would, the numbers are
+those of the router (or pool) call inside the transaction, without the
+account's own validation. Pool externals that only the router may call are
+read from the same call tree. storage_keys_accessed counts the distinct
+storage keys read or written, which is what the framework's call info
+exposes. fee_estimate is the L2 execution part of the fee (the max over the
+cairo_resource_fee_weights of the general config times min_gas_price) and
+leaves out the L1 state diff cost.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+from importlib.metadata import version
+
+from starkware.starknet.core.os.contract_address.contract_address import (
+    calculate_contract_address_from_hash
+)
+from starkware.starknet.public.abi import get_selector_from_name
+from starkware.starknet.testing.contract import StarknetContract
+from starkware.starknet.testing.starknet import Starknet
+
+from tests.conftest import (
+    ACCOUNT_CONTRACT,
+    DECIMALS,
+    ERC20_CONTRACT,
+    POOL_CONTRACT,
+    PROXY_CONTRACT,
+    ROUTER_CONTRACT,
+)
+from tests.oz_signers import MockSigner
+from tests.oz_utils import get_contract_class, str_to_felt, to_uint
+
+# swap deadline (a block timestamp) the benchmark never reaches
+NO_DEADLINE = 2 ** 64
+# a max spot price the benchmark swaps stay below, so the spot price checks are measured
+MAX_SPOT_PRICE = to_uint(2 ** 128)
+# page size of the pool index views, every run_pool_size adds pools to the index
+POOL_PAGE_LIMIT = 10
+
+
+def _walk(call_info):
+    yield call_info
+    for internal_call in call_info.internal_calls:
+        yield from _walk(internal_call)
+
+
+def _find_call(call_info, contract_address, selector_name):
+    selector = get_selector_from_name(selector_name)
+    for call in _walk(call_info):
+        if call.contract_address == contract_address and call.entry_point_selector == selector:
+            return call
+    return None
+
+
+def _fee_estimate(general_config, resources):
+    weights = general_config.cairo_resource_fee_weights
+    usage = {"n_steps": resources.n_steps, **resources.builtin_instance_counter}
+    l1_gas = max(weights.get(name, 0) * amount for name, amount in usage.items())
+    return math.ceil(l1_gas) * general_config.min_gas_price
+
+
+def resources_of(general_config, call_info):
+    resources = call_info.execution_resources
+    calls = list(_walk(call_info))
+    return {
+        "n_steps": resources.n_steps,
+        "n_memory_holes": resources.n_memory_holes,
+        "builtin_instance_counter": dict(sorted(resources.builtin_instance_counter.items())),
+        "internal_calls": len(calls) - 1,
+        "storage_keys_accessed": len(set().union(*(c.accessed_storage_keys for c in calls))),
+        "events": sum(len(c.events) for c in calls),
+        "fee_estimate": _fee_estimate(general_config, resources),
+    }
+
+
+class Bench:
+    def __init__(self):
+        self.signer = MockSigner(12345)
+        self.classes = {
+            "account": get_contract_class(ACCOUNT_CONTRACT),
+            "proxy": get_contract_class(PROXY_CONTRACT),
+            "pool": get_contract_class(POOL_CONTRACT),
+            "router": get_contract_class(ROUTER_CONTRACT),
+            "erc20": get_contract_class(ERC20_CONTRACT),
+        }
+
+    async def setup(self):
+        self.starknet = await Starknet.empty()
+        self.general_config = self.starknet.state.general_config
+
+        self.account = await self.starknet.deploy(
+            contract_class=self.classes["account"], constructor_calldata=[self.signer.public_key])
+        self.user = self.account.contract_address
+
+        proxy = await self.starknet.declare(contract_class=self.classes["proxy"])
+        pool = await self.starknet.declare(contract_class=self.classes["pool"])
+        router = await self.starknet.declare(contract_class=self.classes["router"])
+
+        router_proxy = await self.starknet.deploy(
+            contract_class=self.classes["proxy"], constructor_calldata=[router.class_hash, self.user])
+        self.router_address = router_proxy.contract_address
+        # views are called straight on the proxy with the router abi
+        self.router = StarknetContract(
+            self.starknet.state, self.classes["router"].abi, self.router_address,
+            router_proxy.deploy_execution_info)
+
+        await self.invoke(self.router_address, "initialize", [self.user])
+        await self.invoke(self.router_address, "set_proxy_class_hash", [proxy.class_hash])
+        await self.invoke(
+            self.router_address, "define_pool_type_class_hash",
+            [str_to_felt("DEFAULTv0"), pool.class_hash])
+
+    async def invoke(self, to, selector_name, calldata):
+        return await self.signer.send_transaction(
+            account=self.account, to=to, selector_name=selector_name, calldata=calldata)
+
+    async def measure_invoke(self, report, name, to, calldata, inner=(), inner_report=None):
+        """Invoke name on to and record it, plus the nested pool calls listed in inner."""
+        execution_info = await self.invoke(to, name, calldata)
+        call_info = execution_info.call_info
+        report[name] = resources_of(self.general_config, _find_call(call_info, to, name))
+        for pool_address, pool_function in inner:
+            inner_report[pool_function] = resources_of(
+                self.general_config, _find_call(call_info, pool_address, pool_function))
+        return execution_info
+
+    async def measure_call(self, report, contract, name, *args):
+        execution_info = await getattr(contract, name)(*args).call()
+        report[name] = resources_of(self.general_config, execution_info.call_info)
+        return execution_info
+
+    async def deploy_pool(self, num_tokens):
+        deployed = await self.invoke(
+            self.router_address, "deploy_pool", [str_to_felt("DEFAULTv0"), self.user])
+        pool_address = deployed.result.response[0]
+        pool = StarknetContract(self.starknet.state, self.classes["pool"].abi, pool_address, deployed)
+
+        tokens = []
+        for i in range(num_tokens):
+            erc = await self.starknet.deploy(
+                contract_class=self.classes["erc20"],
+                constructor_calldata=[
+                    str_to_felt(f"bench{i}"), str_to_felt(f"B{i}"), 18,
+                    *to_uint(900000 * DECIMALS), self.user, self.user,
+                ],
+            )
+            await self.invoke(
+                erc.contract_address, "approve", [pool_address, *to_uint(800000 * DECIMALS)])
+            tokens.append(erc.contract_address)
+
+        return pool_address, pool, tokens
+
+    async def create_pool(self, num_tokens, pool_report, router_report):
+        """Deploy and create a pool of num_tokens equally weighted tokens."""
+        pool_address, pool, tokens = await self.deploy_pool(num_tokens)
+
+        await self.measure_invoke(
+            router_report, "create_pool", self.router_address,
+            [
+                pool_address, str_to_felt("MAMMOTH_LP"), str_to_felt("MLP"), 18, self.user,
+                *to_uint(2 * 10 ** 16), *to_uint(2 * 10 ** 16), num_tokens, *_equal_weights(tokens),
+            ],
+            inner=[(pool_address, "setup_pool"), (pool_address, "init_pool")],
+            inner_report=pool_report,
+        )
+        return pool_address, pool, tokens
+
+    async def deploy_and_create_pool(self, tokens, router_report):
+        """Deploy and create one more pool of tokens in a single router call."""
+        deployment_info = await self.measure_call(
+            router_report, self.router, "get_deployment_info", str_to_felt("DEFAULTv0"))
+        proxy_hash, pool_hash, salt = deployment_info.result
+        pool_address = calculate_contract_address_from_hash(
+            salt=salt, class_hash=proxy_hash, constructor_calldata=[pool_hash, self.user],
+            deployer_address=self.router_address)
+        for erc in tokens:
+            await self.invoke(erc, "approve", [pool_address, *to_uint(1000 * DECIMALS)])
+
+        await self.measure_invoke(
+            router_report, "deploy_and_create_pools", self.router_address,
+            [
+                self.user, 1, str_to_felt("DEFAULTv0"), self.user, str_to_felt("MAMMOTH_LP"),
+                str_to_felt("MLP"), 18, *to_uint(2 * 10 ** 16), *to_uint(2 * 10 ** 16),
+                len(tokens), len(tokens), *_equal_weights(tokens),
+            ])
+
+    async def run_pool_size(self, num_tokens):
+        pool_report, router_report = {}, {}
+        pool_address, pool, tokens = await self.create_pool(num_tokens, pool_report, router_report)
+        token_in, token_out = tokens[0], tokens[1]
+
+        amount = to_uint(DECIMALS)
+        router_calls = [
+            ("mammoth_deposit_single_asset", [pool_address, token_in], "deposit_single_asset"),
+            ("mammoth_proportional_deposit", [pool_address], "deposit_proportional_assets"),
+            ("mammoth_withdraw_single_asset", [pool_address, token_in], "withdraw_single_asset"),
+            ("mammoth_proportional_withdraw", [pool_address], "withdraw_proportional_assets"),
+            ("mammoth_swap",
+             [pool_address, token_in, token_out, *to_uint(0), *MAX_SPOT_PRICE, NO_DEADLINE],
+             "swap"),
+            ("mammoth_swap_exact_out",
+             [pool_address, token_in, token_out, *to_uint(2 * DECIMALS), *MAX_SPOT_PRICE,
+              NO_DEADLINE],
+             "swap_exact_out"),
+        ]
+        for name, extra_calldata, pool_function in router_calls:
+            await self.measure_invoke(
+                router_report, name, self.router_address, [*amount, self.user, *extra_calldata],
+                inner=[(pool_address, pool_function)], inner_report=pool_report)
+
+        path = [(pool_address, token_in, token_out), (pool_address, token_out, tokens[-1])]
+        await self.measure_invoke(
+            router_report, "mammoth_swap_path", self.router_address,
+            [*amount, self.user, *to_uint(0), len(path), *[x for hop in path for x in hop]])
+
+        # the LP token is an ERC20 as well
+        for name, calldata in [
+                ("approve", [self.user, *amount]),
+                ("increaseAllowance", [self.user, *amount]),
+                ("decreaseAllowance", [self.user, *amount]),
+                ("transfer", [self.user, *amount]),
+                ("transferFrom", [self.user, self.user, *amount])]:
+            await self.measure_invoke(pool_report, name, pool_address, calldata)
+        await self.measure_invoke(pool_report, "sync", pool_address, [token_in])
+        await self.measure_invoke(pool_report, "skim", pool_address, [token_in, self.user])
+
+        quotes = [(amount, token_in, token_out)] * num_tokens
+        for name in [
+                "view_single_out_given_pool_in", "view_pool_in_given_single_out",
+                "view_pool_minted_given_single_in", "view_single_in_given_pool_out"]:
+            await self.measure_call(pool_report, pool, name, amount, token_in)
+        for name in ["view_out_given_in", "view_in_given_out"]:
+            await self.measure_call(pool_report, pool, name, amount, token_in, token_out)
+        await self.measure_call(pool_report, pool, "view_spot_price", token_in, token_out)
+        await self.measure_call(pool_report, pool, "view_spot_prices")
+        for name in ["view_out_given_in_batch", "view_in_given_out_batch"]:
+            await self.measure_call(pool_report, pool, name, quotes)
+        for name in [
+                "view_proportional_deposits_given_pool_out",
+                "view_proportional_withdraw_given_pool_in"]:
+            await self.measure_call(pool_report, pool, name, amount)
+        for name in [
+                "get_ERC20_balance", "get_ERC20_excess", "is_ERC20_approved", "get_token_weight",
+                "get_pool_into"]:
+            await self.measure_call(pool_report, pool, name, token_in)
+        for name in ["get_pool_state", "name", "symbol", "totalSupply", "decimals"]:
+            await self.measure_call(pool_report, pool, name)
+        await self.measure_call(pool_report, pool, "balanceOf", self.user)
+        await self.measure_call(pool_report, pool, "allowance", self.user, self.user)
+
+        await self.measure_call(router_report, self.router, "is_pool_approved", pool_address)
+        await self.measure_call(router_report, self.router, "get_owner")
+        await self.measure_call(router_report, self.router, "get_num_pools")
+        await self.measure_call(router_report, self.router, "get_pools", 0, POOL_PAGE_LIMIT)
+        await self.measure_call(router_report, self.router, "get_num_pools_for_token", token_in)
+        await self.measure_call(
+            router_report, self.router, "get_pools_for_token", token_in, 0, POOL_PAGE_LIMIT)
+        await self.measure_call(
+            router_report, self.router, "get_num_pools_for_pair", token_in, token_out)
+        await self.measure_call(
+            router_report, self.router, "get_pools_for_pair", token_in, token_out, 0,
+            POOL_PAGE_LIMIT)
+        for name in ["view_out_given_in_batch", "view_in_given_out_batch"]:
+            await self.measure_call(router_report, self.router, name, pool_address, quotes)
+        await self.measure_call(router_report, self.router, "view_out_given_in_path", amount, path)
+        await self.measure_invoke(
+            router_report, "deploy_pool", self.router_address,
+            [str_to_felt("DEFAULTv0"), self.user])
+        await self.deploy_and_create_pool(tokens, router_report)
+
+        return {"pool": pool_report, "router": router_report}
+
+
+def _equal_weights(tokens):
+    """ApprovedERC20 felts of equally weighted tokens, the last takes the rounding remainder."""
+    num_tokens = len(tokens)
+    weight = DECIMALS // num_tokens
+    erc_list = []
+    for i, erc in enumerate(tokens):
+        token_weight = weight if i < num_tokens - 1 else DECIMALS - weight * (num_tokens - 1)
+        erc_list += [erc, *to_uint(token_weight), *to_uint(1000 * DECIMALS)]
+    return erc_list
+
+
+def _entry_points(contract_class):
+    return {
+        entry["name"]
+        for entry in contract_class.abi
+        if entry["type"] == "function"
+    }
+
+
+async def run(min_tokens, max_tokens):
+    bench = Bench()
+    await bench.setup()
+
+    pools = {}
+    for num_tokens in range(min_tokens, max_tokens + 1):
+        pools[str(num_tokens)] = await bench.run_pool_size(num_tokens)
+
+    measured = set()
+    for result in pools.values():
+        measured |= set(result["pool"]) | set(result["router"])
+    entry_points = _entry_points(bench.classes["pool"]) | _entry_points(bench.classes["router"])
+
+    return {
+        "cairo_lang": version("cairo-lang"),
+        "pools": pools,
+        "not_measured": sorted(entry_points - measured),
+    }
+
+
+def compare(baseline, report):
+    """Lines describing every n_steps change between two reports."""
+    lines = []
+    for num_tokens, result in sorted(report["pools"].items(), key=lambda item: int(item[0])):
+        for contract, functions in sorted(result.items()):
+            old_functions = baseline["pools"].get(num_tokens, {}).get(contract, {})
+            for name, resources in sorted(functions.items()):
+                if name not in old_functions:
+                    lines.append(f"{num_tokens} tokens {contract}.{name}: new ({resources['n_steps']} steps)")
+                    continue
+                old_steps = old_functions[name]["n_steps"]
+                new_steps = resources["n_steps"]
+                if old_steps != new_steps:
+                    change = 100 * (new_steps - old_steps) / old_steps
+                    lines.append(
+                        f"{num_tokens} tokens {contract}.{name}: "
+                        f"{old_steps} -> {new_steps} steps ({change:+.1f}%)")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default="bench_resources.json")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--min-tokens", type=int, default=2)
+    parser.add_argument("--max-tokens", type=int, default=8)
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.min_tokens, args.max_tokens))
+
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2, sort_keys=True)
+        file.write("\n")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            for line in compare(json.load(file), report):
+                print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Latency of SmartOrderRouter.route() on random pool snapshots.
+
+Builds a router over --pools random pools of 2 to 4 of --tokens tokens (the
+snapshots of tests/routing_cases.py) and times --repeat routes of each trade
+size once the path cache is warm, printing the fastest and median time
+against the 10ms target:
+
+    python -m benchmarks.bench_routing --pools 60 --tokens 10
+    python benchmarks/bench_routing.py --pools 60 --tokens 10
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+from mammoth.config import DECIMALS
+from mammoth.routing import SmartOrderRouter
+from tests.routing_cases import random_pools
+
+TARGET_SECONDS = 0.01
+
+
+def time_routes(router, erc20_address_in, erc20_address_out, amount_in, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        router.route(erc20_address_in, erc20_address_out, amount_in)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pools", type=int, default=60)
+    parser.add_argument("--tokens", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    router = SmartOrderRouter(random_pools(args.pools, args.tokens, args.seed))
+    router.route(1, 2, DECIMALS)
+    print(f"{len(router.paths(1, 2))} paths from token 1 to token 2")
+
+    for amount in [1, 1000, 100000]:
+        timings = time_routes(router, 1, 2, amount * DECIMALS, args.repeat)
+        fastest, median = min(timings), statistics.median(timings)
+        status = "ok" if fastest < TARGET_SECONDS else "over target"
+        print(f"{amount:>7} in: {fastest * 1000:.2f}ms fastest, {median * 1000:.2f}ms median ({status})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Differential fuzzing of Balancer_Math against an arbitrary precision reference.
+
+Every worker process deploys contracts/lib/balancer_math.cairo on its own
+Starknet testing state, draws its share of the --examples argument tuples
+of every function from the hypothesis strategies in tests/balancer_cases.py
+(seeded per worker), calls the Cairo function in the VM and compares the
+result with mammoth.reference_math. The merged error map goes to a JSON report, keyed
+by function, pow exponent range and trade size:
+
+    python -m benchmarks.fuzz_balancer_math --examples 2000 --workers 8 --output fuzz.json
+
+Every Cairo result is also checked against the python port in
+mammoth.balancer_math, which must match it bit for bit; any difference is
+listed under "mismatches". Inputs on which the Cairo function reverts are
+counted under "reverted" and not called. --python evaluates the port
+instead of the VM, for much larger sweeps of the error map alone.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from hypothesis import HealthCheck, Phase, given, seed, settings
+from starkware.starknet.testing.starknet import Starknet
+
+from tests.balancer_cases import FUNCTIONS, bucket, measure, on_chain_result
+from tests.conftest import BALANCER_CONTRACT
+from tests.oz_utils import from_uint, get_contract_class, to_uint
+
+
+def _record(error_map, key, args, measured):
+    entry = error_map.setdefault(key, {
+        "cases": 0, "max_error": 0, "max_relative_error": 0, "max_bound_ratio": 0,
+        "worst_args": None,
+    })
+    entry["cases"] += 1
+    entry["max_error"] = max(entry["max_error"], measured["error"])
+    entry["max_relative_error"] = max(entry["max_relative_error"], measured["relative_error"])
+    if measured["bound_ratio"] >= entry["max_bound_ratio"]:
+        entry["max_bound_ratio"] = measured["bound_ratio"]
+        entry["worst_args"] = [str(arg) for arg in args]
+
+
+def _merge(report, partial):
+    for key, entry in partial["error_map"].items():
+        if key not in report["error_map"]:
+            report["error_map"][key] = entry
+            continue
+        merged = report["error_map"][key]
+        merged["cases"] += entry["cases"]
+        merged["max_error"] = max(merged["max_error"], entry["max_error"])
+        merged["max_relative_error"] = max(
+            merged["max_relative_error"], entry["max_relative_error"])
+        if entry["max_bound_ratio"] > merged["max_bound_ratio"]:
+            merged["max_bound_ratio"] = entry["max_bound_ratio"]
+            merged["worst_args"] = entry["worst_args"]
+    for name, count in partial["reverted"].items():
+        report["reverted"][name] = report["reverted"].get(name, 0) + count
+    report["mismatches"].extend(partial["mismatches"])
+
+
+async def _deploy_balancer():
+    starknet = await Starknet.empty()
+    return await starknet.deploy(contract_class=get_contract_class(BALANCER_CONTRACT))
+
+
+def fuzz_worker(worker_seed, examples, names, use_vm):
+    """Fuzz names with examples cases each, returns this worker's part of the report."""
+    loop = asyncio.new_event_loop()
+    contract = loop.run_until_complete(_deploy_balancer()) if use_vm else None
+    partial = {"error_map": {}, "reverted": {}, "mismatches": []}
+
+    for name in names:
+        @seed(worker_seed)
+        @settings(
+            max_examples=examples, database=None, deadline=None, phases=[Phase.generate],
+            suppress_health_check=list(HealthCheck))
+        @given(args=FUNCTIONS[name].args)
+        def fuzz(args):
+            expected = on_chain_result(name, args)
+            if expected is None:
+                partial["reverted"][name] = partial["reverted"].get(name, 0) + 1
+                return
+
+            result = expected
+            if use_vm:
+                on_chain = loop.run_until_complete(
+                    getattr(contract, name)(*map(to_uint, args)).call())
+                result = from_uint(on_chain.result[0])
+                if result != expected:
+                    partial["mismatches"].append(
+                        {"function": name, "args": [str(arg) for arg in args],
+                         "cairo": str(result), "python": str(expected)})
+
+            measured = measure(name, args, result)
+            _record(partial["error_map"], bucket(name, measured), args, measured)
+
+        fuzz()
+
+    loop.close()
+    return partial
+
+
+def run(examples, workers, names, use_vm):
+    report = {"error_map": {}, "reverted": {}, "mismatches": []}
+    # split the examples of every function across the workers, each with its own seed
+    per_worker = -(-examples // workers)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(fuzz_worker, worker_seed, per_worker, names, use_vm)
+            for worker_seed in range(workers)
+        ]
+        for future in futures:
+            _merge(report, future.result())
+    report["error_map"] = dict(sorted(report["error_map"].items()))
+    return report
+
+
+def summary(report):
+    """One line per function: cases, worst error relative to the bound, in and out of its domain."""
+    lines = []
+    for name in sorted(FUNCTIONS):
+        entries = {
+            key: entry for key, entry in report["error_map"].items() if key.startswith(name + " ")}
+        cases = sum(entry["cases"] for entry in entries.values())
+        bounded = [e["max_bound_ratio"] for k, e in entries.items() if not k.endswith("unbounded")]
+        unbounded = [e["max_bound_ratio"] for k, e in entries.items() if k.endswith("unbounded")]
+        lines.append(
+            f"{name}: {cases} cases, {report['reverted'].get(name, 0)} reverted, "
+            f"worst error / bound {max(bounded, default=0):.3g} "
+            f"(outside the bounded domain {max(unbounded, default=0):.3g})")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default="fuzz_balancer_math.json")
+    parser.add_argument("--examples", type=int, default=1000, help="cases per function")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--functions", nargs="*", default=sorted(FUNCTIONS))
+    parser.add_argument(
+        "--python", action="store_true", help="evaluate the python port instead of the Cairo VM")
+    args = parser.parse_args()
+
+    report = run(args.examples, args.workers, args.functions, not args.python)
+
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2, sort_keys=True)
+        file.write("\n")
+
+    for line in summary(report):
+        print(line)
+    if report["mismatches"]:
+        print(f"{len(report['mismatches'])} results differ from mammoth.balancer_math")
+
+
+if __name__ == "__main__":
+    main()
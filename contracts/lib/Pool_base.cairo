@@ -8,6 +8,9 @@ from starkware.starknet.common.syscalls import get_contract_address
 from starkware.cairo.common.uint256 import Uint256
 from starkware.cairo.common.bool import TRUE, FALSE
 
+# local
+from contracts.lib.fixed_point.src.fixed_point import FixedPoint
+
 ##########
 # INTERFACES
 ##########
@@ -42,6 +45,16 @@ namespace IERC20:
     end
 end
 
+##########
+# STORAGE
+##########
+
+# balance of each token the pool accounts for, tokens sent to the pool
+# outside deposit are not counted until sync
+@storage_var
+func reserves(erc20_address : felt) -> (reserve : Uint256):
+end
+
 namespace Pool:
     func deposit{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
             amount : Uint256, address_from : felt, erc20_address : felt) -> (bool : felt):
@@ -53,12 +66,64 @@ namespace Pool:
             sender=address_from,
             recipient=this_contract,
             amount=amount)
+
+        let (local reserve : Uint256) = reserves.read(erc20_address)
+        let (local new_reserve : Uint256) = FixedPoint.add(reserve, amount)
+        reserves.write(erc20_address, new_reserve)
         return (TRUE)
     end
 
     func withdraw{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
             amount : Uint256, address_to : felt, erc20_address : felt) -> (bool : felt):
+        alloc_locals
+
+        let (local reserve : Uint256) = reserves.read(erc20_address)
+        let (local new_reserve : Uint256) = FixedPoint.sub(reserve, amount)
+        reserves.write(erc20_address, new_reserve)
+
         IERC20.transfer(contract_address=erc20_address, recipient=address_to, amount=amount)
         return (TRUE)
     end
+
+    func get_reserve{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            erc20_address : felt) -> (reserve : Uint256):
+        alloc_locals
+        let (local reserve : Uint256) = reserves.read(erc20_address)
+        return (reserve)
+    end
+
+    # tokens held above the reserve
+    func get_excess{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            erc20_address : felt) -> (excess : Uint256):
+        alloc_locals
+        let (local this_contract) = get_contract_address()
+
+        let (local balance : Uint256) = IERC20.balanceOf(
+            contract_address=erc20_address, account=this_contract)
+        let (local reserve : Uint256) = reserves.read(erc20_address)
+        let (local excess : Uint256) = FixedPoint.sub(balance, reserve)
+        return (excess)
+    end
+
+    # count tokens sent to the pool outside deposit as liquidity
+    func sync{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            erc20_address : felt) -> (reserve : Uint256):
+        alloc_locals
+        let (local this_contract) = get_contract_address()
+
+        let (local balance : Uint256) = IERC20.balanceOf(
+            contract_address=erc20_address, account=this_contract)
+        reserves.write(erc20_address, balance)
+        return (balance)
+    end
+
+    # send tokens sent to the pool outside deposit to address_to, reserves are unchanged
+    func skim{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            address_to : felt, erc20_address : felt) -> (amount : Uint256):
+        alloc_locals
+
+        let (local excess : Uint256) = get_excess(erc20_address)
+        IERC20.transfer(contract_address=erc20_address, recipient=address_to, amount=excess)
+        return (excess)
+    end
 end
@@ -12,6 +12,7 @@ from starkware.cairo.common.bool import TRUE, FALSE
 from contracts.lib.fixed_point.src.fixed_point import FixedPoint
 from contracts.config import DECIMALS
 from contracts.lib.Pool_base import Pool
+from contracts.lib.balancer_math import Balancer_Math, PowExponent
 
 # approved erc20s
 @storage_var
@@ -47,6 +48,33 @@ end
 func indexed_approved_ercs(index : felt) -> (erc_address : felt):
 end
 
+# bounded_pow exponents fixed by the weights, split once at init_pool
+
+# token weight / total weight
+@storage_var
+func normalized_weight(erc20_address : felt) -> (weight_ratio : Uint256):
+end
+
+# 1 - token weight / total weight, scales the swap fee on single asset deposits and withdrawals
+@storage_var
+func weight_complement(erc20_address : felt) -> (complement : Uint256):
+end
+
+# split of the normalized weight, single asset deposit in and pool in for single out
+@storage_var
+func join_exponent(erc20_address : felt) -> (exponent : PowExponent):
+end
+
+# split of 1 / normalized weight, single asset withdraw out and single in for pool out
+@storage_var
+func exit_exponent(erc20_address : felt) -> (exponent : PowExponent):
+end
+
+# split of weight in / weight out
+@storage_var
+func swap_exponent(erc20_address_in : felt, erc20_address_out : felt) -> (exponent : PowExponent):
+end
+
 ########
 # Structs
 ########
@@ -59,6 +87,27 @@ struct ApprovedERC20:
     member initial_liquidity_high : felt  # weight and initial liquidity are Uint256
 end
 
+# cached view of one pool token, loaded once per batch
+struct TokenState:
+    member erc_address : felt
+    member balance : Uint256
+    member weight : Uint256
+end
+
+# amount is the amount in for out_given_in and the amount out for in_given_out
+struct QuoteRequest:
+    member amount : Uint256
+    member erc20_address_in : felt
+    member erc20_address_out : felt
+end
+
+# price of erc20_address_out in erc20_address_in, swap fee included
+struct SpotPrice:
+    member erc20_address_in : felt
+    member erc20_address_out : felt
+    member spot_price : Uint256
+end
+
 namespace Register:
     func init_pool{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
             caller_address : felt, s_fee : Uint256, e_fee : Uint256, erc_list_len : felt,
@@ -81,9 +130,58 @@ namespace Register:
         assert eq = 1
 
         total_weight.write(Uint256(DECIMALS, 0))
+
+        _store_exponents(erc_list_len, erc_list_len)
         return (TRUE, lp_amount)
     end
 
+    # exponents of every token and every ordered pair of tokens, itself included
+    func _store_exponents{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            num_tokens_remaining : felt, num_tokens_in_pool : felt):
+        alloc_locals
+
+        if num_tokens_remaining == 0:
+            return ()
+        end
+
+        let (local erc : felt) = indexed_approved_ercs.read(num_tokens_remaining - 1)
+        let (local weight : Uint256) = token_weight.read(erc)
+
+        let (local weight_ratio : Uint256) = FixedPoint.div(weight, Uint256(DECIMALS, 0))
+        let (local complement : Uint256) = FixedPoint.sub(Uint256(DECIMALS, 0), weight_ratio)
+        let (local inverse_weight_ratio : Uint256) = FixedPoint.div(
+            Uint256(DECIMALS, 0), weight_ratio)
+        let (local join : PowExponent) = Balancer_Math.split_exponent(weight_ratio)
+        let (local exit : PowExponent) = Balancer_Math.split_exponent(inverse_weight_ratio)
+
+        normalized_weight.write(erc, weight_ratio)
+        weight_complement.write(erc, complement)
+        join_exponent.write(erc, join)
+        exit_exponent.write(erc, exit)
+
+        _store_swap_exponents(erc, weight, num_tokens_in_pool)
+        _store_exponents(num_tokens_remaining - 1, num_tokens_in_pool)
+        return ()
+    end
+
+    func _store_swap_exponents{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            erc_in : felt, weight_in : Uint256, num_tokens_remaining : felt):
+        alloc_locals
+
+        if num_tokens_remaining == 0:
+            return ()
+        end
+
+        let (local erc_out : felt) = indexed_approved_ercs.read(num_tokens_remaining - 1)
+        let (local weight_out : Uint256) = token_weight.read(erc_out)
+        let (local weight_ratio : Uint256) = FixedPoint.div(weight_in, weight_out)
+        let (local exponent : PowExponent) = Balancer_Math.split_exponent(weight_ratio)
+        swap_exponent.write(erc_in, erc_out, exponent)
+
+        _store_swap_exponents(erc_in, weight_in, num_tokens_remaining - 1)
+        return ()
+    end
+
     func _approve_ercs{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
             caller_address : felt, _lp_amount : Uint256, arr_len : felt, arr : ApprovedERC20*) -> (
             weight_sum : Uint256, lp_amount : Uint256):
@@ -146,6 +244,37 @@ namespace Register:
         return (tok_w)
     end
 
+    func get_normalized_weight{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            erc_address : felt) -> (weight_ratio : Uint256, complement : Uint256):
+        alloc_locals
+        let (local weight_ratio : Uint256) = normalized_weight.read(erc_address)
+        let (local complement : Uint256) = weight_complement.read(erc_address)
+        return (weight_ratio, complement)
+    end
+
+    func get_join_exponent{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            erc_address : felt) -> (complement : Uint256, exponent : PowExponent):
+        alloc_locals
+        let (local complement : Uint256) = weight_complement.read(erc_address)
+        let (local exponent : PowExponent) = join_exponent.read(erc_address)
+        return (complement, exponent)
+    end
+
+    func get_exit_exponent{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            erc_address : felt) -> (complement : Uint256, exponent : PowExponent):
+        alloc_locals
+        let (local complement : Uint256) = weight_complement.read(erc_address)
+        let (local exponent : PowExponent) = exit_exponent.read(erc_address)
+        return (complement, exponent)
+    end
+
+    func get_swap_exponent{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            erc_address_in : felt, erc_address_out : felt) -> (exponent : PowExponent):
+        alloc_locals
+        let (local exponent : PowExponent) = swap_exponent.read(erc_address_in, erc_address_out)
+        return (exponent)
+    end
+
     func only_approved_erc20{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
             erc20_address : felt):
         let (approval : felt) = approved_erc20s.read(erc20_address)
@@ -167,6 +296,14 @@ namespace Register:
         return (num)
     end
 
+    func get_swap_fee{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}() -> (
+            fee : Uint256):
+        alloc_locals
+
+        let (local fee : Uint256) = swap_fee.read()
+        return (fee)
+    end
+
     func get_exit_fee{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}() -> (
             fee : Uint256):
         alloc_locals
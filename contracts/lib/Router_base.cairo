@@ -9,11 +9,13 @@
 from starkware.cairo.common.cairo_builtins import HashBuiltin
 from starkware.cairo.common.uint256 import Uint256
 from starkware.cairo.common.bool import TRUE, FALSE
-from starkware.cairo.common.math import assert_not_zero
-from starkware.starknet.common.syscalls import deploy, get_contract_address
+from starkware.cairo.common.math import assert_not_zero, assert_nn
+from starkware.cairo.common.math_cmp import is_le, is_le_felt
+from starkware.starknet.common.syscalls import (
+    deploy, get_contract_address, get_block_timestamp, get_caller_address)
 from starkware.cairo.common.alloc import alloc
 
-from contracts.lib.Pool_registry_base import ApprovedERC20
+from contracts.lib.Pool_registry_base import ApprovedERC20, QuoteRequest
 
 @contract_interface
 namespace IPoolContract:
@@ -37,12 +39,33 @@ namespace IPoolContract:
     end
 
     func swap(
-            amount : Uint256, address : felt, erc20_address_in : felt,
-            erc20_address_out : felt) -> (success : felt):
+            amount : Uint256, address : felt, erc20_address_in : felt, erc20_address_out : felt,
+            max_spot_price : Uint256) -> (amount_out : Uint256):
+    end
+
+    func swap_exact_out(
+            amount_out : Uint256, address : felt, erc20_address_in : felt, erc20_address_out : felt,
+            max_spot_price : Uint256) -> (amount_in : Uint256):
     end
 
     func get_ERC20_balance(erc20_address : felt) -> (res : Uint256):
     end
+
+    func view_out_given_in(amount_in : Uint256, erc20_address_in : felt, erc20_address_out : felt) -> (
+            amount_out : Uint256):
+    end
+
+    func view_in_given_out(amount_out : Uint256, erc20_address_in : felt, erc20_address_out : felt) -> (
+            amount_in : Uint256):
+    end
+
+    func view_out_given_in_batch(quotes_len : felt, quotes : QuoteRequest*) -> (
+            amounts_out_len : felt, amounts_out : Uint256*):
+    end
+
+    func view_in_given_out_batch(quotes_len : felt, quotes : QuoteRequest*) -> (
+            amounts_in_len : felt, amounts_in : Uint256*):
+    end
 end
 
 @contract_interface
@@ -53,11 +76,60 @@ namespace IPoolRegister:
     end
 end
 
+# one leg of a multi hop swap
+struct SwapHop:
+    member pool_address : felt
+    member erc20_address_in : felt
+    member erc20_address_out : felt
+end
+
+# one pool of a batch deployment, its num_tokens ApprovedERC20s follow the previous pool's
+struct PoolConfig:
+    member pool_type : felt
+    member proxy_admin : felt
+    member name : felt
+    member symbol : felt
+    member decimals : felt
+    member swap_fee_low : felt
+    member swap_fee_high : felt
+    member exit_fee_low : felt
+    member exit_fee_high : felt  # fees are Uint256
+    member num_tokens : felt
+end
+
 # store the address of the pool contract
 @storage_var
 func approved_pool_address(pool_address : felt) -> (bool : felt):
 end
 
+# created pools in creation order
+@storage_var
+func num_pools() -> (num : felt):
+end
+
+@storage_var
+func indexed_pools(index : felt) -> (pool_address : felt):
+end
+
+# created pools holding a given erc20, in creation order
+@storage_var
+func num_token_pools(erc20_address : felt) -> (num : felt):
+end
+
+@storage_var
+func indexed_token_pools(erc20_address : felt, index : felt) -> (pool_address : felt):
+end
+
+# created pools holding both erc20s of a pair, in creation order, keyed (lower address, higher address)
+@storage_var
+func num_pair_pools(erc20_address_low : felt, erc20_address_high : felt) -> (num : felt):
+end
+
+@storage_var
+func indexed_pair_pools(erc20_address_low : felt, erc20_address_high : felt, index : felt) -> (
+        pool_address : felt):
+end
+
 # deployment salt
 @storage_var
 func salt() -> (salt : felt):
@@ -129,49 +201,180 @@ namespace Router:
 
     func call_swap{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
             amount : Uint256, address : felt, pool_address : felt, erc20_address_in : felt,
-            erc20_address_out : felt) -> (success : felt):
+            erc20_address_out : felt, max_spot_price : Uint256) -> (amount_out : Uint256):
         alloc_locals
-        let (local success : felt) = IPoolContract.swap(
+        let (local amount_out : Uint256) = IPoolContract.swap(
             contract_address=pool_address,
             amount=amount,
             address=address,
             erc20_address_in=erc20_address_in,
+            erc20_address_out=erc20_address_out,
+            max_spot_price=max_spot_price)
+        return (amount_out)
+    end
+
+    func call_swap_exact_out{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            amount_out : Uint256, address : felt, pool_address : felt, erc20_address_in : felt,
+            erc20_address_out : felt, max_spot_price : Uint256) -> (amount_in : Uint256):
+        alloc_locals
+        let (local amount_in : Uint256) = IPoolContract.swap_exact_out(
+            contract_address=pool_address,
+            amount_out=amount_out,
+            address=address,
+            erc20_address_in=erc20_address_in,
+            erc20_address_out=erc20_address_out,
+            max_spot_price=max_spot_price)
+        return (amount_in)
+    end
+
+    # swaps spend the user's approvals, only the user can choose their bounds
+    func assert_caller_is_user{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            user_address : felt):
+        alloc_locals
+
+        let (local caller_address : felt) = get_caller_address()
+
+        with_attr error_message("CALLER IS NOT USER : ROUTER LEVEL"):
+            assert caller_address = user_address
+        end
+
+        return ()
+    end
+
+    func assert_before_deadline{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            deadline : felt):
+        alloc_locals
+
+        let (local block_timestamp : felt) = get_block_timestamp()
+        let (local in_time : felt) = is_le(block_timestamp, deadline)
+
+        with_attr error_message("SWAP DEADLINE PASSED : ROUTER LEVEL"):
+            assert in_time = TRUE
+        end
+
+        return ()
+    end
+
+    func call_view_out_given_in{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            amount : Uint256, pool_address : felt, erc20_address_in : felt,
+            erc20_address_out : felt) -> (amount_out : Uint256):
+        alloc_locals
+        let (local amount_out : Uint256) = IPoolContract.view_out_given_in(
+            contract_address=pool_address,
+            amount_in=amount,
+            erc20_address_in=erc20_address_in,
             erc20_address_out=erc20_address_out)
-        assert success = TRUE
-        return (TRUE)
+        return (amount_out)
+    end
+
+    func call_view_in_given_out{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            amount : Uint256, pool_address : felt, erc20_address_in : felt,
+            erc20_address_out : felt) -> (amount_in : Uint256):
+        alloc_locals
+        let (local amount_in : Uint256) = IPoolContract.view_in_given_out(
+            contract_address=pool_address,
+            amount_out=amount,
+            erc20_address_in=erc20_address_in,
+            erc20_address_out=erc20_address_out)
+        return (amount_in)
+    end
+
+    func call_view_out_given_in_batch{
+            syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            pool_address : felt, quotes_len : felt, quotes : QuoteRequest*) -> (
+            amounts_out_len : felt, amounts_out : Uint256*):
+        alloc_locals
+        let (local amounts_out_len : felt,
+            local amounts_out : Uint256*) = IPoolContract.view_out_given_in_batch(
+            contract_address=pool_address, quotes_len=quotes_len, quotes=quotes)
+        return (amounts_out_len, amounts_out)
+    end
+
+    func call_view_in_given_out_batch{
+            syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            pool_address : felt, quotes_len : felt, quotes : QuoteRequest*) -> (
+            amounts_in_len : felt, amounts_in : Uint256*):
+        alloc_locals
+        let (local amounts_in_len : felt,
+            local amounts_in : Uint256*) = IPoolContract.view_in_given_out_batch(
+            contract_address=pool_address, quotes_len=quotes_len, quotes=quotes)
+        return (amounts_in_len, amounts_in)
     end
 
     func deploy_pool{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
             pool_type : felt, proxy_admin : felt) -> (new_pool_address : felt):
         alloc_locals
 
-        let (local proxy_hash : felt) = proxy_class_hash.read()
-        let (local pool_hash : felt) = pool_class_hash.read(pool_type)
+        let (local proxy_hash : felt) = get_proxy_class_hash()
+        let (local pool_hash : felt) = get_pool_class_hash(pool_type)
 
-        with_attr error_message("PROXY HASH NOT SET"):
-            assert_not_zero(proxy_hash)
-        end
+        let (local contract_salt : felt) = salt.read()
+        let (local new_pool_address : felt) = deploy_proxy(
+            proxy_hash, pool_hash, proxy_admin, contract_salt)
 
-        with_attr error_message("NOT A VALID POOL TYPE"):
-            assert_not_zero(pool_hash)
-        end
+        salt.write(contract_salt + 1)
+
+        return (new_pool_address)
+    end
+
+    # deploys a pool proxy with the given salt, the caller advances the salt counter
+    func deploy_proxy{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            proxy_hash : felt, pool_hash : felt, proxy_admin : felt, contract_salt : felt) -> (
+            new_pool_address : felt):
+        alloc_locals
 
         let (local call_data_arr : felt*) = alloc()
         assert call_data_arr[0] = pool_hash
         assert call_data_arr[1] = proxy_admin
 
-        let (local contract_salt : felt) = salt.read()
         let (local new_pool_address : felt) = deploy(
             class_hash=proxy_hash,
             contract_address_salt=contract_salt,
             constructor_calldata_size=2,
             constructor_calldata=call_data_arr)
 
-        salt.write(contract_salt + 1)
-
         return (new_pool_address)
     end
 
+    func get_proxy_class_hash{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            ) -> (proxy_hash : felt):
+        alloc_locals
+
+        let (local proxy_hash : felt) = proxy_class_hash.read()
+
+        with_attr error_message("PROXY HASH NOT SET"):
+            assert_not_zero(proxy_hash)
+        end
+
+        return (proxy_hash)
+    end
+
+    func get_pool_class_hash{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            pool_type : felt) -> (pool_hash : felt):
+        alloc_locals
+
+        let (local pool_hash : felt) = pool_class_hash.read(pool_type)
+
+        with_attr error_message("NOT A VALID POOL TYPE"):
+            assert_not_zero(pool_hash)
+        end
+
+        return (pool_hash)
+    end
+
+    func get_salt{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}() -> (
+            contract_salt : felt):
+        alloc_locals
+        let (local contract_salt : felt) = salt.read()
+        return (contract_salt)
+    end
+
+    func set_salt{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            contract_salt : felt):
+        salt.write(contract_salt)
+        return ()
+    end
+
     func setup_pool{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
             router : felt, name : felt, symbol : felt, decimals : felt, pool_address : felt):
         IPoolContract.setup_pool(
@@ -188,6 +391,12 @@ namespace Router:
             erc_list_len : felt, erc_list : ApprovedERC20*) -> (bool : felt, lp_amount : Uint256):
         alloc_locals
         approved_pool_address.write(pool_address, TRUE)
+
+        let (local pool_index : felt) = num_pools.read()
+        indexed_pools.write(pool_index, pool_address)
+        num_pools.write(pool_index + 1)
+        _index_token_pools(pool_address, erc_list_len, erc_list)
+
         let (local success : felt, local lp_amount : Uint256) = IPoolRegister.init_pool(
             contract_address=pool_address,
             caller_address=caller_address,
@@ -199,6 +408,191 @@ namespace Router:
         return (TRUE, lp_amount)
     end
 
+    func _index_token_pools{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            pool_address : felt, erc_list_len : felt, erc_list : ApprovedERC20*):
+        alloc_locals
+
+        if erc_list_len == 0:
+            return ()
+        end
+
+        let (local token_pool_index : felt) = num_token_pools.read(erc_list.erc_address)
+        indexed_token_pools.write(erc_list.erc_address, token_pool_index, pool_address)
+        num_token_pools.write(erc_list.erc_address, token_pool_index + 1)
+
+        # pair with every token after it in the list, so each pair is indexed once
+        _index_pair_pools(
+            pool_address, erc_list.erc_address, erc_list_len - 1, erc_list + ApprovedERC20.SIZE)
+
+        _index_token_pools(pool_address, erc_list_len - 1, erc_list + ApprovedERC20.SIZE)
+        return ()
+    end
+
+    func _index_pair_pools{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            pool_address : felt, erc20_address : felt, erc_list_len : felt,
+            erc_list : ApprovedERC20*):
+        alloc_locals
+
+        if erc_list_len == 0:
+            return ()
+        end
+
+        let (local low : felt, local high : felt) = _pair_key(erc20_address, erc_list.erc_address)
+        let (local pair_pool_index : felt) = num_pair_pools.read(low, high)
+        indexed_pair_pools.write(low, high, pair_pool_index, pool_address)
+        num_pair_pools.write(low, high, pair_pool_index + 1)
+
+        _index_pair_pools(
+            pool_address, erc20_address, erc_list_len - 1, erc_list + ApprovedERC20.SIZE)
+        return ()
+    end
+
+    # a pair is stored once, under its addresses in increasing order
+    func _pair_key{range_check_ptr}(erc20_address_a : felt, erc20_address_b : felt) -> (
+            low : felt, high : felt):
+        let (a_first : felt) = is_le_felt(erc20_address_a, erc20_address_b)
+        if a_first == TRUE:
+            return (erc20_address_a, erc20_address_b)
+        end
+        return (erc20_address_b, erc20_address_a)
+    end
+
+    func get_num_pools{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}() -> (
+            num : felt):
+        alloc_locals
+        let (local num : felt) = num_pools.read()
+        return (num)
+    end
+
+    func get_num_token_pools{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            erc20_address : felt) -> (num : felt):
+        alloc_locals
+        let (local num : felt) = num_token_pools.read(erc20_address)
+        return (num)
+    end
+
+    # pools [offset, offset + limit) of the creation order, fewer at the end of the list
+    func get_pools{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            offset : felt, limit : felt) -> (pools_len : felt, pools : felt*):
+        alloc_locals
+
+        let (local num : felt) = num_pools.read()
+        let (local pools_len : felt) = _page_length(num, offset, limit)
+        let (local pools : felt*) = alloc()
+        _read_pools(offset, pools_len, pools)
+
+        return (pools_len, pools)
+    end
+
+    # pools [offset, offset + limit) of those holding erc20_address
+    func get_token_pools{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            erc20_address : felt, offset : felt, limit : felt) -> (pools_len : felt, pools : felt*):
+        alloc_locals
+
+        let (local num : felt) = num_token_pools.read(erc20_address)
+        let (local pools_len : felt) = _page_length(num, offset, limit)
+        let (local pools : felt*) = alloc()
+        _read_token_pools(erc20_address, offset, pools_len, pools)
+
+        return (pools_len, pools)
+    end
+
+    func get_num_pair_pools{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            erc20_address_a : felt, erc20_address_b : felt) -> (num : felt):
+        alloc_locals
+        let (local low : felt, local high : felt) = _pair_key(erc20_address_a, erc20_address_b)
+        let (local num : felt) = num_pair_pools.read(low, high)
+        return (num)
+    end
+
+    # pools [offset, offset + limit) of those holding both erc20_address_a and erc20_address_b
+    func get_pair_pools{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            erc20_address_a : felt, erc20_address_b : felt, offset : felt, limit : felt) -> (
+            pools_len : felt, pools : felt*):
+        alloc_locals
+
+        let (local low : felt, local high : felt) = _pair_key(erc20_address_a, erc20_address_b)
+        let (local num : felt) = num_pair_pools.read(low, high)
+        let (local pools_len : felt) = _page_length(num, offset, limit)
+        let (local pools : felt*) = alloc()
+        _read_pair_pools(low, high, offset, pools_len, pools)
+
+        return (pools_len, pools)
+    end
+
+    func _page_length{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            num : felt, offset : felt, limit : felt) -> (page_len : felt):
+        alloc_locals
+
+        with_attr error_message("INVALID PAGE : ROUTER LEVEL"):
+            assert_nn(offset)
+            assert_nn(limit)
+        end
+
+        let (local past_end : felt) = is_le(num, offset)
+        if past_end == TRUE:
+            return (0)
+        end
+
+        let (local full_page : felt) = is_le(limit, num - offset)
+        if full_page == TRUE:
+            return (limit)
+        end
+
+        return (num - offset)
+    end
+
+    func _read_pools{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            index : felt, pools_len : felt, pools : felt*):
+        alloc_locals
+
+        if pools_len == 0:
+            return ()
+        end
+
+        let (local pool_address : felt) = indexed_pools.read(index)
+
+        # assert used for assignment
+        assert [pools] = pool_address
+
+        _read_pools(index + 1, pools_len - 1, pools + 1)
+        return ()
+    end
+
+    func _read_token_pools{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            erc20_address : felt, index : felt, pools_len : felt, pools : felt*):
+        alloc_locals
+
+        if pools_len == 0:
+            return ()
+        end
+
+        let (local pool_address : felt) = indexed_token_pools.read(erc20_address, index)
+
+        # assert used for assignment
+        assert [pools] = pool_address
+
+        _read_token_pools(erc20_address, index + 1, pools_len - 1, pools + 1)
+        return ()
+    end
+
+    func _read_pair_pools{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            low : felt, high : felt, index : felt, pools_len : felt, pools : felt*):
+        alloc_locals
+
+        if pools_len == 0:
+            return ()
+        end
+
+        let (local pool_address : felt) = indexed_pair_pools.read(low, high, index)
+
+        # assert used for assignment
+        assert [pools] = pool_address
+
+        _read_pair_pools(low, high, index + 1, pools_len - 1, pools + 1)
+        return ()
+    end
+
     func only_approved_pool{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
             pool_address : felt):
         alloc_locals
@@ -3,10 +3,10 @@
 from starkware.cairo.common.cairo_builtins import HashBuiltin, SignatureBuiltin
 from starkware.cairo.common.alloc import alloc
 from starkware.cairo.common.registers import get_fp_and_pc
-from starkware.cairo.common.uint256 import Uint256
+from starkware.cairo.common.uint256 import Uint256, uint256_eq
 
 from contracts.lib.fixed_point.src.fixed_point import FixedPoint
-from contracts.config import DECIMALS
+from contracts.config import DECIMALS, PRECISION
 
 #########
 # STRUCT
@@ -17,6 +17,13 @@ struct TokenAndAmount:
     member amount : Uint256
 end
 
+# bounded_pow exponent split the way FixedPoint.bounded_pow splits it, so an
+# exponent fixed by the pool weights is split once at init_pool
+struct PowExponent:
+    member whole : Uint256  # integer part, unscaled
+    member remain : Uint256  # fractional part
+end
+
 #########
 # BALANCER STYLE MATH
 # CONSTANT VALUE INVARIANT
@@ -25,6 +32,49 @@ end
 # Cairo implementation of https://github.com/balancer-labs/balancer-core/blob/master/contracts/BMath.sol
 
 namespace Balancer_Math:
+    ###########################
+    # EXPONENTS
+    ###########################
+
+    @view
+    func split_exponent{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            exponent : Uint256) -> (split : PowExponent):
+        alloc_locals
+
+        let (local whole : Uint256) = FixedPoint.floor(exponent)
+        let (local remain : Uint256) = FixedPoint.sub(exponent, whole)
+        let (local whole_unscaled : Uint256) = FixedPoint.floor_intermediate(whole)
+
+        return (PowExponent(whole_unscaled, remain))
+    end
+
+    # same result as FixedPoint.bounded_pow(base, exponent) for split = split_exponent(exponent)
+    func bounded_pow_with_exponent{
+            syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            base : Uint256, split : PowExponent) -> (result : Uint256):
+        alloc_locals
+
+        FixedPoint.assert_base_within_bound(base)
+        let (local whole_pow : Uint256) = FixedPoint.integer_pow(base, split.whole)
+
+        let (local no_remain : felt) = uint256_eq(split.remain, Uint256(0, 0))
+        if no_remain == 1:
+            return (whole_pow)
+        end
+
+        let (local partial_pow : Uint256) = FixedPoint.bounded_decimal_pow(
+            base, split.remain, Uint256(PRECISION, 0))
+
+        # FixedPoint.bounded_pow returns 2 when the series collapses to zero
+        let (local collapsed : felt) = uint256_eq(partial_pow, Uint256(0, 0))
+        if collapsed == 1:
+            return (Uint256(2, 0))
+        end
+
+        let (local result : Uint256) = FixedPoint.mul(whole_pow, partial_pow)
+        return (result)
+    end
+
     #
     #   a_balance/a_weight          1
     #           /               *           /
@@ -70,17 +120,35 @@ namespace Balancer_Math:
         alloc_locals
 
         let (local divide_weights : Uint256) = FixedPoint.div(a_weight, total_weight)
+        let (local weight_complement : Uint256) = FixedPoint.sub(
+            Uint256(DECIMALS, 0), divide_weights)
+        let (local exponent : PowExponent) = split_exponent(divide_weights)
+
+        let (local amount_pool_tokens_out : Uint256) = get_pool_minted_given_single_in_with_exponent(
+            amount_of_a_in, a_balance, supply, weight_complement, exponent, swap_fee)
 
-        let (local x : Uint256) = FixedPoint.sub(Uint256(DECIMALS, 0), divide_weights)
-        let (local x_times_fee : Uint256) = FixedPoint.mul(x, swap_fee)
+        return (amount_pool_tokens_out)
+    end
+
+    # weight_complement is 1 - a_weight / total_weight and exponent the split of
+    # a_weight / total_weight
+    @view
+    func get_pool_minted_given_single_in_with_exponent{
+            syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            amount_of_a_in : Uint256, a_balance : Uint256, supply : Uint256,
+            weight_complement : Uint256, exponent : PowExponent, swap_fee : Uint256) -> (
+            pool_tokens_out : Uint256):
+        alloc_locals
+
+        let (local x_times_fee : Uint256) = FixedPoint.mul(weight_complement, swap_fee)
         let (local swap_fee_adj : Uint256) = FixedPoint.sub(Uint256(DECIMALS, 0), x_times_fee)
         let (local token_amount_in_after_fee : Uint256) = FixedPoint.mul(
             amount_of_a_in, swap_fee_adj)
         let (local new_token_balance_in : Uint256) = FixedPoint.add(
             token_amount_in_after_fee, a_balance)
         let (local balance_in_ratio : Uint256) = FixedPoint.div(new_token_balance_in, a_balance)
-        let (local pool_multiplier : Uint256) = FixedPoint.bounded_pow(
-            balance_in_ratio, divide_weights)
+        let (local pool_multiplier : Uint256) = bounded_pow_with_exponent(
+            balance_in_ratio, exponent)
         let (local new_pool_supply : Uint256) = FixedPoint.mul(pool_multiplier, supply)
         let (local amount_pool_tokens_out : Uint256) = FixedPoint.sub(new_pool_supply, supply)
 
@@ -105,14 +173,35 @@ namespace Balancer_Math:
         alloc_locals
 
         let (local weight_ratio : Uint256) = FixedPoint.div(a_weight, total_weight)
-        let (local fee_adj_one : Uint256) = FixedPoint.sub(Uint256(DECIMALS, 0), weight_ratio)
-        let (local fee_adj_two : Uint256) = FixedPoint.mul(fee_adj_one, swap_fee)
+        let (local inverse_weight_ratio : Uint256) = FixedPoint.div(
+            Uint256(DECIMALS, 0), weight_ratio)
+        let (local exponent : PowExponent) = split_exponent(inverse_weight_ratio)
+        let (local weight_complement : Uint256) = FixedPoint.sub(
+            Uint256(DECIMALS, 0), weight_ratio)
+
+        let (local amount_a_in : Uint256) = get_single_in_given_pool_out_with_exponent(
+            pool_amount_out, a_balance, supply, weight_complement, exponent, swap_fee)
+
+        return (amount_a_in)
+    end
+
+    # weight_complement is 1 - a_weight / total_weight and exponent the split of
+    # total_weight / a_weight
+    @view
+    func get_single_in_given_pool_out_with_exponent{
+            syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            pool_amount_out : Uint256, a_balance : Uint256, supply : Uint256,
+            weight_complement : Uint256, exponent : PowExponent, swap_fee : Uint256) -> (
+            amount_of_a_in : Uint256):
+        alloc_locals
+
+        let (local fee_adj_two : Uint256) = FixedPoint.mul(weight_complement, swap_fee)
         let (local fee_adj : Uint256) = FixedPoint.sub(Uint256(DECIMALS, 0), fee_adj_two)
 
         let (local pool_supp_adj : Uint256) = FixedPoint.add(supply, pool_amount_out)
         let (local pool_ratio : Uint256) = FixedPoint.div(pool_supp_adj, supply)
-        let (local exponent : Uint256) = FixedPoint.div(Uint256(DECIMALS, 0), weight_ratio)
-        let (local balance_in_multiplier : Uint256) = FixedPoint.bounded_pow(pool_ratio, exponent)
+        let (local balance_in_multiplier : Uint256) = bounded_pow_with_exponent(
+            pool_ratio, exponent)
         let (local new_balance_in : Uint256) = FixedPoint.mul(balance_in_multiplier, a_balance)
         let (local token_in_after_fee : Uint256) = FixedPoint.sub(new_balance_in, a_balance)
 
@@ -140,6 +229,29 @@ namespace Balancer_Math:
             amount_token_out : Uint256):
         alloc_locals
 
+        let (local weight_ratio : Uint256) = FixedPoint.div(a_weight, total_weight)
+        let (local inverse_weight_ratio : Uint256) = FixedPoint.div(
+            Uint256(DECIMALS, 0), weight_ratio)
+        let (local exponent : PowExponent) = split_exponent(inverse_weight_ratio)
+        let (local weight_complement : Uint256) = FixedPoint.sub(
+            Uint256(DECIMALS, 0), weight_ratio)
+
+        let (local token_amount_out : Uint256) = get_single_out_given_pool_in_with_exponent(
+            pool_amount_in, a_balance, supply, weight_complement, exponent, swap_fee, exit_fee)
+
+        return (token_amount_out)
+    end
+
+    # weight_complement is 1 - a_weight / total_weight and exponent the split of
+    # total_weight / a_weight
+    @view
+    func get_single_out_given_pool_in_with_exponent{
+            syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            pool_amount_in : Uint256, a_balance : Uint256, supply : Uint256,
+            weight_complement : Uint256, exponent : PowExponent, swap_fee : Uint256,
+            exit_fee : Uint256) -> (amount_token_out : Uint256):
+        alloc_locals
+
         let (local one_minus_exit_fee : Uint256) = FixedPoint.sub(Uint256(DECIMALS, 0), exit_fee)
         let (local pool_amount_in_after_exit_fee : Uint256) = FixedPoint.mul(
             pool_amount_in, one_minus_exit_fee)
@@ -147,9 +259,7 @@ namespace Balancer_Math:
             supply, pool_amount_in_after_exit_fee)
         let (local new_pool_div_old_pool : Uint256) = FixedPoint.div(new_pool_supply, supply)
 
-        let (local weight_ratio : Uint256) = FixedPoint.div(a_weight, total_weight)
-        let (local exponent : Uint256) = FixedPoint.div(Uint256(DECIMALS, 0), weight_ratio)
-        let (local token_out_ratio : Uint256) = FixedPoint.bounded_pow(
+        let (local token_out_ratio : Uint256) = bounded_pow_with_exponent(
             new_pool_div_old_pool, exponent)
 
         let (local new_token_balance : Uint256) = FixedPoint.mul(token_out_ratio, a_balance)
@@ -157,10 +267,8 @@ namespace Balancer_Math:
             a_balance, new_token_balance)
 
         # swap fee
-        let (local one_minus_weight_ratio : Uint256) = FixedPoint.sub(
-            Uint256(DECIMALS, 0), weight_ratio)
         let (local multiply_by_swap_fee : Uint256) = FixedPoint.mul(
-            one_minus_weight_ratio, swap_fee)
+            weight_complement, swap_fee)
         let (local one_minus_all : Uint256) = FixedPoint.sub(
             Uint256(DECIMALS, 0), multiply_by_swap_fee)
 
@@ -191,15 +299,33 @@ namespace Balancer_Math:
         alloc_locals
 
         let (local weight_ratio : Uint256) = FixedPoint.div(b_weight, total_weight)
+        let (local weight_complement : Uint256) = FixedPoint.sub(
+            Uint256(DECIMALS, 0), weight_ratio)
+        let (local exponent : PowExponent) = split_exponent(weight_ratio)
+
+        let (local pool_amount_in : Uint256) = get_pool_in_given_single_out_with_exponent(
+            amount_b_out, b_balance, supply, weight_complement, exponent, swap_fee, exit_fee)
+
+        return (pool_amount_in)
+    end
+
+    # weight_complement is 1 - b_weight / total_weight and exponent the split of
+    # b_weight / total_weight
+    @view
+    func get_pool_in_given_single_out_with_exponent{
+            syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            amount_b_out : Uint256, b_balance : Uint256, supply : Uint256,
+            weight_complement : Uint256, exponent : PowExponent, swap_fee : Uint256,
+            exit_fee : Uint256) -> (pool_amount_in : Uint256):
+        alloc_locals
 
-        let (local weight_adj : Uint256) = FixedPoint.sub(Uint256(DECIMALS, 0), weight_ratio)
-        let (local fee_adj_one : Uint256) = FixedPoint.mul(weight_adj, swap_fee)
+        let (local fee_adj_one : Uint256) = FixedPoint.mul(weight_complement, swap_fee)
         let (local fee_adj : Uint256) = FixedPoint.sub(Uint256(DECIMALS, 0), fee_adj_one)
         let (local token_out_before_fee : Uint256) = FixedPoint.div(amount_b_out, fee_adj)
         let (local new_balance_out : Uint256) = FixedPoint.sub(b_balance, token_out_before_fee)
         let (local token_out_ratio : Uint256) = FixedPoint.div(new_balance_out, b_balance)
 
-        let (local pool_ratio : Uint256) = FixedPoint.bounded_pow(token_out_ratio, weight_ratio)
+        let (local pool_ratio : Uint256) = bounded_pow_with_exponent(token_out_ratio, exponent)
         let (local new_pool_supply : Uint256) = FixedPoint.mul(pool_ratio, supply)
         let (local pool_amount_in_after_exit_fee : Uint256) = FixedPoint.sub(
             supply, new_pool_supply)
@@ -232,13 +358,29 @@ namespace Balancer_Math:
         alloc_locals
 
         let (local weight_ratio : Uint256) = FixedPoint.div(a_weight, b_weight)
+        let (local exponent : PowExponent) = split_exponent(weight_ratio)
+
+        let (local token_amount_out : Uint256) = get_out_given_in_with_exponent(
+            amount_of_a_in, a_balance, b_balance, exponent, swap_fee)
+
+        return (token_amount_out)
+    end
+
+    # exponent is the split of a_weight / b_weight
+    @view
+    func get_out_given_in_with_exponent{
+            syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            amount_of_a_in : Uint256, a_balance : Uint256, b_balance : Uint256,
+            exponent : PowExponent, swap_fee : Uint256) -> (amount_of_b_out : Uint256):
+        alloc_locals
+
         let (local one_minus_swap_fee : Uint256) = FixedPoint.sub(Uint256(DECIMALS, 0), swap_fee)
         let (local adjusted_in : Uint256) = FixedPoint.mul(amount_of_a_in, one_minus_swap_fee)
 
         let (local new_balance_in : Uint256) = FixedPoint.add(a_balance, adjusted_in)
         let (local balance_in_ratio : Uint256) = FixedPoint.div(a_balance, new_balance_in)
-        let (local impact_on_balance_out : Uint256) = FixedPoint.bounded_pow(
-            balance_in_ratio, weight_ratio)
+        let (local impact_on_balance_out : Uint256) = bounded_pow_with_exponent(
+            balance_in_ratio, exponent)
         let (local out_balance_multiplier : Uint256) = FixedPoint.sub(
             Uint256(DECIMALS, 0), impact_on_balance_out)
         let (local token_amount_out : Uint256) = FixedPoint.mul(b_balance, out_balance_multiplier)
@@ -264,14 +406,30 @@ namespace Balancer_Math:
         alloc_locals
 
         let (local weight_ratio : Uint256) = FixedPoint.div(b_weight, a_weight)
+        let (local exponent : PowExponent) = split_exponent(weight_ratio)
+
+        let (local amount_of_a_in : Uint256) = get_in_given_out_with_exponent(
+            amount_of_b_out, b_balance, a_balance, exponent, swap_fee)
+
+        return (amount_of_a_in)
+    end
+
+    # exponent is the split of b_weight / a_weight
+    @view
+    func get_in_given_out_with_exponent{
+            syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            amount_of_b_out : Uint256, b_balance : Uint256, a_balance : Uint256,
+            exponent : PowExponent, swap_fee : Uint256) -> (amount_of_a_in : Uint256):
+        alloc_locals
+
         let (local fee_adj : Uint256) = FixedPoint.sub(Uint256(DECIMALS, 0), swap_fee)
 
         let (local balance_out_minus_amount_out : Uint256) = FixedPoint.sub(
             b_balance, amount_of_b_out)
         let (local balance_out_ratio : Uint256) = FixedPoint.div(
             b_balance, balance_out_minus_amount_out)
-        let (local weight_ratio_transform : Uint256) = FixedPoint.bounded_pow(
-            balance_out_ratio, weight_ratio)
+        let (local weight_ratio_transform : Uint256) = bounded_pow_with_exponent(
+            balance_out_ratio, exponent)
         let (local balance_in_multiplier_sans_fee : Uint256) = FixedPoint.sub(
             weight_ratio_transform, Uint256(DECIMALS, 0))
         let (local balance_in_multiplier : Uint256) = FixedPoint.div(
@@ -290,17 +448,13 @@ namespace Balancer_Math:
             output_arr_len : felt, output_arr : TokenAndAmount*):
         alloc_locals
 
-        let (local fee_adj : Uint256) = FixedPoint.mul(pool_amount_in, exit_fee)
-        let (local adj_in : Uint256) = FixedPoint.sub(pool_amount_in, fee_adj)
-        let (local adj_pool_supply_ratio : Uint256) = FixedPoint.div(adj_in, pool_total_supply)
-
+        let (local adj_pool_supply_ratio : Uint256) = get_proportional_withdraw_ratio(
+            pool_total_supply, pool_amount_in, exit_fee)
         let (local output_arr : TokenAndAmount*) = alloc()
 
-        let (local return_arr_len : felt,
-            local return_arr : TokenAndAmount*) = _recursive_get_balance_needed(
-            adj_pool_supply_ratio, token_list_len, token_list, 0, output_arr, 0)
+        _get_balances_needed(adj_pool_supply_ratio, token_list_len, token_list, output_arr)
 
-        return (return_arr_len, return_arr)
+        return (token_list_len, output_arr)
     end
 
     @view
@@ -310,56 +464,59 @@ namespace Balancer_Math:
             token_list : TokenAndAmount*) -> (output_arr_len : felt, output_arr : TokenAndAmount*):
         alloc_locals
 
-        let (local pool_supply_ratio : Uint256) = FixedPoint.div(pool_amount_out, pool_supply)
+        let (local pool_supply_ratio : Uint256) = get_proportional_deposit_ratio(
+            pool_supply, pool_amount_out)
         let (local output_arr : TokenAndAmount*) = alloc()
 
-        let (local return_arr_len : felt,
-            local return_arr : TokenAndAmount*) = _recursive_get_balance_needed(
-            pool_supply_ratio, token_list_len, token_list, 0, output_arr, 0)
+        _get_balances_needed(pool_supply_ratio, token_list_len, token_list, output_arr)
 
-        return (return_arr_len, return_arr)
+        return (token_list_len, output_arr)
     end
 
-    func _recursive_get_balance_needed{
+    # share of every token balance paid out for pool_amount_in, after the exit fee
+    @view
+    func get_proportional_withdraw_ratio{
             syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
-            pool_supply_ratio : Uint256, input_arr_len : felt, input_arr : TokenAndAmount*,
-            output_arr_len : felt, output_arr : TokenAndAmount*, counter : felt) -> (
-            list_len : felt, list : TokenAndAmount*):
+            pool_total_supply : Uint256, pool_amount_in : Uint256, exit_fee : Uint256) -> (
+            pool_supply_ratio : Uint256):
         alloc_locals
 
-        # needed for dereferencing struct
-        let (__fp__, _) = get_fp_and_pc()
+        let (local fee_adj : Uint256) = FixedPoint.mul(pool_amount_in, exit_fee)
+        let (local adj_in : Uint256) = FixedPoint.sub(pool_amount_in, fee_adj)
+        let (local adj_pool_supply_ratio : Uint256) = FixedPoint.div(adj_in, pool_total_supply)
+
+        return (adj_pool_supply_ratio)
+    end
 
+    # share of every token balance paid in for pool_amount_out
+    @view
+    func get_proportional_deposit_ratio{
+            syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            pool_supply : Uint256, pool_amount_out : Uint256) -> (pool_supply_ratio : Uint256):
+        alloc_locals
+
+        let (local pool_supply_ratio : Uint256) = FixedPoint.div(pool_amount_out, pool_supply)
+
+        return (pool_supply_ratio)
+    end
+
+    # tail call over the list, members are read through the pointer so no frame needs get_fp_and_pc
+    func _get_balances_needed{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            pool_supply_ratio : Uint256, input_arr_len : felt, input_arr : TokenAndAmount*,
+            output_arr : TokenAndAmount*):
         if input_arr_len == 0:
-            return (output_arr_len, output_arr)
+            return ()
         end
 
-        let current_struct : TokenAndAmount* = [&input_arr]
-        let (local amount_in : Uint256) = _get_balance_needed_from_pool_supply(
-            pool_supply_ratio, current_struct.amount)
+        let (amount_required : Uint256) = FixedPoint.mul(input_arr.amount, pool_supply_ratio)
 
         # assert used for assignment
-        assert output_arr[counter] = TokenAndAmount(current_struct.erc_address, amount_in)
+        assert [output_arr] = TokenAndAmount(input_arr.erc_address, amount_required)
 
-        let (local _output_arr_len : felt,
-            _output_arr : TokenAndAmount*) = _recursive_get_balance_needed(
+        return _get_balances_needed(
             pool_supply_ratio,
             input_arr_len - 1,
             input_arr + TokenAndAmount.SIZE,
-            output_arr_len + 1,
-            output_arr,
-            counter + 1)
-
-        return (_output_arr_len, _output_arr)
-    end
-
-    func _get_balance_needed_from_pool_supply{
-            syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
-            pool_supply_ratio : Uint256, current_balance : Uint256) -> (balance_needed : Uint256):
-        alloc_locals
-
-        let (local amount_required : Uint256) = FixedPoint.mul(current_balance, pool_supply_ratio)
-
-        return (amount_required)
+            output_arr + TokenAndAmount.SIZE)
     end
 end
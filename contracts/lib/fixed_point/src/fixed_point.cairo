@@ -0,0 +1,191 @@
+# throwaway Cairo port of mammoth/fixed_point.py, local test runs only, never committed
+%lang starknet
+
+from starkware.cairo.common.cairo_builtins import HashBuiltin
+from starkware.cairo.common.uint256 import Uint256, uint256_le, uint256_eq
+from openzeppelin.security.safemath import SafeUint256
+
+from contracts.config import (
+    DECIMALS, HALF_DECIMALS, PRECISION, MAX_DECIMAL_POW_BASE, MIN_DECIMAL_POW_BASE)
+
+namespace FixedPoint:
+    @view
+    func floor_intermediate{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(a : Uint256) -> (b : Uint256):
+        let (b, _) = SafeUint256.div_rem(a, Uint256(DECIMALS, 0))
+        return (b)
+    end
+
+    @view
+    func floor{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(a : Uint256) -> (floor : Uint256):
+        let (b) = floor_intermediate(a)
+        let (c) = SafeUint256.mul(b, Uint256(DECIMALS, 0))
+        return (c)
+    end
+
+    @view
+    func half_scaling{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(a : Uint256) -> (b : Uint256):
+        let (b, _) = SafeUint256.div_rem(a, Uint256(HALF_DECIMALS, 0))
+        return (b)
+    end
+
+    @view
+    func double_scaling{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(a : Uint256) -> (b : Uint256):
+        let (b) = SafeUint256.mul(a, Uint256(DECIMALS, 0))
+        return (b)
+    end
+
+    @view
+    func add{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(a : Uint256, b : Uint256) -> (c : Uint256):
+        let (c) = SafeUint256.add(a, b)
+        return (c)
+    end
+
+    @view
+    func sub{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(a : Uint256, b : Uint256) -> (c : Uint256):
+        let (c) = SafeUint256.sub_le(a, b)
+        return (c)
+    end
+
+    @view
+    func diff_and_sign{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(a : Uint256, b : Uint256) -> (c : Uint256, bool : felt):
+        alloc_locals
+        let (local b_le_a) = uint256_le(b, a)
+        if b_le_a == 1:
+            let (c) = SafeUint256.sub_le(a, b)
+            return (c, 0)
+        end
+        let (c) = SafeUint256.sub_le(b, a)
+        return (c, 1)
+    end
+
+    @view
+    func mul{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(a : Uint256, b : Uint256) -> (c : Uint256):
+        alloc_locals
+        let (local a_half) = half_scaling(a)
+        let (local b_half) = half_scaling(b)
+        let (c) = SafeUint256.mul(a_half, b_half)
+        return (c)
+    end
+
+    @view
+    func div{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(num : Uint256, den : Uint256) -> (c : Uint256):
+        let (scaled) = double_scaling(num)
+        let (c, _) = SafeUint256.div_rem(scaled, den)
+        return (c)
+    end
+
+    @view
+    func integer_pow{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(base : Uint256, exponent : Uint256) -> (c : Uint256):
+        alloc_locals
+        let (local is_zero) = uint256_eq(exponent, Uint256(0, 0))
+        if is_zero == 1:
+            return (Uint256(DECIMALS, 0))
+        end
+        let (c) = _recursive_integer_pow(base, base, exponent)
+        return (c)
+    end
+
+    # current_product is base ^ k, multiplies until k == exponent
+    @view
+    func _recursive_integer_pow{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            current_product : Uint256, base : Uint256, exponent : Uint256) -> (c : Uint256):
+        alloc_locals
+        let (local done) = uint256_le(exponent, Uint256(1, 0))
+        if done == 1:
+            return (current_product)
+        end
+        let (local product) = mul(current_product, base)
+        let (local next_exponent) = SafeUint256.sub_le(exponent, Uint256(1, 0))
+        let (c) = _recursive_integer_pow(product, base, next_exponent)
+        return (c)
+    end
+
+    @view
+    func bounded_decimal_pow{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            base : Uint256, exponent : Uint256, precision : Uint256) -> (result : Uint256):
+        alloc_locals
+        let (local x, local x_sign) = diff_and_sign(base, Uint256(DECIMALS, 0))
+        let (result) = _recursive_decimal_pow(
+            x, exponent, precision, Uint256(DECIMALS, 0), Uint256(1, 0), Uint256(DECIMALS, 0),
+            x_sign, 0)
+        return (result)
+    end
+
+    @view
+    func _recursive_decimal_pow{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+            base_minus_one : Uint256, exponent : Uint256, precision : Uint256,
+            previous_element : Uint256, index : Uint256, current_sum : Uint256,
+            base_minus_center_sign : felt, previous_sign : felt) -> (final_sum : Uint256):
+        alloc_locals
+        let (local finished) = uint256_le(previous_element, precision)
+        if finished == 1:
+            return (current_sum)
+        end
+
+        let (local big_k) = SafeUint256.mul(index, Uint256(DECIMALS, 0))
+        let (local k_minus_one) = sub(big_k, Uint256(DECIMALS, 0))
+        let (local c, local c_sign) = diff_and_sign(exponent, k_minus_one)
+        let (local cx) = mul(c, base_minus_one)
+        let (local term_cx) = mul(previous_element, cx)
+        let (local term) = div(term_cx, big_k)
+
+        local neg : felt
+        if base_minus_center_sign == c_sign:
+            if base_minus_center_sign == 1:
+                assert neg = 1
+            else:
+                assert neg = previous_sign
+            end
+        else:
+            assert neg = 1 - previous_sign
+        end
+
+        let (local next_index) = add(index, Uint256(1, 0))
+        if neg == 1:
+            let (local next_sum) = sub(current_sum, term)
+            let (r) = _recursive_decimal_pow(
+                base_minus_one, exponent, precision, term, next_index, next_sum,
+                base_minus_center_sign, neg)
+            return (r)
+        end
+        let (local next_sum) = add(current_sum, term)
+        let (r) = _recursive_decimal_pow(
+            base_minus_one, exponent, precision, term, next_index, next_sum,
+            base_minus_center_sign, neg)
+        return (r)
+    end
+
+    @view
+    func bounded_pow{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(base : Uint256, exponent : Uint256) -> (result : Uint256):
+        alloc_locals
+        assert_base_within_bound(base)
+        let (local whole) = floor(exponent)
+        let (local remain) = sub(exponent, whole)
+        let (local whole_unscaled) = floor_intermediate(whole)
+        let (local whole_pow) = integer_pow(base, whole_unscaled)
+
+        let (local no_remain) = uint256_eq(remain, Uint256(0, 0))
+        if no_remain == 1:
+            return (whole_pow)
+        end
+
+        let (local partial_pow) = bounded_decimal_pow(base, remain, Uint256(PRECISION, 0))
+        let (local collapsed) = uint256_eq(partial_pow, Uint256(0, 0))
+        if collapsed == 1:
+            return (Uint256(2, 0))
+        end
+        let (result) = mul(whole_pow, partial_pow)
+        return (result)
+    end
+
+    @view
+    func assert_base_within_bound{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(base : Uint256):
+        alloc_locals
+        let (local above_min) = uint256_le(Uint256(MIN_DECIMAL_POW_BASE, 0), base)
+        let (local below_max) = uint256_le(base, Uint256(MAX_DECIMAL_POW_BASE, 0))
+        with_attr error_message("BASE OUTSIDE POW BOUNDS"):
+            assert above_min * below_max = 1
+        end
+        return ()
+    end
+end
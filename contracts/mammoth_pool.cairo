@@ -9,8 +9,9 @@ from starkware.cairo.common.cairo_builtins import HashBuiltin
 from starkware.starknet.common.syscalls import get_caller_address, get_contract_address
 from starkware.cairo.common.alloc import alloc
 from starkware.cairo.common.registers import get_fp_and_pc
-from starkware.cairo.common.uint256 import Uint256
+from starkware.cairo.common.uint256 import Uint256, ALL_ONES, uint256_eq, uint256_le
 from starkware.cairo.common.bool import TRUE, FALSE
+from starkware.cairo.common.math import assert_not_zero
 
 # openzeppelin
 from openzeppelin.access.ownable import Ownable
@@ -19,14 +20,15 @@ from openzeppelin.security.initializable import Initializable, Initializable_ini
 
 # mammoth
 from contracts.lib.Pool_base import Pool
-from contracts.lib.Pool_registry_base import Register, ApprovedERC20
-from contracts.lib.balancer_math import Balancer_Math, TokenAndAmount
+from contracts.lib.Pool_registry_base import (
+    Register, ApprovedERC20, TokenState, QuoteRequest, SpotPrice)
+from contracts.lib.balancer_math import Balancer_Math, TokenAndAmount, PowExponent
+from contracts.lib.fixed_point.src.fixed_point import FixedPoint
 
-@contract_interface
-namespace IERC20:
-    func balanceOf(account : felt) -> (balance : Uint256):
-    end
-end
+# what _proportional_transfers does with each amount
+const PROPORTIONAL_QUOTE = 0
+const PROPORTIONAL_DEPOSIT = 1
+const PROPORTIONAL_WITHDRAW = 2
 
 ##########
 # INITIALIZE POOL
@@ -103,14 +105,17 @@ end
 func deposit_proportional_assets{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
         pool_amount_out : Uint256, user_address : felt) -> (success : felt):
     alloc_locals
+    Ownable.assert_only_owner()
 
-    let (local list_of_tokens_and_deposit_balances_len : felt,
-        local list_of_tokens_and_deposit_balances : TokenAndAmount*) = view_proportional_deposits_given_pool_out(
-        pool_amount_out)
+    let (local total_pool_supply : Uint256) = totalSupply()
+    let (local pool_supply_ratio : Uint256) = Balancer_Math.get_proportional_deposit_ratio(
+        total_pool_supply, pool_amount_out)
 
-    # deposit using recursion
-    let (local success : felt) = _recursive_deposit(
-        list_of_tokens_and_deposit_balances_len, list_of_tokens_and_deposit_balances, user_address)
+    # deposit every token in the same pass that prices it
+    let (local num_tokens_in_pool) = Register.get_num_tokens()
+    let (local token_arr : TokenAndAmount*) = alloc()
+    _proportional_transfers(
+        pool_supply_ratio, PROPORTIONAL_DEPOSIT, user_address, num_tokens_in_pool, 0, token_arr)
 
     let (local mint_success : felt) = mint(user_address, pool_amount_out)
 
@@ -118,35 +123,7 @@ func deposit_proportional_assets{syscall_ptr : felt*, pedersen_ptr : HashBuiltin
         assert mint_success = TRUE
     end
 
-    return (success)
-end
-
-# proportional deposit recursion helper
-func _recursive_deposit{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
-        list_len : felt, list : TokenAndAmount*, user_address) -> (success : felt):
-    alloc_locals
-
-    if list_len == 0:
-        return (TRUE)
-    end
-
-    # needed for dereferencing struct
-    let (__fp__, _) = get_fp_and_pc()
-
-    let current_struct : TokenAndAmount* = [&list]
-
-    Register.only_approved_erc20(current_struct.erc_address)
-    let (local success : felt) = Pool.deposit(
-        current_struct.amount, user_address, current_struct.erc_address)
-
-    with_attr error_message("DEPOSIT FAILED : POOL LEVEL"):
-        assert success = TRUE
-    end
-
-    let (local complete_success : felt) = _recursive_deposit(
-        list_len - 1, list + TokenAndAmount.SIZE, user_address)
-
-    return (complete_success)
+    return (TRUE)
 end
 
 @external
@@ -177,11 +154,16 @@ func withdraw_proportional_assets{
     alloc_locals
     Ownable.assert_only_owner()
 
-    let (local list_len : felt, list : TokenAndAmount*) = view_proportional_withdraw_given_pool_in(
-        pool_amount_in)
+    let (local total_pool_supply : Uint256) = totalSupply()
+    let (local exit_fee : Uint256) = Register.get_exit_fee()
+    let (local pool_supply_ratio : Uint256) = Balancer_Math.get_proportional_withdraw_ratio(
+        total_pool_supply, pool_amount_in, exit_fee)
 
-    # withdraw using recursion
-    let (local success : felt) = _recursive_withdraw(list_len, list, user_address)
+    # withdraw every token in the same pass that prices it
+    let (local num_tokens_in_pool) = Register.get_num_tokens()
+    let (local token_arr : TokenAndAmount*) = alloc()
+    _proportional_transfers(
+        pool_supply_ratio, PROPORTIONAL_WITHDRAW, user_address, num_tokens_in_pool, 0, token_arr)
 
     let (local burn_success : felt) = burn(user_address, pool_amount_in)
     with_attr error_message("POOL LP BURN FAILURE"):
@@ -191,45 +173,116 @@ func withdraw_proportional_assets{
     return (TRUE)
 end
 
-# proportional withdraw recursion helper
-func _recursive_withdraw{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
-        list_len : felt, list : TokenAndAmount*, user_address) -> (success : felt):
+# one pass over the pool tokens: scale each reserve by pool_supply_ratio, record the
+# amount in output_arr and, unless action is PROPORTIONAL_QUOTE, transfer it
+func _proportional_transfers{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+        pool_supply_ratio : Uint256, action : felt, user_address : felt,
+        num_tokens_remaining : felt, index : felt, output_arr : TokenAndAmount*):
     alloc_locals
 
-    if list_len == 0:
-        return (TRUE)
+    if num_tokens_remaining == 0:
+        return ()
     end
 
-    # needed for dereferencing struct
-    let (__fp__, _) = get_fp_and_pc()
-
-    let current_struct : TokenAndAmount* = [&list]
-
-    Register.only_approved_erc20(current_struct.erc_address)
-    let (local success : felt) = Pool.withdraw(
-        current_struct.amount, user_address, current_struct.erc_address)
+    let (local erc : felt) = Register.get_approved_erc_from_index(index)
+    let (local balance : Uint256) = Pool.get_reserve(erc)
+    let (local amount : Uint256) = FixedPoint.mul(balance, pool_supply_ratio)
 
-    with_attr error_message("WITHDRAW FAILED : POOL LEVEL"):
-        assert success = TRUE
+    # assert used for assignment
+    assert output_arr[index] = TokenAndAmount(erc, amount)
+
+    if action == PROPORTIONAL_DEPOSIT:
+        let (local deposit_success : felt) = Pool.deposit(amount, user_address, erc)
+        with_attr error_message("DEPOSIT FAILED : POOL LEVEL"):
+            assert deposit_success = TRUE
+        end
+        tempvar syscall_ptr = syscall_ptr
+        tempvar pedersen_ptr = pedersen_ptr
+        tempvar range_check_ptr = range_check_ptr
+    else:
+        if action == PROPORTIONAL_WITHDRAW:
+            let (local withdraw_success : felt) = Pool.withdraw(amount, user_address, erc)
+            with_attr error_message("WITHDRAW FAILED : POOL LEVEL"):
+                assert withdraw_success = TRUE
+            end
+            tempvar syscall_ptr = syscall_ptr
+            tempvar pedersen_ptr = pedersen_ptr
+            tempvar range_check_ptr = range_check_ptr
+        else:
+            tempvar syscall_ptr = syscall_ptr
+            tempvar pedersen_ptr = pedersen_ptr
+            tempvar range_check_ptr = range_check_ptr
+        end
     end
 
-    let (local complete_success : felt) = _recursive_withdraw(
-        list_len - 1, list + TokenAndAmount.SIZE, user_address)
-
-    return (complete_success)
+    return _proportional_transfers(
+        pool_supply_ratio, action, user_address, num_tokens_remaining - 1, index + 1, output_arr)
 end
 
+# max_spot_price bounds the spot price of erc20_address_out before and after the swap,
+# Uint256(ALL_ONES, ALL_ONES) for no bound
 @external
 func swap{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
-        amount_in : Uint256, address : felt, erc20_address_in : felt, erc20_address_out : felt) -> (
-        success : felt):
+        amount_in : Uint256, address : felt, erc20_address_in : felt, erc20_address_out : felt,
+        max_spot_price : Uint256) -> (amount_out : Uint256):
     alloc_locals
     Ownable.assert_only_owner()
-    Register.only_approved_erc20(erc20_address_in)
-    Register.only_approved_erc20(erc20_address_out)
 
     let (local amount_out : Uint256) = view_out_given_in(
         amount_in, erc20_address_in, erc20_address_out)
+    _swap(amount_in, amount_out, address, erc20_address_in, erc20_address_out, max_spot_price)
+
+    return (amount_out)
+end
+
+@external
+func swap_exact_out{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+        amount_out : Uint256, address : felt, erc20_address_in : felt, erc20_address_out : felt,
+        max_spot_price : Uint256) -> (amount_in : Uint256):
+    alloc_locals
+    Ownable.assert_only_owner()
+
+    let (local amount_in : Uint256) = view_in_given_out(
+        amount_out, erc20_address_in, erc20_address_out)
+    _swap(amount_in, amount_out, address, erc20_address_in, erc20_address_out, max_spot_price)
+
+    return (amount_in)
+end
+
+# the views check both tokens are approved
+func _swap{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+        amount_in : Uint256, amount_out : Uint256, address : felt, erc20_address_in : felt,
+        erc20_address_out : felt, max_spot_price : Uint256):
+    alloc_locals
+
+    let (local unbounded : felt) = uint256_eq(max_spot_price, Uint256(ALL_ONES, ALL_ONES))
+    if unbounded == TRUE:
+        return _swap_transfers(amount_in, amount_out, address, erc20_address_in, erc20_address_out)
+    end
+
+    # like balancer's maxPrice, the pool must be at or below the bound before and after the swap
+    let (local spot_price_before : Uint256) = view_spot_price(erc20_address_in, erc20_address_out)
+    let (local le_before : felt) = uint256_le(spot_price_before, max_spot_price)
+    with_attr error_message("SPOT PRICE ABOVE MAXIMUM BEFORE SWAP : POOL LEVEL"):
+        assert le_before = TRUE
+    end
+
+    _swap_transfers(amount_in, amount_out, address, erc20_address_in, erc20_address_out)
+
+    let (local spot_price_after : Uint256) = view_spot_price(erc20_address_in, erc20_address_out)
+    let (local le_after : felt) = uint256_le(spot_price_after, max_spot_price)
+    with_attr error_message("SPOT PRICE ABOVE MAXIMUM AFTER SWAP : POOL LEVEL"):
+        assert le_after = TRUE
+    end
+
+    return ()
+end
+
+func _swap_transfers{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+        amount_in : Uint256, amount_out : Uint256, address : felt, erc20_address_in : felt,
+        erc20_address_out : felt):
+    alloc_locals
+
     let (local deposit_success : felt) = Pool.deposit(amount_in, address, erc20_address_in)
     let (local withdraw_success : felt) = Pool.withdraw(amount_out, address, erc20_address_out)
 
@@ -240,7 +293,35 @@ func swap{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
         assert withdraw_success = TRUE
     end
 
-    return (TRUE)
+    return ()
+end
+
+##########
+# RESERVES
+##########
+
+# anyone can call these, like balancer's gulp and uniswap's sync and skim
+
+# add ERC20 sent directly to the pool to its reserve
+@external
+func sync{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+        erc20_address : felt) -> (reserve : Uint256):
+    alloc_locals
+    Register.only_approved_erc20(erc20_address)
+
+    let (local reserve : Uint256) = Pool.sync(erc20_address)
+    return (reserve)
+end
+
+# transfer ERC20 sent directly to the pool to recipient
+@external
+func skim{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+        erc20_address : felt, recipient : felt) -> (amount : Uint256):
+    alloc_locals
+    Register.only_approved_erc20(erc20_address)
+
+    let (local amount : Uint256) = Pool.skim(recipient, erc20_address)
+    return (amount)
 end
 
 ##########
@@ -253,16 +334,17 @@ func view_single_out_given_pool_in{
         pool_amount_in : Uint256, erc20_address : felt) -> (amount_to_withdraw : Uint256):
     alloc_locals
 
-    let (local this_contract : felt) = get_contract_address()
+    Register.only_approved_erc20(erc20_address)
 
-    let (local swap_fee : Uint256, local exit_fee : Uint256,
-        total_weight : Uint256) = Register.get_pool_info()
-    let (local a_weight : Uint256) = Register.get_token_weight(erc20_address)
+    let (local swap_fee : Uint256) = Register.get_swap_fee()
+    let (local exit_fee : Uint256) = Register.get_exit_fee()
+    let (local complement : Uint256, local exponent : PowExponent) = Register.get_exit_exponent(
+        erc20_address)
     let (local supply : Uint256) = totalSupply()
     let (local a_balance : Uint256) = get_ERC20_balance(erc20_address)
 
-    let (local amount_to_withdraw : Uint256) = Balancer_Math.get_single_out_given_pool_in(
-        pool_amount_in, a_balance, supply, a_weight, total_weight, swap_fee, exit_fee)
+    let (local amount_to_withdraw : Uint256) = Balancer_Math.get_single_out_given_pool_in_with_exponent(
+        pool_amount_in, a_balance, supply, complement, exponent, swap_fee, exit_fee)
 
     return (amount_to_withdraw)
 end
@@ -273,16 +355,17 @@ func view_pool_in_given_single_out{
         amount_to_withdraw : Uint256, erc20_address : felt) -> (pool_amount_in : Uint256):
     alloc_locals
 
-    let (local this_contract : felt) = get_contract_address()
+    Register.only_approved_erc20(erc20_address)
 
-    let (local swap_fee : Uint256, local exit_fee : Uint256,
-        total_weight : Uint256) = Register.get_pool_info()
-    let (local b_weight : Uint256) = Register.get_token_weight(erc20_address)
+    let (local swap_fee : Uint256) = Register.get_swap_fee()
+    let (local exit_fee : Uint256) = Register.get_exit_fee()
+    let (local complement : Uint256, local exponent : PowExponent) = Register.get_join_exponent(
+        erc20_address)
     let (local supply : Uint256) = totalSupply()
     let (local b_balance : Uint256) = get_ERC20_balance(erc20_address)
 
-    let (local pool_amount_in : Uint256) = Balancer_Math.get_pool_in_given_single_out(
-        amount_to_withdraw, b_balance, supply, b_weight, total_weight, swap_fee, exit_fee)
+    let (local pool_amount_in : Uint256) = Balancer_Math.get_pool_in_given_single_out_with_exponent(
+        amount_to_withdraw, b_balance, supply, complement, exponent, swap_fee, exit_fee)
 
     return (pool_amount_in)
 end
@@ -293,13 +376,16 @@ func view_pool_minted_given_single_in{
         amount_to_deposit : Uint256, erc20_address : felt) -> (amount_to_mint : Uint256):
     alloc_locals
 
-    let (local swap_fee : Uint256, _, total_weight : Uint256) = Register.get_pool_info()
-    let (local a_weight : Uint256) = Register.get_token_weight(erc20_address)
+    Register.only_approved_erc20(erc20_address)
+
+    let (local swap_fee : Uint256) = Register.get_swap_fee()
+    let (local complement : Uint256, local exponent : PowExponent) = Register.get_join_exponent(
+        erc20_address)
     let (local supply : Uint256) = totalSupply()
     let (local a_balance : Uint256) = get_ERC20_balance(erc20_address)
 
-    let (local amount_to_mint : Uint256) = Balancer_Math.get_pool_minted_given_single_in(
-        amount_to_deposit, a_balance, supply, a_weight, total_weight, swap_fee)
+    let (local amount_to_mint : Uint256) = Balancer_Math.get_pool_minted_given_single_in_with_exponent(
+        amount_to_deposit, a_balance, supply, complement, exponent, swap_fee)
 
     return (amount_to_mint)
 end
@@ -310,13 +396,16 @@ func view_single_in_given_pool_out{
         pool_amount_out : Uint256, erc20_address : felt) -> (amount_to_deposit : Uint256):
     alloc_locals
 
-    let (local swap_fee : Uint256, _, total_weight : Uint256) = Register.get_pool_info()
-    let (local a_weight : Uint256) = Register.get_token_weight(erc20_address)
+    Register.only_approved_erc20(erc20_address)
+
+    let (local swap_fee : Uint256) = Register.get_swap_fee()
+    let (local complement : Uint256, local exponent : PowExponent) = Register.get_exit_exponent(
+        erc20_address)
     let (local supply : Uint256) = totalSupply()
     let (local a_balance : Uint256) = get_ERC20_balance(erc20_address)
 
-    let (local amount_to_deposit : Uint256) = Balancer_Math.get_single_in_given_pool_out(
-        pool_amount_out, a_balance, supply, a_weight, total_weight, swap_fee)
+    let (local amount_to_deposit : Uint256) = Balancer_Math.get_single_in_given_pool_out_with_exponent(
+        pool_amount_out, a_balance, supply, complement, exponent, swap_fee)
 
     return (amount_to_deposit)
 end
@@ -327,14 +416,17 @@ func view_out_given_in{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_c
         amount_out : Uint256):
     alloc_locals
 
-    let (local swap_fee : Uint256, _, _) = Register.get_pool_info()
+    Register.only_approved_erc20(erc20_address_in)
+    Register.only_approved_erc20(erc20_address_out)
+
+    let (local swap_fee : Uint256) = Register.get_swap_fee()
     let (local a_balance : Uint256) = get_ERC20_balance(erc20_address_in)
-    let (local a_weight : Uint256) = Register.get_token_weight(erc20_address_in)
     let (local b_balance : Uint256) = get_ERC20_balance(erc20_address_out)
-    let (local b_weight : Uint256) = Register.get_token_weight(erc20_address_out)
+    let (local exponent : PowExponent) = Register.get_swap_exponent(
+        erc20_address_in, erc20_address_out)
 
-    let (local amount_out : Uint256) = Balancer_Math.get_out_given_in(
-        amount_in, a_balance, a_weight, b_balance, b_weight, swap_fee)
+    let (local amount_out : Uint256) = Balancer_Math.get_out_given_in_with_exponent(
+        amount_in, a_balance, b_balance, exponent, swap_fee)
 
     return (amount_out)
 end
@@ -345,70 +437,256 @@ func view_in_given_out{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_c
         amount_in : Uint256):
     alloc_locals
 
-    let (local swap_fee : Uint256, _, _) = Register.get_pool_info()
+    Register.only_approved_erc20(erc20_address_in)
+    Register.only_approved_erc20(erc20_address_out)
+
+    let (local swap_fee : Uint256) = Register.get_swap_fee()
+    let (local a_balance : Uint256) = get_ERC20_balance(erc20_address_in)
+    let (local b_balance : Uint256) = get_ERC20_balance(erc20_address_out)
+    let (local exponent : PowExponent) = Register.get_swap_exponent(
+        erc20_address_out, erc20_address_in)
+
+    let (local amount_out : Uint256) = Balancer_Math.get_in_given_out_with_exponent(
+        amount_out, b_balance, a_balance, exponent, swap_fee)
+
+    return (amount_out)
+end
+
+# price of erc20_address_out in erc20_address_in, swap fee included
+@view
+func view_spot_price{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+        erc20_address_in : felt, erc20_address_out : felt) -> (spot_price : Uint256):
+    alloc_locals
+
+    Register.only_approved_erc20(erc20_address_in)
+    Register.only_approved_erc20(erc20_address_out)
+
+    let (local swap_fee : Uint256) = Register.get_swap_fee()
     let (local a_balance : Uint256) = get_ERC20_balance(erc20_address_in)
     let (local a_weight : Uint256) = Register.get_token_weight(erc20_address_in)
     let (local b_balance : Uint256) = get_ERC20_balance(erc20_address_out)
     let (local b_weight : Uint256) = Register.get_token_weight(erc20_address_out)
 
-    let (local amount_out : Uint256) = Balancer_Math.get_in_given_out(
-        amount_out, b_balance, b_weight, a_balance, a_weight, swap_fee)
+    let (local spot_price : Uint256) = Balancer_Math.get_spot_price(
+        a_balance, a_weight, b_balance, b_weight, swap_fee)
 
-    return (amount_out)
+    return (spot_price)
 end
 
+##########
+# BATCH VIEW MATH
+##########
+
+# quote many (amount, token in, token out) triples while reading the pool state once
 @view
-func view_proportional_deposits_given_pool_out{
-        syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
-        pool_amount_out : Uint256) -> (list_len : felt, list : TokenAndAmount*):
+func view_out_given_in_batch{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+        quotes_len : felt, quotes : QuoteRequest*) -> (
+        amounts_out_len : felt, amounts_out : Uint256*):
     alloc_locals
 
-    let (local total_pool_supply : Uint256) = totalSupply()
+    let (local swap_fee : Uint256) = Register.get_swap_fee()
+    let (local token_states_len : felt, local token_states : TokenState*) = _build_token_states()
 
-    # build list of tokens and current balances
-    let (local num_tokens_in_pool) = Register.get_num_tokens()
-    let (local token_arr : TokenAndAmount*) = alloc()
+    let (local output_arr : Uint256*) = alloc()
+    let (local amounts_out_len : felt,
+        local amounts_out : Uint256*) = _recursive_out_given_in_batch(
+        swap_fee, token_states_len, token_states, quotes_len, quotes, 0, output_arr)
 
-    let (local token_list_len : felt,
-        local token_list : TokenAndAmount*) = _recursive_build_list_of_tokens_and_balances(
-        num_tokens_in_pool, 0, token_arr)
+    return (amounts_out_len, amounts_out)
+end
+
+@view
+func view_in_given_out_batch{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+        quotes_len : felt, quotes : QuoteRequest*) -> (amounts_in_len : felt, amounts_in : Uint256*):
+    alloc_locals
+
+    let (local swap_fee : Uint256) = Register.get_swap_fee()
+    let (local token_states_len : felt, local token_states : TokenState*) = _build_token_states()
 
-    let (local list_len : felt,
-        list : TokenAndAmount*) = Balancer_Math.get_proportional_deposits_given_pool_out(
-        total_pool_supply, pool_amount_out, token_list_len, token_list)
+    let (local output_arr : Uint256*) = alloc()
+    let (local amounts_in_len : felt,
+        local amounts_in : Uint256*) = _recursive_in_given_out_batch(
+        swap_fee, token_states_len, token_states, quotes_len, quotes, 0, output_arr)
 
-    return (list_len, list)
+    return (amounts_in_len, amounts_in)
 end
 
+# spot price of every ordered pair of pool tokens, reading the pool state once
 @view
-func view_proportional_withdraw_given_pool_in{
+func view_spot_prices{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}() -> (
+        spot_prices_len : felt, spot_prices : SpotPrice*):
+    alloc_locals
+
+    let (local swap_fee : Uint256) = Register.get_swap_fee()
+    let (local token_states_len : felt, local token_states : TokenState*) = _build_token_states()
+    let (local spot_prices : SpotPrice*) = alloc()
+
+    let (local spot_prices_len : felt) = _recursive_spot_prices(
+        swap_fee, token_states_len, token_states, 0, 0, spot_prices)
+
+    return (spot_prices_len, spot_prices)
+end
+
+# batch recursion helpers
+func _recursive_out_given_in_batch{
         syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
-        pool_amount_in : Uint256) -> (list_len : felt, list : TokenAndAmount*):
+        swap_fee : Uint256, token_states_len : felt, token_states : TokenState*,
+        quotes_len : felt, quotes : QuoteRequest*, output_arr_len : felt,
+        output_arr : Uint256*) -> (output_list_len : felt, output_list : Uint256*):
     alloc_locals
 
-    let (local total_pool_supply : Uint256) = totalSupply()
-    let (local exit_fee : Uint256) = Register.get_exit_fee()
+    # needed for dereferencing struct
+    let (__fp__, _) = get_fp_and_pc()
+
+    if quotes_len == 0:
+        return (output_arr_len, output_arr)
+    end
+
+    let current_struct : QuoteRequest* = [&quotes]
+
+    let (local token_in : TokenState) = _get_token_state(
+        current_struct.erc20_address_in, token_states_len, token_states)
+    let (local token_out : TokenState) = _get_token_state(
+        current_struct.erc20_address_out, token_states_len, token_states)
+
+    let (local exponent : PowExponent) = Register.get_swap_exponent(
+        current_struct.erc20_address_in, current_struct.erc20_address_out)
+
+    let (local amount_out : Uint256) = Balancer_Math.get_out_given_in_with_exponent(
+        current_struct.amount, token_in.balance, token_out.balance, exponent, swap_fee)
+
+    # assert used for assignment
+    assert output_arr[output_arr_len] = amount_out
+
+    let (local output_list_len : felt,
+        local output_list : Uint256*) = _recursive_out_given_in_batch(
+        swap_fee,
+        token_states_len,
+        token_states,
+        quotes_len - 1,
+        quotes + QuoteRequest.SIZE,
+        output_arr_len + 1,
+        output_arr)
+
+    return (output_list_len, output_list)
+end
+
+func _recursive_in_given_out_batch{
+        syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+        swap_fee : Uint256, token_states_len : felt, token_states : TokenState*,
+        quotes_len : felt, quotes : QuoteRequest*, output_arr_len : felt,
+        output_arr : Uint256*) -> (output_list_len : felt, output_list : Uint256*):
+    alloc_locals
+
+    # needed for dereferencing struct
+    let (__fp__, _) = get_fp_and_pc()
+
+    if quotes_len == 0:
+        return (output_arr_len, output_arr)
+    end
+
+    let current_struct : QuoteRequest* = [&quotes]
+
+    let (local token_in : TokenState) = _get_token_state(
+        current_struct.erc20_address_in, token_states_len, token_states)
+    let (local token_out : TokenState) = _get_token_state(
+        current_struct.erc20_address_out, token_states_len, token_states)
+
+    let (local exponent : PowExponent) = Register.get_swap_exponent(
+        current_struct.erc20_address_out, current_struct.erc20_address_in)
+
+    let (local amount_in : Uint256) = Balancer_Math.get_in_given_out_with_exponent(
+        current_struct.amount, token_out.balance, token_in.balance, exponent, swap_fee)
+
+    # assert used for assignment
+    assert output_arr[output_arr_len] = amount_in
+
+    let (local output_list_len : felt,
+        local output_list : Uint256*) = _recursive_in_given_out_batch(
+        swap_fee,
+        token_states_len,
+        token_states,
+        quotes_len - 1,
+        quotes + QuoteRequest.SIZE,
+        output_arr_len + 1,
+        output_arr)
+
+    return (output_list_len, output_list)
+end
+
+# every token_states[index_in] against every other token
+func _recursive_spot_prices{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+        swap_fee : Uint256, token_states_len : felt, token_states : TokenState*, index_in : felt,
+        spot_prices_len : felt, spot_prices : SpotPrice*) -> (spot_prices_len : felt):
+    alloc_locals
+
+    if index_in == token_states_len:
+        return (spot_prices_len)
+    end
+
+    let (local new_spot_prices_len : felt) = _recursive_spot_prices_out(
+        swap_fee, token_states[index_in], token_states_len, token_states, 0, spot_prices_len,
+        spot_prices)
+
+    return _recursive_spot_prices(
+        swap_fee, token_states_len, token_states, index_in + 1, new_spot_prices_len, spot_prices)
+end
+
+func _recursive_spot_prices_out{
+        syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+        swap_fee : Uint256, token_in : TokenState, token_states_len : felt,
+        token_states : TokenState*, index_out : felt, spot_prices_len : felt,
+        spot_prices : SpotPrice*) -> (spot_prices_len : felt):
+    alloc_locals
+
+    # needed for dereferencing struct
+    let (__fp__, _) = get_fp_and_pc()
+
+    if index_out == token_states_len:
+        return (spot_prices_len)
+    end
+
+    if token_states[index_out].erc_address == token_in.erc_address:
+        return _recursive_spot_prices_out(
+            swap_fee, token_in, token_states_len, token_states, index_out + 1, spot_prices_len,
+            spot_prices)
+    end
+
+    let (local spot_price : Uint256) = Balancer_Math.get_spot_price(
+        token_in.balance,
+        token_in.weight,
+        token_states[index_out].balance,
+        token_states[index_out].weight,
+        swap_fee)
+
+    # assert used for assignment
+    assert spot_prices[spot_prices_len] = SpotPrice(
+        token_in.erc_address, token_states[index_out].erc_address, spot_price)
+
+    return _recursive_spot_prices_out(
+        swap_fee, token_in, token_states_len, token_states, index_out + 1, spot_prices_len + 1,
+        spot_prices)
+end
+
+# load address, balance and weight of every pool token
+func _build_token_states{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}() -> (
+        token_states_len : felt, token_states : TokenState*):
+    alloc_locals
 
-    # build list of tokens and current balances
     let (local num_tokens_in_pool) = Register.get_num_tokens()
-    let (local token_arr : TokenAndAmount*) = alloc()
+    let (local token_arr : TokenState*) = alloc()
 
-    let (local token_list_len : felt,
-        local token_list : TokenAndAmount*) = _recursive_build_list_of_tokens_and_balances(
+    let (local token_states_len : felt,
+        local token_states : TokenState*) = _recursive_build_token_states(
         num_tokens_in_pool, 0, token_arr)
 
-    let (local list_len : felt,
-        list : TokenAndAmount*) = Balancer_Math.get_proportional_withdraw_given_pool_in(
-        total_pool_supply, pool_amount_in, exit_fee, token_list_len, token_list)
-
-    return (list_len, list)
+    return (token_states_len, token_states)
 end
 
-# recursion helper
-func _recursive_build_list_of_tokens_and_balances{
+func _recursive_build_token_states{
         syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
-        num_tokens_remaining : felt, output_arr_len : felt, output_arr : TokenAndAmount*) -> (
-        output_list_len : felt, output_list : TokenAndAmount*):
+        num_tokens_remaining : felt, output_arr_len : felt, output_arr : TokenState*) -> (
+        output_list_len : felt, output_list : TokenState*):
     alloc_locals
 
     # needed for dereferencing struct
@@ -420,26 +698,97 @@ func _recursive_build_list_of_tokens_and_balances{
 
     let (local erc : felt) = Register.get_approved_erc_from_index(output_arr_len)
     let (local balance : Uint256) = get_ERC20_balance(erc)
+    let (local weight : Uint256) = Register.get_token_weight(erc)
 
     # assert used for assignment
-    assert output_arr[output_arr_len] = TokenAndAmount(erc, balance)
+    assert output_arr[output_arr_len] = TokenState(erc, balance, weight)
 
     let (local output_list_len : felt,
-        local output_list : TokenAndAmount*) = _recursive_build_list_of_tokens_and_balances(
+        local output_list : TokenState*) = _recursive_build_token_states(
         num_tokens_remaining - 1, output_arr_len + 1, output_arr)
 
     return (output_list_len, output_list)
 end
 
+# linear search, pools hold a handful of tokens
+func _get_token_state{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+        erc20_address : felt, token_states_len : felt, token_states : TokenState*) -> (
+        token_state : TokenState):
+    alloc_locals
+
+    # needed for dereferencing struct
+    let (__fp__, _) = get_fp_and_pc()
+
+    with_attr error_message("ERC20 NOT APPROVED FOR POOL"):
+        assert_not_zero(token_states_len)
+    end
+
+    let current_struct : TokenState* = [&token_states]
+
+    if current_struct.erc_address == erc20_address:
+        return ([current_struct])
+    end
+
+    let (local token_state : TokenState) = _get_token_state(
+        erc20_address, token_states_len - 1, token_states + TokenState.SIZE)
+
+    return (token_state)
+end
+
+@view
+func view_proportional_deposits_given_pool_out{
+        syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+        pool_amount_out : Uint256) -> (list_len : felt, list : TokenAndAmount*):
+    alloc_locals
+
+    let (local total_pool_supply : Uint256) = totalSupply()
+    let (local pool_supply_ratio : Uint256) = Balancer_Math.get_proportional_deposit_ratio(
+        total_pool_supply, pool_amount_out)
+
+    let (local num_tokens_in_pool) = Register.get_num_tokens()
+    let (local list : TokenAndAmount*) = alloc()
+    _proportional_transfers(pool_supply_ratio, PROPORTIONAL_QUOTE, 0, num_tokens_in_pool, 0, list)
+
+    return (num_tokens_in_pool, list)
+end
+
+@view
+func view_proportional_withdraw_given_pool_in{
+        syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+        pool_amount_in : Uint256) -> (list_len : felt, list : TokenAndAmount*):
+    alloc_locals
+
+    let (local total_pool_supply : Uint256) = totalSupply()
+    let (local exit_fee : Uint256) = Register.get_exit_fee()
+    let (local pool_supply_ratio : Uint256) = Balancer_Math.get_proportional_withdraw_ratio(
+        total_pool_supply, pool_amount_in, exit_fee)
+
+    let (local num_tokens_in_pool) = Register.get_num_tokens()
+    let (local list : TokenAndAmount*) = alloc()
+    _proportional_transfers(pool_supply_ratio, PROPORTIONAL_QUOTE, 0, num_tokens_in_pool, 0, list)
+
+    return (num_tokens_in_pool, list)
+end
+
 @view
 func get_ERC20_balance{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
         erc20_address : felt) -> (res : Uint256):
     alloc_locals
-    let (local this_contract) = get_contract_address()
-    let (res) = IERC20.balanceOf(contract_address=erc20_address, account=this_contract)
+    let (local res : Uint256) = Pool.get_reserve(erc20_address)
     return (res)
 end
 
+# ERC20 held by the pool above its reserve
+@view
+func get_ERC20_excess{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+        erc20_address : felt) -> (excess : Uint256):
+    alloc_locals
+    Register.only_approved_erc20(erc20_address)
+
+    let (local excess : Uint256) = Pool.get_excess(erc20_address)
+    return (excess)
+end
+
 @view
 func is_ERC20_approved{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
         erc20_address : felt) -> (approved : felt):
@@ -456,6 +805,16 @@ func get_token_weight{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_ch
     return (weight)
 end
 
+# token weight / total weight and 1 - token weight / total weight, stored at init_pool
+@view
+func get_normalized_weight{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+        erc20_address : felt) -> (weight_ratio : Uint256, complement : Uint256):
+    alloc_locals
+    let (local weight_ratio : Uint256, local complement : Uint256) = Register.get_normalized_weight(
+        erc20_address)
+    return (weight_ratio, complement)
+end
+
 @view
 func get_pool_into{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
         erc20_address : felt) -> (swap_fee : Uint256, exit_fee : Uint256, total_weight : Uint256):
@@ -464,6 +823,18 @@ func get_pool_into{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check
     return (s_fee, e_fee, t_w)
 end
 
+# everything needed to price the pool in one call
+@view
+func get_pool_state{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}() -> (
+        swap_fee : Uint256, exit_fee : Uint256, total_weight : Uint256, lp_supply : Uint256,
+        token_states_len : felt, token_states : TokenState*):
+    alloc_locals
+    let (local s_fee : Uint256, local e_fee : Uint256, local t_w : Uint256) = Register.get_pool_info()
+    let (local supply : Uint256) = totalSupply()
+    let (local token_states_len : felt, local token_states : TokenState*) = _build_token_states()
+    return (s_fee, e_fee, t_w, supply, token_states_len, token_states)
+end
+
 #########
 # ERC20_mintable_burnable
 #########
@@ -1,8 +1,11 @@
 %lang starknet
 
 from starkware.cairo.common.cairo_builtins import HashBuiltin
-from starkware.cairo.common.uint256 import Uint256
+from starkware.cairo.common.uint256 import Uint256, ALL_ONES, uint256_le
 from starkware.cairo.common.bool import TRUE, FALSE
+from starkware.cairo.common.math import assert_not_zero, assert_nn_le
+from starkware.cairo.common.alloc import alloc
+from starkware.cairo.common.registers import get_fp_and_pc
 from starkware.starknet.common.syscalls import get_contract_address
 
 # OZ
@@ -10,8 +13,8 @@ from openzeppelin.access.ownable import Ownable
 from openzeppelin.security.initializable import Initializable, Initializable_initialized
 
 # Mammoth
-from contracts.lib.Router_base import Router
-from contracts.lib.Pool_registry_base import ApprovedERC20
+from contracts.lib.Router_base import Router, SwapHop, PoolConfig
+from contracts.lib.Pool_registry_base import ApprovedERC20, QuoteRequest
 
 ############
 # EVENTS
@@ -48,6 +51,12 @@ end
 func swap_called(token_in : felt, token_out : felt, pool : felt, amount_swapped_in : Uint256):
 end
 
+@event
+func swap_exact_out_called(
+        token_in : felt, token_out : felt, pool : felt, amount_swapped_in : Uint256,
+        amount_swapped_out : Uint256):
+end
+
 ############
 # Initializer
 ############
@@ -89,8 +98,129 @@ func create_pool{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_p
     alloc_locals
     Ownable.assert_only_owner()
 
-    # setup pool [set name, symbol, decimals, and owner]
     let (local this_contract : felt) = get_contract_address()
+    _create_pool(
+        this_contract, pool_address, name, symbol, decimals, caller_address, s_fee, e_fee,
+        erc_list_len, erc_list)
+
+    return (TRUE)
+end
+
+# deploys and creates every pool of configs in one transaction, erc_list holds the tokens of
+# each pool in the same order, configs[i].num_tokens of them per pool
+# the caller approves each pool for its initial liquidity beforehand, get_deployment_info gives
+# what is needed to compute the pool addresses
+@external
+func deploy_and_create_pools{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+        caller_address : felt, configs_len : felt, configs : PoolConfig*, erc_list_len : felt,
+        erc_list : ApprovedERC20*) -> (pool_addresses_len : felt, pool_addresses : felt*):
+    alloc_locals
+    Ownable.assert_only_owner()
+
+    with_attr error_message("NO POOL CONFIGS : ROUTER LEVEL"):
+        assert_not_zero(configs_len)
+    end
+
+    # class hashes and salt are read once for the batch
+    let (local this_contract : felt) = get_contract_address()
+    let (local proxy_hash : felt) = Router.get_proxy_class_hash()
+    let (local pool_hash : felt) = Router.get_pool_class_hash(configs.pool_type)
+    let (local contract_salt : felt) = Router.get_salt()
+
+    let (local pool_addresses : felt*) = alloc()
+    _recursive_deploy_and_create(
+        this_contract,
+        caller_address,
+        proxy_hash,
+        configs.pool_type,
+        pool_hash,
+        contract_salt,
+        configs_len,
+        configs,
+        erc_list_len,
+        erc_list,
+        pool_addresses)
+
+    Router.set_salt(contract_salt + configs_len)
+
+    return (configs_len, pool_addresses)
+end
+
+func _recursive_deploy_and_create{
+        syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+        this_contract : felt, caller_address : felt, proxy_hash : felt, pool_type : felt,
+        pool_hash : felt, contract_salt : felt, configs_len : felt, configs : PoolConfig*,
+        erc_list_len : felt, erc_list : ApprovedERC20*, pool_addresses : felt*):
+    alloc_locals
+
+    if configs_len == 0:
+        with_attr error_message("POOL CONFIG TOKENS MISMATCH : ROUTER LEVEL"):
+            assert erc_list_len = 0
+        end
+        return ()
+    end
+
+    with_attr error_message("POOL CONFIG TOKENS MISMATCH : ROUTER LEVEL"):
+        assert_nn_le(configs.num_tokens, erc_list_len)
+    end
+
+    # the pool class hash is read again only when the pool type changes
+    if configs.pool_type == pool_type:
+        tempvar new_pool_hash = pool_hash
+        tempvar syscall_ptr = syscall_ptr
+        tempvar pedersen_ptr = pedersen_ptr
+        tempvar range_check_ptr = range_check_ptr
+    else:
+        let (type_pool_hash : felt) = Router.get_pool_class_hash(configs.pool_type)
+        tempvar new_pool_hash = type_pool_hash
+        tempvar syscall_ptr = syscall_ptr
+        tempvar pedersen_ptr = pedersen_ptr
+        tempvar range_check_ptr = range_check_ptr
+    end
+    local config_pool_hash : felt = new_pool_hash
+
+    let (local pool_address : felt) = Router.deploy_proxy(
+        proxy_hash, config_pool_hash, configs.proxy_admin, contract_salt)
+    pool_deployed.emit(pool_address=pool_address, pool_type=configs.pool_type)
+
+    local s_fee : Uint256 = Uint256(configs.swap_fee_low, configs.swap_fee_high)
+    local e_fee : Uint256 = Uint256(configs.exit_fee_low, configs.exit_fee_high)
+    _create_pool(
+        this_contract,
+        pool_address,
+        configs.name,
+        configs.symbol,
+        configs.decimals,
+        caller_address,
+        s_fee,
+        e_fee,
+        configs.num_tokens,
+        erc_list)
+
+    # assert used for assignment
+    assert [pool_addresses] = pool_address
+
+    return _recursive_deploy_and_create(
+        this_contract,
+        caller_address,
+        proxy_hash,
+        configs.pool_type,
+        config_pool_hash,
+        contract_salt + 1,
+        configs_len - 1,
+        configs + PoolConfig.SIZE,
+        erc_list_len - configs.num_tokens,
+        erc_list + configs.num_tokens * ApprovedERC20.SIZE,
+        pool_addresses + 1)
+end
+
+func _create_pool{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+        this_contract : felt, pool_address : felt, name : felt, symbol : felt, decimals : felt,
+        caller_address : felt, s_fee : Uint256, e_fee : Uint256, erc_list_len : felt,
+        erc_list : ApprovedERC20*):
+    alloc_locals
+
+    # setup pool [set name, symbol, decimals, and owner]
     Router.setup_pool(this_contract, name, symbol, decimals, pool_address)
 
     # init pool [set fees, ERCs, weights, supply initial liquidity]
@@ -112,7 +242,7 @@ func create_pool{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_p
         tokens=erc_list,
         initial_lp_minted=lp_amount)
 
-    return (TRUE)
+    return ()
 end
 
 ############
@@ -193,12 +323,19 @@ func mammoth_proportional_withdraw{
     return (TRUE)
 end
 
+# swap exactly amount in, reverts if less than min_amount_out comes out, if the spot price of
+# erc20_address_out is above max_spot_price before or after the swap (all ones for no bound)
+# or after the deadline (a block timestamp)
 @external
 func mammoth_swap{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
         amount : Uint256, user_address : felt, pool_address : felt, erc20_address_in : felt,
-        erc20_address_out : felt) -> (success : felt):
+        erc20_address_out : felt, min_amount_out : Uint256, max_spot_price : Uint256,
+        deadline : felt) -> (amount_out : Uint256):
     alloc_locals
 
+    Router.assert_caller_is_user(user_address)
+    Router.assert_before_deadline(deadline)
+
     swap_called.emit(
         token_in=erc20_address_in,
         token_out=erc20_address_out,
@@ -206,14 +343,122 @@ func mammoth_swap{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_
         amount_swapped_in=amount)
 
     Router.only_approved_pool(pool_address)
-    let (local success : felt) = Router.call_swap(
-        amount, user_address, pool_address, erc20_address_in, erc20_address_out)
+    let (local amount_out : Uint256) = Router.call_swap(
+        amount, user_address, pool_address, erc20_address_in, erc20_address_out, max_spot_price)
 
-    with_attr error_message("SWAP FAILED : ROUTER LEVEL"):
-        assert success = TRUE
+    let (local enough_out : felt) = uint256_le(min_amount_out, amount_out)
+    with_attr error_message("SWAP OUTPUT BELOW MINIMUM : ROUTER LEVEL"):
+        assert enough_out = TRUE
     end
 
-    return (TRUE)
+    return (amount_out)
+end
+
+# swap for exactly amount_out, reverts if more than max_amount_in goes in and on the same
+# max_spot_price and deadline bounds as mammoth_swap
+@external
+func mammoth_swap_exact_out{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+        amount_out : Uint256, user_address : felt, pool_address : felt, erc20_address_in : felt,
+        erc20_address_out : felt, max_amount_in : Uint256, max_spot_price : Uint256,
+        deadline : felt) -> (amount_in : Uint256):
+    alloc_locals
+
+    Router.assert_caller_is_user(user_address)
+    Router.assert_before_deadline(deadline)
+    Router.only_approved_pool(pool_address)
+
+    # the pool computes the same amount inside swap_exact_out, quoted first so the event
+    # carries both exact amounts ahead of the swap like swap_called
+    let (local quoted_amount_in : Uint256) = Router.call_view_in_given_out(
+        amount_out, pool_address, erc20_address_in, erc20_address_out)
+
+    let (local within_max : felt) = uint256_le(quoted_amount_in, max_amount_in)
+    with_attr error_message("SWAP INPUT ABOVE MAXIMUM : ROUTER LEVEL"):
+        assert within_max = TRUE
+    end
+
+    swap_exact_out_called.emit(
+        token_in=erc20_address_in,
+        token_out=erc20_address_out,
+        pool=pool_address,
+        amount_swapped_in=quoted_amount_in,
+        amount_swapped_out=amount_out)
+
+    let (local amount_in : Uint256) = Router.call_swap_exact_out(
+        amount_out, user_address, pool_address, erc20_address_in, erc20_address_out,
+        max_spot_price)
+
+    return (amount_in)
+end
+
+# swap along an ordered path of pools, the output of each hop is the input of the next
+# intermediate tokens pass through the user so each pool must be approved for its token in
+@external
+func mammoth_swap_path{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+        amount : Uint256, user_address : felt, min_amount_out : Uint256, path_len : felt,
+        path : SwapHop*) -> (amount_out : Uint256):
+    alloc_locals
+
+    Router.assert_caller_is_user(user_address)
+
+    with_attr error_message("EMPTY SWAP PATH"):
+        assert_not_zero(path_len)
+    end
+
+    let (local amount_out : Uint256) = _recursive_swap_path(
+        amount, user_address, path[0].erc20_address_in, path_len, path)
+
+    let (local enough_out : felt) = uint256_le(min_amount_out, amount_out)
+    with_attr error_message("SWAP OUTPUT BELOW MINIMUM : ROUTER LEVEL"):
+        assert enough_out = TRUE
+    end
+
+    return (amount_out)
+end
+
+# path swap recursion helper
+func _recursive_swap_path{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+        amount : Uint256, user_address : felt, expected_token_in : felt, path_len : felt,
+        path : SwapHop*) -> (amount_out : Uint256):
+    alloc_locals
+
+    # needed for dereferencing struct
+    let (__fp__, _) = get_fp_and_pc()
+
+    if path_len == 0:
+        return (amount)
+    end
+
+    let current_struct : SwapHop* = [&path]
+
+    with_attr error_message("SWAP PATH NOT CONNECTED"):
+        assert current_struct.erc20_address_in = expected_token_in
+    end
+
+    Router.only_approved_pool(current_struct.pool_address)
+
+    swap_called.emit(
+        token_in=current_struct.erc20_address_in,
+        token_out=current_struct.erc20_address_out,
+        pool=current_struct.pool_address,
+        amount_swapped_in=amount)
+
+    let (local hop_amount_out : Uint256) = Router.call_swap(
+        amount,
+        user_address,
+        current_struct.pool_address,
+        current_struct.erc20_address_in,
+        current_struct.erc20_address_out,
+        Uint256(ALL_ONES, ALL_ONES))
+
+    let (local amount_out : Uint256) = _recursive_swap_path(
+        hop_amount_out,
+        user_address,
+        current_struct.erc20_address_out,
+        path_len - 1,
+        path + SwapHop.SIZE)
+
+    return (amount_out)
 end
 
 #########
@@ -268,6 +513,146 @@ func is_pool_approved{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_ch
     return (success)
 end
 
+# the next pool proxy is deployed with constructor calldata [pool_hash, proxy_admin] and salt
+@view
+func get_deployment_info{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+        pool_type : felt) -> (proxy_hash : felt, pool_hash : felt, salt : felt):
+    alloc_locals
+    let (local proxy_hash : felt) = Router.get_proxy_class_hash()
+    let (local pool_hash : felt) = Router.get_pool_class_hash(pool_type)
+    let (local contract_salt : felt) = Router.get_salt()
+    return (proxy_hash, pool_hash, contract_salt)
+end
+
+# pools are listed in creation order, pages past the end are empty
+@view
+func get_num_pools{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}() -> (
+        num : felt):
+    alloc_locals
+    let (local num : felt) = Router.get_num_pools()
+    return (num)
+end
+
+@view
+func get_pools{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+        offset : felt, limit : felt) -> (pools_len : felt, pools : felt*):
+    alloc_locals
+    let (local pools_len : felt, local pools : felt*) = Router.get_pools(offset, limit)
+    return (pools_len, pools)
+end
+
+@view
+func get_num_pools_for_token{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+        erc20_address : felt) -> (num : felt):
+    alloc_locals
+    let (local num : felt) = Router.get_num_token_pools(erc20_address)
+    return (num)
+end
+
+@view
+func get_pools_for_token{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+        erc20_address : felt, offset : felt, limit : felt) -> (pools_len : felt, pools : felt*):
+    alloc_locals
+    let (local pools_len : felt, local pools : felt*) = Router.get_token_pools(
+        erc20_address, offset, limit)
+    return (pools_len, pools)
+end
+
+# pools holding both erc20s, in either order
+@view
+func get_num_pools_for_pair{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+        erc20_address_a : felt, erc20_address_b : felt) -> (num : felt):
+    alloc_locals
+    let (local num : felt) = Router.get_num_pair_pools(erc20_address_a, erc20_address_b)
+    return (num)
+end
+
+@view
+func get_pools_for_pair{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+        erc20_address_a : felt, erc20_address_b : felt, offset : felt, limit : felt) -> (
+        pools_len : felt, pools : felt*):
+    alloc_locals
+    let (local pools_len : felt, local pools : felt*) = Router.get_pair_pools(
+        erc20_address_a, erc20_address_b, offset, limit)
+    return (pools_len, pools)
+end
+
+@view
+func view_out_given_in_batch{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+        pool_address : felt, quotes_len : felt, quotes : QuoteRequest*) -> (
+        amounts_out_len : felt, amounts_out : Uint256*):
+    alloc_locals
+    Router.only_approved_pool(pool_address)
+
+    let (local amounts_out_len : felt,
+        local amounts_out : Uint256*) = Router.call_view_out_given_in_batch(
+        pool_address, quotes_len, quotes)
+    return (amounts_out_len, amounts_out)
+end
+
+@view
+func view_in_given_out_batch{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+        pool_address : felt, quotes_len : felt, quotes : QuoteRequest*) -> (
+        amounts_in_len : felt, amounts_in : Uint256*):
+    alloc_locals
+    Router.only_approved_pool(pool_address)
+
+    let (local amounts_in_len : felt,
+        local amounts_in : Uint256*) = Router.call_view_in_given_out_batch(
+        pool_address, quotes_len, quotes)
+    return (amounts_in_len, amounts_in)
+end
+
+# quote a swap path, each hop is priced against the current pool state
+# so a path that visits the same pool twice is only approximate
+@view
+func view_out_given_in_path{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+        amount : Uint256, path_len : felt, path : SwapHop*) -> (amount_out : Uint256):
+    alloc_locals
+
+    with_attr error_message("EMPTY SWAP PATH"):
+        assert_not_zero(path_len)
+    end
+
+    let (local amount_out : Uint256) = _recursive_view_path(
+        amount, path[0].erc20_address_in, path_len, path)
+
+    return (amount_out)
+end
+
+# path quote recursion helper
+func _recursive_view_path{syscall_ptr : felt*, pedersen_ptr : HashBuiltin*, range_check_ptr}(
+        amount : Uint256, expected_token_in : felt, path_len : felt, path : SwapHop*) -> (
+        amount_out : Uint256):
+    alloc_locals
+
+    # needed for dereferencing struct
+    let (__fp__, _) = get_fp_and_pc()
+
+    if path_len == 0:
+        return (amount)
+    end
+
+    let current_struct : SwapHop* = [&path]
+
+    with_attr error_message("SWAP PATH NOT CONNECTED"):
+        assert current_struct.erc20_address_in = expected_token_in
+    end
+
+    Router.only_approved_pool(current_struct.pool_address)
+
+    let (local hop_amount_out : Uint256) = Router.call_view_out_given_in(
+        amount,
+        current_struct.pool_address,
+        current_struct.erc20_address_in,
+        current_struct.erc20_address_out)
+
+    let (local amount_out : Uint256) = _recursive_view_path(
+        hop_amount_out, current_struct.erc20_address_out, path_len - 1, path + SwapHop.SIZE)
+
+    return (amount_out)
+end
+
 #########
 # REQUIRE FUNCTION
 #########
@@ -0,0 +1,379 @@
+"""Replay historical trade flow against candidate pool configurations.
+
+A Backtest holds one or more PoolConfig candidates over the same tokens
+and replays a stream of events against all of them at once: the state of
+every candidate lives in numpy arrays with one row per candidate, so each
+event is a handful of array operations however many configurations are
+compared. The formulas are those of mammoth.batch (float64, see its error
+bound), which keeps the replay at millions of events per minute; use
+mammoth.balancer_math or mammoth.replica when exact integers matter.
+
+Events are Events arrays (kind, token_in, token_out, amount), read from a
+CSV with read_csv() or from the router event log with
+events_from_indexer(). Amounts of swap, swap_exact_out and deposit_single
+events are token amounts in real units (1.5 is 1.5 tokens): the amount in,
+except for swap_exact_out which fixes the amount out. LP amounts do not
+carry over between pools of different supplies, so deposit_proportional,
+withdraw_single and withdraw_proportional amounts are the share of the LP
+supply the historical event minted or burned.
+
+An event that would revert on chain for a candidate (a pow base out of
+bounds, a withdrawal larger than the pool) is skipped for that candidate
+and counted in BacktestResult.reverted.
+
+Every sample_every events the result records, per candidate and in units
+of the numeraire token (the first token unless told otherwise), priced at
+the candidate's own spot prices:
+
+    lp_value          value of the LP tokens minted at init_pool
+    hold_value        value of the initial liquidity had it been held
+    fee_income        value of every swap and exit fee charged so far
+    impermanent_loss  prod(r_i ** w_i) / sum(w_i * r_i) - 1 where r_i is the
+                      price change of token i since the start and w_i its
+                      normalized weight, the loss of a fee-less LP
+"""
+
+import csv
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+import numpy as np
+
+from .config import DECIMALS, MAX_DECIMAL_POW_BASE, MIN_DECIMAL_POW_BASE
+
+_MIN_BASE = MIN_DECIMAL_POW_BASE / DECIMALS
+_MAX_BASE = MAX_DECIMAL_POW_BASE / DECIMALS
+
+SWAP = 0
+DEPOSIT_SINGLE = 1
+DEPOSIT_PROPORTIONAL = 2
+WITHDRAW_SINGLE = 3
+WITHDRAW_PROPORTIONAL = 4
+SWAP_EXACT_OUT = 5
+
+KINDS = {
+    "swap": SWAP,
+    "deposit_single": DEPOSIT_SINGLE,
+    "deposit_proportional": DEPOSIT_PROPORTIONAL,
+    "withdraw_single": WITHDRAW_SINGLE,
+    "withdraw_proportional": WITHDRAW_PROPORTIONAL,
+    "swap_exact_out": SWAP_EXACT_OUT,
+}
+
+
+@dataclass
+class PoolConfig:
+    """create_pool parameters, all in DECIMALS fixed point like the router takes them."""
+
+    swap_fee: int
+    exit_fee: int
+    # token -> (initial liquidity, weight)
+    tokens: Dict[object, Tuple[int, int]]
+
+
+@dataclass
+class Events:
+    """A batch of events as parallel arrays, tokens given by their index in Backtest.tokens."""
+
+    kind: np.ndarray
+    token_in: np.ndarray
+    token_out: np.ndarray
+    amount: np.ndarray
+
+    @classmethod
+    def from_rows(cls, rows):
+        """rows of (kind, token_in index, token_out index, amount), kind a KINDS value."""
+        kind, token_in, token_out, amount = zip(*rows) if rows else ((), (), (), ())
+        return cls(
+            np.asarray(kind, dtype=np.int8),
+            np.asarray(token_in, dtype=np.int32),
+            np.asarray(token_out, dtype=np.int32),
+            np.asarray(amount, dtype=np.float64),
+        )
+
+    def __len__(self):
+        return len(self.kind)
+
+
+@dataclass
+class BacktestResult:
+    # event count at each sample
+    sampled_at: np.ndarray
+    # (samples, candidates)
+    lp_value: np.ndarray
+    hold_value: np.ndarray
+    fee_income: np.ndarray
+    impermanent_loss: np.ndarray
+    # (candidates,)
+    reverted: np.ndarray
+    # (candidates, tokens)
+    balances: np.ndarray
+
+    def summary(self):
+        """Final figures, one dict per candidate."""
+        return [
+            {
+                "lp_value": float(self.lp_value[-1, k]),
+                "hold_value": float(self.hold_value[-1, k]),
+                "fee_income": float(self.fee_income[-1, k]),
+                "impermanent_loss": float(self.impermanent_loss[-1, k]),
+                "reverted": int(self.reverted[k]),
+            }
+            for k in range(self.reverted.shape[0])
+        ]
+
+
+class Backtest:
+    """Replays events against every candidate configuration side by side."""
+
+    def __init__(self, candidates, numeraire=None):
+        self.tokens = list(candidates[0].tokens)
+        for config in candidates:
+            if list(config.tokens) != self.tokens:
+                raise ValueError("every candidate must list the same tokens in the same order")
+        self.numeraire = self.tokens.index(numeraire) if numeraire is not None else 0
+
+        self.balances = np.array(
+            [[config.tokens[t][0] / DECIMALS for t in self.tokens] for config in candidates])
+        weights = np.array(
+            [[config.tokens[t][1] / DECIMALS for t in self.tokens] for config in candidates])
+        self.total_weight = weights.sum(axis=1)
+        self.weights = weights
+        self.swap_fee = np.array([config.swap_fee / DECIMALS for config in candidates])
+        self.exit_fee = np.array([config.exit_fee / DECIMALS for config in candidates])
+        # the router mints the largest initial liquidity amount at init_pool
+        self.supply = np.array([max(config.tokens[t][0] for t in self.tokens) / DECIMALS
+                                for config in candidates])
+
+        # weight_in / weight_out for every pair, and per token the pieces of the single asset formulas
+        self._exponents = weights[:, :, None] / weights[:, None, :]
+        self._weight_ratio = weights / self.total_weight[:, None]
+        self._single_fee = (1 - self._weight_ratio) * self.swap_fee[:, None]
+
+        self._initial_balances = self.balances.copy()
+        self._initial_supply = self.supply.copy()
+        self._initial_prices = self._prices()
+        self.swap_fees = np.zeros_like(self.balances)
+        self.exit_fees = np.zeros_like(self.supply)
+        self.reverted = np.zeros(len(candidates), dtype=np.int64)
+        self.processed = 0
+
+        self._apply = {
+            SWAP: self._swap,
+            DEPOSIT_SINGLE: self._deposit_single,
+            DEPOSIT_PROPORTIONAL: self._deposit_proportional,
+            WITHDRAW_SINGLE: self._withdraw_single,
+            WITHDRAW_PROPORTIONAL: self._withdraw_proportional,
+            SWAP_EXACT_OUT: self._swap_exact_out,
+        }
+
+    ##########
+    # REPLAY
+    ##########
+
+    def run(self, events, sample_every=1000):
+        """Replay events (an Events or an iterable of Events chunks) and return the samples."""
+        if isinstance(events, Events):
+            events = [events]
+
+        samples = [self._sample()]
+        for chunk in events:
+            # plain python lists index faster than numpy scalars in the event loop
+            kinds = chunk.kind.tolist()
+            tokens_in = chunk.token_in.tolist()
+            tokens_out = chunk.token_out.tolist()
+            amounts = chunk.amount.tolist()
+            for kind, i, j, amount in zip(kinds, tokens_in, tokens_out, amounts):
+                self._apply[kind](i, j, amount)
+                self.processed += 1
+                if self.processed % sample_every == 0:
+                    samples.append(self._sample())
+        if self.processed % sample_every:
+            samples.append(self._sample())
+
+        columns = list(zip(*samples))
+        return BacktestResult(
+            sampled_at=np.array(columns[0]),
+            lp_value=np.array(columns[1]),
+            hold_value=np.array(columns[2]),
+            fee_income=np.array(columns[3]),
+            impermanent_loss=np.array(columns[4]),
+            reverted=self.reverted.copy(),
+            balances=self.balances.copy(),
+        )
+
+    def _commit(self, ok):
+        if not ok.all():
+            self.reverted += ~ok
+        return ok
+
+    def _swap(self, i, j, amount):
+        a_balance = self.balances[:, i]
+        b_balance = self.balances[:, j]
+        base = a_balance / (a_balance + amount * (1 - self.swap_fee))
+        ok = self._commit((base >= _MIN_BASE) & (i != j))
+
+        amount_out = np.where(ok, b_balance * (1 - base ** self._exponents[:, i, j]), 0)
+        amount_in = np.where(ok, amount, 0)
+        self.balances[:, i] += amount_in
+        self.balances[:, j] -= amount_out
+        self.swap_fees[:, i] += amount_in * self.swap_fee
+
+    def _swap_exact_out(self, i, j, amount_out):
+        a_balance = self.balances[:, i]
+        b_balance = self.balances[:, j]
+        remaining = b_balance - amount_out
+        base = np.where(remaining > 0, b_balance / np.where(remaining > 0, remaining, 1), np.inf)
+        ok = self._commit((base <= _MAX_BASE) & (i != j))
+
+        amount_in = np.where(
+            ok, a_balance * (base ** self._exponents[:, j, i] - 1) / (1 - self.swap_fee), 0)
+        self.balances[:, i] += amount_in
+        self.balances[:, j] -= np.where(ok, amount_out, 0)
+        self.swap_fees[:, i] += amount_in * self.swap_fee
+
+    def _deposit_single(self, i, j, amount):
+        a_balance = self.balances[:, i]
+        fee = amount * self._single_fee[:, i]
+        base = (a_balance + amount - fee) / a_balance
+        ok = self._commit(base <= _MAX_BASE)
+
+        minted = np.where(ok, self.supply * (base ** self._weight_ratio[:, i] - 1), 0)
+        self.balances[:, i] += np.where(ok, amount, 0)
+        self.supply += minted
+        self.swap_fees[:, i] += np.where(ok, fee, 0)
+
+    def _deposit_proportional(self, i, j, share):
+        self.balances *= 1 + share
+        self.supply *= 1 + share
+
+    def _withdraw_single(self, i, j, share):
+        a_balance = self.balances[:, i]
+        base = 1 - share * (1 - self.exit_fee)
+        ok = self._commit(base >= _MIN_BASE)
+
+        out_before_fee = np.where(ok, a_balance * (1 - base ** (1 / self._weight_ratio[:, i])), 0)
+        fee = out_before_fee * self._single_fee[:, i]
+        pool_amount_in = np.where(ok, share * self.supply, 0)
+        self.balances[:, i] -= out_before_fee - fee
+        self.swap_fees[:, i] += fee
+        self.exit_fees += pool_amount_in * self.exit_fee
+        self.supply -= pool_amount_in
+
+    def _withdraw_proportional(self, i, j, share):
+        ok = self._commit(np.full(self.supply.shape, 0 <= share < 1))
+        share = np.where(ok, share, 0)
+
+        self.balances *= (1 - share * (1 - self.exit_fee))[:, None]
+        self.exit_fees += share * self.supply * self.exit_fee
+        self.supply -= share * self.supply
+
+    ##########
+    # METRICS
+    ##########
+
+    def _prices(self):
+        """Spot price of every token in the numeraire, without the swap fee."""
+        n = self.numeraire
+        return (self.balances[:, [n]] / self.weights[:, [n]]) * self.weights / self.balances
+
+    def _sample(self):
+        prices = self._prices()
+        pool_value = (self.balances * prices).sum(axis=1)
+        value_per_lp = pool_value / self.supply
+
+        lp_value = value_per_lp * self._initial_supply
+        hold_value = (self._initial_balances * prices).sum(axis=1)
+        fee_income = (self.swap_fees * prices).sum(axis=1) + self.exit_fees * value_per_lp
+
+        price_change = prices / self._initial_prices
+        impermanent_loss = (
+            np.prod(price_change ** self._weight_ratio, axis=1)
+            / (self._weight_ratio * price_change).sum(axis=1)
+            - 1)
+        return self.processed, lp_value, hold_value, fee_income, impermanent_loss
+
+
+##########
+# SOURCES
+##########
+
+
+def _token_lookup(tokens):
+    lookup = {}
+    for index, token in enumerate(tokens):
+        lookup[str(token)] = index
+        if isinstance(token, int):
+            lookup[hex(token)] = index
+    return lookup
+
+
+def read_csv(path, tokens, chunk_size=1_000_000):
+    """Yield Events chunks from a CSV with kind,token_in,token_out,amount columns.
+
+    token_out is empty for anything but swaps and token_in is empty for the
+    proportional events. Tokens are matched against str(token), or hex(token)
+    for int tokens.
+    """
+    lookup = _token_lookup(tokens)
+    with open(path, newline="") as file:
+        rows = []
+        for row in csv.DictReader(file):
+            rows.append((
+                KINDS[row["kind"]],
+                lookup[row["token_in"]] if row["token_in"] else 0,
+                lookup[row["token_out"]] if row["token_out"] else 0,
+                float(row["amount"]),
+            ))
+            if len(rows) == chunk_size:
+                yield Events.from_rows(rows)
+                rows = []
+        if rows:
+            yield Events.from_rows(rows)
+
+
+def events_from_indexer(indexer, pool_address, tokens=None):
+    """Events of one pool from a mammoth.indexer.Indexer store.
+
+    LP amounts are turned into shares of the supply by replaying the pool
+    itself with a PoolReplica. tokens defaults to the pool's erc20 addresses
+    in pool_created order.
+    """
+    # imported here so backtests from CSV do not need the indexer's starknet dependencies
+    from .replica import PoolReplica
+
+    replica = PoolReplica()
+    lookup = None
+    rows = []
+    for _, name, fields in indexer.events_since():
+        if fields.get("pool") != pool_address:
+            continue
+        if name == "pool_created":
+            replica.apply(name, fields)
+            if tokens is None:
+                tokens = [token["erc_address"] for token in fields["tokens"]]
+            lookup = {token: index for index, token in enumerate(tokens)}
+            continue
+        if lookup is None:
+            continue
+
+        supply = replica.pools[pool_address].lp_supply
+        if name == "swap_called":
+            rows.append((SWAP, lookup[fields["token_in"]], lookup[fields["token_out"]],
+                         fields["amount_swapped_in"] / DECIMALS))
+        elif name == "swap_exact_out_called":
+            rows.append((SWAP_EXACT_OUT, lookup[fields["token_in"]], lookup[fields["token_out"]],
+                         fields["amount_swapped_out"] / DECIMALS))
+        elif name == "deposit_single_called":
+            rows.append((DEPOSIT_SINGLE, lookup[fields["token"]], 0,
+                         fields["amount_deposited"] / DECIMALS))
+        elif name == "deposit_proportional_called":
+            rows.append((DEPOSIT_PROPORTIONAL, 0, 0, fields["lp_out"] / supply))
+        elif name == "withdraw_single_called":
+            rows.append((WITHDRAW_SINGLE, lookup[fields["token"]], 0,
+                         fields["amount_withdrawn"] / supply))
+        elif name == "withdraw_proportional_called":
+            rows.append((WITHDRAW_PROPORTIONAL, 0, 0, fields["lp_in"] / supply))
+        replica.apply(name, fields)
+
+    return Events.from_rows(rows)
@@ -0,0 +1,232 @@
+"""Python port of Balancer_Math in contracts/lib/balancer_math.cairo.
+
+Argument order and names follow the Cairo functions. Amounts are python
+ints in DECIMALS fixed point; token lists are sequences of
+(erc_address, amount) pairs standing in for TokenAndAmount structs and
+split exponents are (whole, remain) pairs standing in for PowExponent.
+"""
+
+from . import fixed_point as FixedPoint
+from .config import DECIMALS, PRECISION
+
+
+def get_spot_price(a_balance, a_weight, b_balance, b_weight, fee):
+    x = FixedPoint.div(a_balance, a_weight)
+    y = FixedPoint.div(b_balance, b_weight)
+    fee_adj = FixedPoint.sub(DECIMALS, fee)
+
+    balance_ratio = FixedPoint.div(x, y)
+    fee_ratio = FixedPoint.div(DECIMALS, fee_adj)
+
+    return FixedPoint.mul(balance_ratio, fee_ratio)
+
+
+###########################
+# EXPONENTS
+###########################
+
+
+def split_exponent(exponent):
+    whole = FixedPoint.floor(exponent)
+    remain = FixedPoint.sub(exponent, whole)
+
+    return FixedPoint.floor_intermediate(whole), remain
+
+
+def bounded_pow_with_exponent(base, split):
+    """FixedPoint.bounded_pow(base, exponent) for split = split_exponent(exponent)."""
+    whole, remain = split
+    FixedPoint.assert_base_within_bound(base)
+    whole_pow = FixedPoint.integer_pow(base, whole)
+
+    if remain == 0:
+        return whole_pow
+
+    partial_pow = FixedPoint.bounded_decimal_pow(base, remain, PRECISION)
+
+    # FixedPoint.bounded_pow returns 2 when the series collapses to zero
+    if partial_pow == 0:
+        return 2
+
+    return FixedPoint.mul(whole_pow, partial_pow)
+
+
+###########################
+# DEPOSITS AND WITHDRAWALS
+###########################
+
+
+def get_pool_minted_given_single_in(
+        amount_of_a_in, a_balance, supply, a_weight, total_weight, swap_fee):
+    divide_weights = FixedPoint.div(a_weight, total_weight)
+    weight_complement = FixedPoint.sub(DECIMALS, divide_weights)
+    exponent = split_exponent(divide_weights)
+
+    return get_pool_minted_given_single_in_with_exponent(
+        amount_of_a_in, a_balance, supply, weight_complement, exponent, swap_fee)
+
+
+def get_pool_minted_given_single_in_with_exponent(
+        amount_of_a_in, a_balance, supply, weight_complement, exponent, swap_fee):
+    x_times_fee = FixedPoint.mul(weight_complement, swap_fee)
+    swap_fee_adj = FixedPoint.sub(DECIMALS, x_times_fee)
+    token_amount_in_after_fee = FixedPoint.mul(amount_of_a_in, swap_fee_adj)
+    new_token_balance_in = FixedPoint.add(token_amount_in_after_fee, a_balance)
+    balance_in_ratio = FixedPoint.div(new_token_balance_in, a_balance)
+    pool_multiplier = bounded_pow_with_exponent(balance_in_ratio, exponent)
+    new_pool_supply = FixedPoint.mul(pool_multiplier, supply)
+
+    return FixedPoint.sub(new_pool_supply, supply)
+
+
+def get_single_in_given_pool_out(
+        pool_amount_out, a_balance, supply, a_weight, total_weight, swap_fee):
+    weight_ratio = FixedPoint.div(a_weight, total_weight)
+    exponent = split_exponent(FixedPoint.div(DECIMALS, weight_ratio))
+    weight_complement = FixedPoint.sub(DECIMALS, weight_ratio)
+
+    return get_single_in_given_pool_out_with_exponent(
+        pool_amount_out, a_balance, supply, weight_complement, exponent, swap_fee)
+
+
+def get_single_in_given_pool_out_with_exponent(
+        pool_amount_out, a_balance, supply, weight_complement, exponent, swap_fee):
+    fee_adj_two = FixedPoint.mul(weight_complement, swap_fee)
+    fee_adj = FixedPoint.sub(DECIMALS, fee_adj_two)
+
+    pool_supp_adj = FixedPoint.add(supply, pool_amount_out)
+    pool_ratio = FixedPoint.div(pool_supp_adj, supply)
+    balance_in_multiplier = bounded_pow_with_exponent(pool_ratio, exponent)
+    new_balance_in = FixedPoint.mul(balance_in_multiplier, a_balance)
+    token_in_after_fee = FixedPoint.sub(new_balance_in, a_balance)
+
+    return FixedPoint.div(token_in_after_fee, fee_adj)
+
+
+def get_single_out_given_pool_in(
+        pool_amount_in, a_balance, supply, a_weight, total_weight, swap_fee, exit_fee):
+    weight_ratio = FixedPoint.div(a_weight, total_weight)
+    exponent = split_exponent(FixedPoint.div(DECIMALS, weight_ratio))
+    weight_complement = FixedPoint.sub(DECIMALS, weight_ratio)
+
+    return get_single_out_given_pool_in_with_exponent(
+        pool_amount_in, a_balance, supply, weight_complement, exponent, swap_fee, exit_fee)
+
+
+def get_single_out_given_pool_in_with_exponent(
+        pool_amount_in, a_balance, supply, weight_complement, exponent, swap_fee, exit_fee):
+    one_minus_exit_fee = FixedPoint.sub(DECIMALS, exit_fee)
+    pool_amount_in_after_exit_fee = FixedPoint.mul(pool_amount_in, one_minus_exit_fee)
+    new_pool_supply = FixedPoint.sub(supply, pool_amount_in_after_exit_fee)
+    new_pool_div_old_pool = FixedPoint.div(new_pool_supply, supply)
+
+    token_out_ratio = bounded_pow_with_exponent(new_pool_div_old_pool, exponent)
+
+    new_token_balance = FixedPoint.mul(token_out_ratio, a_balance)
+    token_amount_out_before_swap_fee = FixedPoint.sub(a_balance, new_token_balance)
+
+    # swap fee
+    multiply_by_swap_fee = FixedPoint.mul(weight_complement, swap_fee)
+    one_minus_all = FixedPoint.sub(DECIMALS, multiply_by_swap_fee)
+
+    return FixedPoint.mul(token_amount_out_before_swap_fee, one_minus_all)
+
+
+def get_pool_in_given_single_out(
+        amount_b_out, b_balance, supply, b_weight, total_weight, swap_fee, exit_fee):
+    weight_ratio = FixedPoint.div(b_weight, total_weight)
+    weight_complement = FixedPoint.sub(DECIMALS, weight_ratio)
+    exponent = split_exponent(weight_ratio)
+
+    return get_pool_in_given_single_out_with_exponent(
+        amount_b_out, b_balance, supply, weight_complement, exponent, swap_fee, exit_fee)
+
+
+def get_pool_in_given_single_out_with_exponent(
+        amount_b_out, b_balance, supply, weight_complement, exponent, swap_fee, exit_fee):
+    fee_adj_one = FixedPoint.mul(weight_complement, swap_fee)
+    fee_adj = FixedPoint.sub(DECIMALS, fee_adj_one)
+    token_out_before_fee = FixedPoint.div(amount_b_out, fee_adj)
+    new_balance_out = FixedPoint.sub(b_balance, token_out_before_fee)
+    token_out_ratio = FixedPoint.div(new_balance_out, b_balance)
+
+    pool_ratio = bounded_pow_with_exponent(token_out_ratio, exponent)
+    new_pool_supply = FixedPoint.mul(pool_ratio, supply)
+    pool_amount_in_after_exit_fee = FixedPoint.sub(supply, new_pool_supply)
+
+    exit_fee_adj = FixedPoint.sub(DECIMALS, exit_fee)
+    return FixedPoint.div(pool_amount_in_after_exit_fee, exit_fee_adj)
+
+
+###########################
+# SWAPS
+###########################
+
+
+def get_out_given_in(amount_of_a_in, a_balance, a_weight, b_balance, b_weight, swap_fee):
+    exponent = split_exponent(FixedPoint.div(a_weight, b_weight))
+
+    return get_out_given_in_with_exponent(amount_of_a_in, a_balance, b_balance, exponent, swap_fee)
+
+
+def get_out_given_in_with_exponent(amount_of_a_in, a_balance, b_balance, exponent, swap_fee):
+    one_minus_swap_fee = FixedPoint.sub(DECIMALS, swap_fee)
+    adjusted_in = FixedPoint.mul(amount_of_a_in, one_minus_swap_fee)
+
+    new_balance_in = FixedPoint.add(a_balance, adjusted_in)
+    balance_in_ratio = FixedPoint.div(a_balance, new_balance_in)
+    impact_on_balance_out = bounded_pow_with_exponent(balance_in_ratio, exponent)
+    out_balance_multiplier = FixedPoint.sub(DECIMALS, impact_on_balance_out)
+
+    return FixedPoint.mul(b_balance, out_balance_multiplier)
+
+
+# a is token in, b is token out
+def get_in_given_out(amount_of_b_out, b_balance, b_weight, a_balance, a_weight, swap_fee):
+    exponent = split_exponent(FixedPoint.div(b_weight, a_weight))
+
+    return get_in_given_out_with_exponent(amount_of_b_out, b_balance, a_balance, exponent, swap_fee)
+
+
+def get_in_given_out_with_exponent(amount_of_b_out, b_balance, a_balance, exponent, swap_fee):
+    fee_adj = FixedPoint.sub(DECIMALS, swap_fee)
+
+    balance_out_minus_amount_out = FixedPoint.sub(b_balance, amount_of_b_out)
+    balance_out_ratio = FixedPoint.div(b_balance, balance_out_minus_amount_out)
+    weight_ratio_transform = bounded_pow_with_exponent(balance_out_ratio, exponent)
+    balance_in_multiplier_sans_fee = FixedPoint.sub(weight_ratio_transform, DECIMALS)
+    balance_in_multiplier = FixedPoint.div(balance_in_multiplier_sans_fee, fee_adj)
+
+    return FixedPoint.mul(a_balance, balance_in_multiplier)
+
+
+def get_proportional_withdraw_given_pool_in(
+        pool_total_supply, pool_amount_in, exit_fee, token_list):
+    adj_pool_supply_ratio = get_proportional_withdraw_ratio(
+        pool_total_supply, pool_amount_in, exit_fee)
+
+    return _get_balances_needed(adj_pool_supply_ratio, token_list)
+
+
+def get_proportional_deposits_given_pool_out(pool_supply, pool_amount_out, token_list):
+    pool_supply_ratio = get_proportional_deposit_ratio(pool_supply, pool_amount_out)
+
+    return _get_balances_needed(pool_supply_ratio, token_list)
+
+
+def get_proportional_withdraw_ratio(pool_total_supply, pool_amount_in, exit_fee):
+    fee_adj = FixedPoint.mul(pool_amount_in, exit_fee)
+    adj_in = FixedPoint.sub(pool_amount_in, fee_adj)
+
+    return FixedPoint.div(adj_in, pool_total_supply)
+
+
+def get_proportional_deposit_ratio(pool_supply, pool_amount_out):
+    return FixedPoint.div(pool_amount_out, pool_supply)
+
+
+def _get_balances_needed(pool_supply_ratio, token_list):
+    return [
+        (erc_address, FixedPoint.mul(amount, pool_supply_ratio))
+        for erc_address, amount in token_list
+    ]
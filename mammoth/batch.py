@@ -0,0 +1,143 @@
+"""Vectorized versions of the Balancer_Math formulas for sweeping many quotes at once.
+
+Every function takes the same arguments, in the same order, as its
+counterpart in mammoth.balancer_math, but each argument may be a scalar or
+an array and they are broadcast against each other with numpy. Inputs and
+outputs stay in DECIMALS fixed point units so results line up with the
+on-chain values, but they are float64 arrays, not exact integers.
+
+Error bound versus the on-chain fixed point result:
+
+    The Cairo math truncates both operands of every FixedPoint.mul to 9
+    decimals and stops the bounded_pow series once a term drops below
+    10^-9, so the on-chain result itself carries an absolute error of a few
+    10^-9 on every ratio it computes. These functions evaluate the exact
+    formulas in float64 (about 10^-16 relative), so the gap to the chain is
+    dominated by the chain's own rounding:
+
+        |batch - on_chain| <= 1e-8 * max(1, exponent) * (balance + |result|)
+                              + 1e-8 * DECIMALS
+
+    where balance is the balance the result is scaled by (b_balance for
+    get_out_given_in, a_balance for get_in_given_out and the single asset
+    joins/exits, supply for the pool token amounts) and exponent is the
+    weight ratio handed to bounded_pow. For get_spot_price the bound is
+    1e-8 * (|result| + DECIMALS). The bound was checked against
+    mammoth.balancer_math over randomized pools with weights in [0.02, 0.9],
+    fees up to 10% and trades from 10^-12 to 1/2 of the balance; the worst
+    observed error was about half of it. Use mammoth.balancer_math when the
+    exact integer is needed, e.g. to build calldata.
+
+Entries for which the on-chain call would revert because a pow base falls
+outside [MIN_DECIMAL_POW_BASE, MAX_DECIMAL_POW_BASE] are returned as nan.
+"""
+
+import numpy as np
+
+from .config import DECIMALS, MAX_DECIMAL_POW_BASE, MIN_DECIMAL_POW_BASE
+
+_MIN_BASE = MIN_DECIMAL_POW_BASE / DECIMALS
+_MAX_BASE = MAX_DECIMAL_POW_BASE / DECIMALS
+
+
+def _unscale(x):
+    """Fixed point ints (scalar, list or array) -> float64 array of real values."""
+    return np.asarray(x, dtype=object).astype(np.float64) / DECIMALS
+
+
+def _bounded_pow(base, exp):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out = np.power(base, exp)
+    return np.where((base >= _MIN_BASE) & (base <= _MAX_BASE), out, np.nan)
+
+
+def get_spot_price(a_balance, a_weight, b_balance, b_weight, fee):
+    a_balance, a_weight, b_balance, b_weight, fee = map(
+        _unscale, (a_balance, a_weight, b_balance, b_weight, fee))
+
+    spot_price = (a_balance / a_weight) / (b_balance / b_weight) / (1 - fee)
+
+    return spot_price * DECIMALS
+
+
+###########################
+# DEPOSITS AND WITHDRAWALS
+###########################
+
+
+def get_pool_minted_given_single_in(
+        amount_of_a_in, a_balance, supply, a_weight, total_weight, swap_fee):
+    amount_of_a_in, a_balance, supply, a_weight, total_weight, swap_fee = map(
+        _unscale, (amount_of_a_in, a_balance, supply, a_weight, total_weight, swap_fee))
+
+    weight_ratio = a_weight / total_weight
+    in_after_fee = amount_of_a_in * (1 - (1 - weight_ratio) * swap_fee)
+    pool_multiplier = _bounded_pow((in_after_fee + a_balance) / a_balance, weight_ratio)
+
+    return (pool_multiplier * supply - supply) * DECIMALS
+
+
+def get_single_in_given_pool_out(
+        pool_amount_out, a_balance, supply, a_weight, total_weight, swap_fee):
+    pool_amount_out, a_balance, supply, a_weight, total_weight, swap_fee = map(
+        _unscale, (pool_amount_out, a_balance, supply, a_weight, total_weight, swap_fee))
+
+    weight_ratio = a_weight / total_weight
+    fee_adj = 1 - (1 - weight_ratio) * swap_fee
+    balance_in_multiplier = _bounded_pow((supply + pool_amount_out) / supply, 1 / weight_ratio)
+
+    return (balance_in_multiplier * a_balance - a_balance) / fee_adj * DECIMALS
+
+
+def get_single_out_given_pool_in(
+        pool_amount_in, a_balance, supply, a_weight, total_weight, swap_fee, exit_fee):
+    pool_amount_in, a_balance, supply, a_weight, total_weight, swap_fee, exit_fee = map(
+        _unscale,
+        (pool_amount_in, a_balance, supply, a_weight, total_weight, swap_fee, exit_fee))
+
+    weight_ratio = a_weight / total_weight
+    new_pool_supply = supply - pool_amount_in * (1 - exit_fee)
+    token_out_ratio = _bounded_pow(new_pool_supply / supply, 1 / weight_ratio)
+    out_before_swap_fee = a_balance - token_out_ratio * a_balance
+
+    return out_before_swap_fee * (1 - (1 - weight_ratio) * swap_fee) * DECIMALS
+
+
+def get_pool_in_given_single_out(
+        amount_b_out, b_balance, supply, b_weight, total_weight, swap_fee, exit_fee):
+    amount_b_out, b_balance, supply, b_weight, total_weight, swap_fee, exit_fee = map(
+        _unscale,
+        (amount_b_out, b_balance, supply, b_weight, total_weight, swap_fee, exit_fee))
+
+    weight_ratio = b_weight / total_weight
+    out_before_fee = amount_b_out / (1 - (1 - weight_ratio) * swap_fee)
+    pool_ratio = _bounded_pow((b_balance - out_before_fee) / b_balance, weight_ratio)
+
+    return (supply - pool_ratio * supply) / (1 - exit_fee) * DECIMALS
+
+
+###########################
+# SWAPS
+###########################
+
+
+def get_out_given_in(amount_of_a_in, a_balance, a_weight, b_balance, b_weight, swap_fee):
+    amount_of_a_in, a_balance, a_weight, b_balance, b_weight, swap_fee = map(
+        _unscale, (amount_of_a_in, a_balance, a_weight, b_balance, b_weight, swap_fee))
+
+    new_balance_in = a_balance + amount_of_a_in * (1 - swap_fee)
+    impact_on_balance_out = _bounded_pow(a_balance / new_balance_in, a_weight / b_weight)
+
+    return b_balance * (1 - impact_on_balance_out) * DECIMALS
+
+
+# a is token in, b is token out
+def get_in_given_out(amount_of_b_out, b_balance, b_weight, a_balance, a_weight, swap_fee):
+    amount_of_b_out, b_balance, b_weight, a_balance, a_weight, swap_fee = map(
+        _unscale, (amount_of_b_out, b_balance, b_weight, a_balance, a_weight, swap_fee))
+
+    with np.errstate(divide="ignore"):
+        balance_out_ratio = b_balance / (b_balance - amount_of_b_out)
+    weight_ratio_transform = _bounded_pow(balance_out_ratio, b_weight / a_weight)
+
+    return a_balance * (weight_ratio_transform - 1) / (1 - swap_fee) * DECIMALS
@@ -0,0 +1,7 @@
+# mirrors contracts/config.cairo
+
+DECIMALS = 10 ** 18
+HALF_DECIMALS = 10 ** 9  # MUST EQUAL 10 x 10^y where y is half of exponent in DECIMALS
+PRECISION = 10 ** 9
+MAX_DECIMAL_POW_BASE = 19 * 10 ** 17  # (1.9)
+MIN_DECIMAL_POW_BASE = 1 * 10 ** 16  # (.01)
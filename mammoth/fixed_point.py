@@ -0,0 +1,169 @@
+"""Python port of contracts/lib/fixed_point (FixedPoint namespace).
+
+Values are plain python ints holding the Uint256 value. Every function
+truncates and reverts exactly where the Cairo library does (OpenZeppelin
+SafeUint256 underneath), so results are bit for bit identical to a
+Starknet `.call()`.
+"""
+
+from .config import (
+    DECIMALS,
+    HALF_DECIMALS,
+    MAX_DECIMAL_POW_BASE,
+    MIN_DECIMAL_POW_BASE,
+    PRECISION,
+)
+
+UINT256_MAX = 2 ** 256 - 1
+
+
+class FixedPointError(ArithmeticError):
+    """Raised wherever the Cairo implementation would revert."""
+
+
+def _check(a):
+    if not 0 <= a <= UINT256_MAX:
+        raise FixedPointError(f"{a} is not a valid Uint256")
+
+
+def _safe_add(a, b):
+    _check(a)
+    _check(b)
+    c = a + b
+    if c > UINT256_MAX:
+        raise FixedPointError("SafeUint256: addition overflow")
+    return c
+
+
+def _safe_sub_le(a, b):
+    _check(a)
+    _check(b)
+    if b > a:
+        raise FixedPointError("SafeUint256: subtraction overflow")
+    return a - b
+
+
+def _safe_mul(a, b):
+    _check(a)
+    _check(b)
+    c = a * b
+    if c > UINT256_MAX:
+        raise FixedPointError("SafeUint256: multiplication overflow")
+    return c
+
+
+def _safe_div(a, b):
+    _check(a)
+    _check(b)
+    if b == 0:
+        raise FixedPointError("SafeUint256: divisor cannot be zero")
+    return a // b
+
+
+def floor_intermediate(a):
+    """Integer part of a fixed point number, unscaled."""
+    return _safe_div(a, DECIMALS)
+
+
+def floor(a):
+    """Integer part of a fixed point number, still scaled by DECIMALS."""
+    return _safe_mul(floor_intermediate(a), DECIMALS)
+
+
+def half_scaling(a):
+    return _safe_div(a, HALF_DECIMALS)
+
+
+def double_scaling(a):
+    return _safe_mul(a, DECIMALS)
+
+
+def add(a, b):
+    return _safe_add(a, b)
+
+
+def sub(a, b):
+    return _safe_sub_le(a, b)
+
+
+def diff_and_sign(a, b):
+    """Returns (|a - b|, 0) if a >= b and (|a - b|, 1) otherwise."""
+    if b <= a:
+        return _safe_sub_le(a, b), 0
+    return _safe_sub_le(b, a), 1
+
+
+def mul(a, b):
+    return _safe_mul(half_scaling(a), half_scaling(b))
+
+
+def div(a, b):
+    return _safe_div(double_scaling(a), b)
+
+
+def integer_pow(base, exp):
+    """base ^ exp where exp is an unscaled integer."""
+    if exp == 0:
+        return DECIMALS
+    result = base
+    for _ in range(exp - 1):
+        result = mul(result, base)
+    return result
+
+
+def bounded_decimal_pow(base, exp, precision):
+    """Binomial series for base ^ exp with 0 <= exp < 1.
+
+    Terms are added until one is no larger than precision. The sign
+    bookkeeping follows the Cairo implementation exactly, including its
+    handling of the case where both (base - 1) and (exp - (k - 1)) are
+    negative.
+    """
+    x, x_sign = diff_and_sign(base, DECIMALS)
+
+    term = DECIMALS
+    counter = 1
+    total = DECIMALS
+    neg = 0
+
+    while term > precision:
+        big_k = _safe_mul(counter, DECIMALS)
+        k_minus_one = sub(big_k, DECIMALS)
+        c, c_sign = diff_and_sign(exp, k_minus_one)
+        term = div(mul(term, mul(c, x)), big_k)
+
+        if x_sign == c_sign:
+            neg = 1 if x_sign else neg
+        else:
+            neg = 1 - neg
+
+        counter = add(counter, 1)
+        total = sub(total, term) if neg else add(total, term)
+
+    return total
+
+
+def assert_base_within_bound(base):
+    if not MIN_DECIMAL_POW_BASE <= base <= MAX_DECIMAL_POW_BASE:
+        raise FixedPointError(
+            f"base {base} outside [{MIN_DECIMAL_POW_BASE}, {MAX_DECIMAL_POW_BASE}]")
+
+
+def bounded_pow(base, exp):
+    """base ^ exp for MIN_DECIMAL_POW_BASE <= base <= MAX_DECIMAL_POW_BASE."""
+    assert_base_within_bound(base)
+
+    whole = floor(exp)
+    remain = sub(exp, whole)
+    whole_pow = integer_pow(base, floor_intermediate(whole))
+
+    if remain == 0:
+        return whole_pow
+
+    partial_pow = bounded_decimal_pow(base, remain, PRECISION)
+
+    # the Cairo library returns Uint256(2, 0) when the series collapses to zero
+    if partial_pow == 0:
+        return 2
+
+    return mul(whole_pow, partial_pow)
@@ -0,0 +1,249 @@
+"""Router event indexer backed by SQLite.
+
+Indexer walks accepted blocks from the feeder gateway one at a time, keeps
+the events emitted by the router (pool_deployed, pool_created, the
+deposit/withdraw calls, swap_called and swap_exact_out_called), decodes
+them with the router ABI in artifacts/abis and appends them to an SQLite
+file. Every block is committed together with the cursor, so sync() can be
+stopped at any point and picks up at the first block it has not stored.
+
+Each row keeps the decoded event as JSON next to the columns analytics
+filter and aggregate on: pool, token_in, token_out and amount. amount is
+the exact Uint256 as a decimal string; amount_decimal is the same value
+divided by DECIMALS as a float, for fast SUMs.
+"""
+
+import json
+import sqlite3
+import time
+import urllib.parse
+import urllib.request
+from pathlib import Path
+
+from starkware.starknet.public.abi import get_selector_from_name
+
+from .config import DECIMALS
+
+ROUTER_ABI = Path(__file__).parent.parent / "artifacts" / "abis" / "mammoth_router.json"
+
+FEEDER_GATEWAYS = {
+    "localhost": "http://127.0.0.1:5050/feeder_gateway",
+    "goerli": "https://alpha4.starknet.io/feeder_gateway",
+    "mainnet": "https://alpha-mainnet.starknet.io/feeder_gateway",
+}
+
+# event field -> indexed column, the amount column takes the event's Uint256 amount
+POOL_FIELDS = ("pool", "pool_address")
+TOKEN_IN_FIELDS = ("token", "token_in")
+TOKEN_OUT_FIELDS = ("token_out",)
+AMOUNT_FIELDS = (
+    "amount_deposited", "lp_out", "amount_withdrawn", "lp_in", "amount_swapped_in",
+    "initial_lp_minted",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    block_number INTEGER NOT NULL,
+    transaction_index INTEGER NOT NULL,
+    event_index INTEGER NOT NULL,
+    transaction_hash TEXT NOT NULL,
+    timestamp INTEGER,
+    name TEXT NOT NULL,
+    pool TEXT,
+    token_in TEXT,
+    token_out TEXT,
+    amount TEXT,
+    amount_decimal REAL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (block_number, transaction_index, event_index)
+);
+CREATE INDEX IF NOT EXISTS events_pool ON events (pool, block_number);
+CREATE INDEX IF NOT EXISTS events_token_in ON events (token_in, block_number);
+CREATE INDEX IF NOT EXISTS events_token_out ON events (token_out, block_number);
+CREATE INDEX IF NOT EXISTS events_name ON events (name, block_number);
+CREATE TABLE IF NOT EXISTS cursor (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    last_block INTEGER NOT NULL
+);
+"""
+
+
+class EventDecoder:
+    """Decodes raw (keys, data) events with the event and struct entries of an ABI."""
+
+    def __init__(self, abi):
+        self.structs = {entry["name"]: entry for entry in abi if entry["type"] == "struct"}
+        self.events = {
+            get_selector_from_name(entry["name"]): entry
+            for entry in abi
+            if entry["type"] == "event"
+        }
+
+    def decode(self, keys, data):
+        """(name, fields) for a known event, None for anything else."""
+        if not keys or int(keys[0], 16) not in self.events:
+            return None
+        entry = self.events[int(keys[0], 16)]
+
+        values = [int(x, 16) for x in data]
+        fields, offset = {}, 0
+        for member in entry["data"]:
+            member_type = member["type"]
+            if member_type.endswith("*"):
+                # arrays are preceded by their <name>_len member
+                length = fields[f"{member['name']}_len"]
+                item_type = member_type[:-1]
+                items = []
+                for _ in range(length):
+                    item, offset = self._decode_value(item_type, values, offset)
+                    items.append(item)
+                fields[member["name"]] = items
+            else:
+                fields[member["name"]], offset = self._decode_value(member_type, values, offset)
+        return entry["name"], fields
+
+    def _decode_value(self, type_name, values, offset):
+        if type_name == "felt":
+            return values[offset], offset + 1
+        if type_name == "Uint256":
+            return values[offset] + (values[offset + 1] << 128), offset + 2
+
+        struct = self.structs[type_name]
+        result = {}
+        for member in struct["members"]:
+            result[member["name"]], _ = self._decode_value(
+                member["type"], values, offset + member["offset"])
+        return result, offset + struct["size"]
+
+
+class FeederGatewayClient:
+    """Minimal blocking client for the feeder gateway get_block endpoint."""
+
+    def __init__(self, url):
+        self.url = url.rstrip("/")
+
+    def get_block(self, block_number=None):
+        query = "" if block_number is None else "?" + urllib.parse.urlencode(
+            {"blockNumber": block_number})
+        with urllib.request.urlopen(f"{self.url}/get_block{query}") as response:
+            return json.load(response)
+
+    def latest_block_number(self):
+        return self.get_block()["block_number"]
+
+
+def _first(fields, names):
+    for name in names:
+        if name in fields:
+            return fields[name]
+    return None
+
+
+def _hex(value):
+    return None if value is None else hex(value)
+
+
+class Indexer:
+    """Catches an SQLite store up with the router events on chain."""
+
+    def __init__(self, db_path, router_address, client, abi=None, start_block=0):
+        if abi is None:
+            with open(ROUTER_ABI) as file:
+                abi = json.load(file)
+
+        self.connection = sqlite3.connect(db_path)
+        self.connection.executescript(SCHEMA)
+        self.router_address = int(str(router_address), 0)
+        self.client = client
+        self.decoder = EventDecoder(abi)
+        self.start_block = start_block
+
+    def last_block(self):
+        row = self.connection.execute("SELECT last_block FROM cursor WHERE id = 0").fetchone()
+        return self.start_block - 1 if row is None else row[0]
+
+    def index_block(self, block):
+        """Store the router events of one block and move the cursor past it."""
+        rows = []
+        for transaction_index, receipt in enumerate(block.get("transaction_receipts", [])):
+            for event_index, event in enumerate(receipt.get("events", [])):
+                if int(event["from_address"], 16) != self.router_address:
+                    continue
+                decoded = self.decoder.decode(event["keys"], event["data"])
+                if decoded is None:
+                    continue
+                name, fields = decoded
+                amount = _first(fields, AMOUNT_FIELDS)
+                rows.append((
+                    block["block_number"],
+                    transaction_index,
+                    event_index,
+                    receipt["transaction_hash"],
+                    block.get("timestamp"),
+                    name,
+                    _hex(_first(fields, POOL_FIELDS)),
+                    _hex(_first(fields, TOKEN_IN_FIELDS)),
+                    _hex(_first(fields, TOKEN_OUT_FIELDS)),
+                    None if amount is None else str(amount),
+                    None if amount is None else amount / DECIMALS,
+                    json.dumps(fields),
+                ))
+
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self.connection.execute(
+                "INSERT INTO cursor (id, last_block) VALUES (0, ?) "
+                "ON CONFLICT (id) DO UPDATE SET last_block = excluded.last_block",
+                (block["block_number"],))
+        return len(rows)
+
+    def sync(self, to_block=None):
+        """Index every block after the cursor up to to_block (default latest)."""
+        if to_block is None:
+            to_block = self.client.latest_block_number()
+        indexed = 0
+        for block_number in range(self.last_block() + 1, to_block + 1):
+            indexed += self.index_block(self.client.get_block(block_number))
+        return indexed
+
+    def follow(self, poll_interval=10):
+        """sync() forever, waiting poll_interval seconds between catch-ups."""
+        while True:
+            self.sync()
+            time.sleep(poll_interval)
+
+    def events_since(self, position=None):
+        """Stored events after position, as (position, name, fields) tuples in chain order.
+
+        position is the (block_number, transaction_index, event_index) of the
+        last event already consumed, or None for every stored event.
+        """
+        query = (
+            "SELECT block_number, transaction_index, event_index, name, data FROM events"
+            " WHERE (block_number, transaction_index, event_index) > (?, ?, ?)"
+            " ORDER BY block_number, transaction_index, event_index"
+        )
+        return [
+            ((block_number, transaction_index, event_index), name, json.loads(data))
+            for block_number, transaction_index, event_index, name, data
+            in self.connection.execute(query, position or (-1, -1, -1))
+        ]
+
+    def events(self, name=None, pool=None):
+        """Stored events in chain order as (block_number, name, fields) tuples."""
+        query = "SELECT block_number, name, data FROM events"
+        conditions, params = [], []
+        if name is not None:
+            conditions.append("name = ?")
+            params.append(name)
+        if pool is not None:
+            conditions.append("pool = ?")
+            params.append(_hex(int(str(pool), 0)))
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY block_number, transaction_index, event_index"
+        return [
+            (block_number, event_name, json.loads(data))
+            for block_number, event_name, data in self.connection.execute(query, params)
+        ]
@@ -0,0 +1,153 @@
+"""Arbitrary precision reference for the Balancer_Math formulas.
+
+Same functions, argument order and DECIMALS fixed point inputs as
+mammoth.balancer_math, but every step is evaluated on exact real values
+with the decimal module at PRECISION significant digits and nothing is
+truncated along the way. Results are Decimals in DECIMALS units, not
+rounded to an integer, so the error of the on-chain math is measured
+against the formula itself rather than against another rounding.
+
+Pow bounds are not checked here: callers decide which inputs are valid
+(mammoth.balancer_math raises FixedPointError wherever the chain reverts).
+"""
+
+from decimal import Decimal, localcontext
+
+from .config import DECIMALS
+
+PRECISION = 60
+
+_DECIMALS = Decimal(DECIMALS)
+
+
+def _real(*values):
+    return [Decimal(value) / _DECIMALS for value in values]
+
+
+def _pow(base, exponent):
+    return (base.ln() * exponent).exp()
+
+
+def _scaled(value):
+    return value * _DECIMALS
+
+
+def get_spot_price(a_balance, a_weight, b_balance, b_weight, fee):
+    with localcontext() as context:
+        context.prec = PRECISION
+        a_balance, a_weight, b_balance, b_weight, fee = _real(
+            a_balance, a_weight, b_balance, b_weight, fee)
+
+        return _scaled((a_balance / a_weight) / (b_balance / b_weight) / (1 - fee))
+
+
+###########################
+# DEPOSITS AND WITHDRAWALS
+###########################
+
+
+def get_pool_minted_given_single_in(
+        amount_of_a_in, a_balance, supply, a_weight, total_weight, swap_fee):
+    with localcontext() as context:
+        context.prec = PRECISION
+        amount_of_a_in, a_balance, supply, a_weight, total_weight, swap_fee = _real(
+            amount_of_a_in, a_balance, supply, a_weight, total_weight, swap_fee)
+
+        weight_ratio = a_weight / total_weight
+        in_after_fee = amount_of_a_in * (1 - (1 - weight_ratio) * swap_fee)
+        pool_multiplier = _pow((a_balance + in_after_fee) / a_balance, weight_ratio)
+
+        return _scaled(pool_multiplier * supply - supply)
+
+
+def get_single_in_given_pool_out(
+        pool_amount_out, a_balance, supply, a_weight, total_weight, swap_fee):
+    with localcontext() as context:
+        context.prec = PRECISION
+        pool_amount_out, a_balance, supply, a_weight, total_weight, swap_fee = _real(
+            pool_amount_out, a_balance, supply, a_weight, total_weight, swap_fee)
+
+        weight_ratio = a_weight / total_weight
+        fee_adj = 1 - (1 - weight_ratio) * swap_fee
+        balance_in_multiplier = _pow((supply + pool_amount_out) / supply, 1 / weight_ratio)
+
+        return _scaled((balance_in_multiplier * a_balance - a_balance) / fee_adj)
+
+
+def get_single_out_given_pool_in(
+        pool_amount_in, a_balance, supply, a_weight, total_weight, swap_fee, exit_fee):
+    with localcontext() as context:
+        context.prec = PRECISION
+        pool_amount_in, a_balance, supply, a_weight, total_weight, swap_fee, exit_fee = _real(
+            pool_amount_in, a_balance, supply, a_weight, total_weight, swap_fee, exit_fee)
+
+        weight_ratio = a_weight / total_weight
+        new_pool_supply = supply - pool_amount_in * (1 - exit_fee)
+        token_out_ratio = _pow(new_pool_supply / supply, 1 / weight_ratio)
+        out_before_swap_fee = a_balance - token_out_ratio * a_balance
+
+        return _scaled(out_before_swap_fee * (1 - (1 - weight_ratio) * swap_fee))
+
+
+def get_pool_in_given_single_out(
+        amount_b_out, b_balance, supply, b_weight, total_weight, swap_fee, exit_fee):
+    with localcontext() as context:
+        context.prec = PRECISION
+        amount_b_out, b_balance, supply, b_weight, total_weight, swap_fee, exit_fee = _real(
+            amount_b_out, b_balance, supply, b_weight, total_weight, swap_fee, exit_fee)
+
+        weight_ratio = b_weight / total_weight
+        out_before_fee = amount_b_out / (1 - (1 - weight_ratio) * swap_fee)
+        pool_ratio = _pow((b_balance - out_before_fee) / b_balance, weight_ratio)
+
+        return _scaled((supply - pool_ratio * supply) / (1 - exit_fee))
+
+
+###########################
+# SWAPS
+###########################
+
+
+def get_out_given_in(amount_of_a_in, a_balance, a_weight, b_balance, b_weight, swap_fee):
+    with localcontext() as context:
+        context.prec = PRECISION
+        amount_of_a_in, a_balance, a_weight, b_balance, b_weight, swap_fee = _real(
+            amount_of_a_in, a_balance, a_weight, b_balance, b_weight, swap_fee)
+
+        new_balance_in = a_balance + amount_of_a_in * (1 - swap_fee)
+        impact_on_balance_out = _pow(a_balance / new_balance_in, a_weight / b_weight)
+
+        return _scaled(b_balance * (1 - impact_on_balance_out))
+
+
+# a is token in, b is token out
+def get_in_given_out(amount_of_b_out, b_balance, b_weight, a_balance, a_weight, swap_fee):
+    with localcontext() as context:
+        context.prec = PRECISION
+        amount_of_b_out, b_balance, b_weight, a_balance, a_weight, swap_fee = _real(
+            amount_of_b_out, b_balance, b_weight, a_balance, a_weight, swap_fee)
+
+        balance_out_ratio = b_balance / (b_balance - amount_of_b_out)
+        weight_ratio_transform = _pow(balance_out_ratio, b_weight / a_weight)
+
+        return _scaled(a_balance * (weight_ratio_transform - 1) / (1 - swap_fee))
+
+
+def get_proportional_withdraw_given_pool_in(
+        pool_total_supply, pool_amount_in, exit_fee, token_list):
+    with localcontext() as context:
+        context.prec = PRECISION
+        pool_total_supply, pool_amount_in, exit_fee = _real(
+            pool_total_supply, pool_amount_in, exit_fee)
+
+        ratio = pool_amount_in * (1 - exit_fee) / pool_total_supply
+        return [(erc_address, Decimal(amount) * ratio) for erc_address, amount in token_list]
+
+
+def get_proportional_deposits_given_pool_out(pool_supply, pool_amount_out, token_list):
+    with localcontext() as context:
+        context.prec = PRECISION
+        pool_supply, pool_amount_out = _real(pool_supply, pool_amount_out)
+
+        ratio = pool_amount_out / pool_supply
+        return [(erc_address, Decimal(amount) * ratio) for erc_address, amount in token_list]
@@ -0,0 +1,201 @@
+"""In-memory replica of every approved pool, kept current from router events.
+
+PoolReplica starts from a snapshot (routing.Pool objects, e.g. built from
+get_pool_state) and applies the decoded router events in chain order.
+swap_exact_out_called carries both amounts and is applied as is; the other
+router events only carry the amount the user sent in, so the amount that
+left the pool is recomputed with mammoth.balancer_math on the replica's own
+state, which is exactly what the pool computed on chain. Quotes then run on
+local state with no RPC calls.
+
+Anything the events do not show (a token sent straight to a pool, a missed
+block) makes the replica drift. reconcile() compares it against balances
+read from chain, resets whatever differs and returns the differences.
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+
+from . import balancer_math
+from .config import DECIMALS
+from .routing import Pool, SmartOrderRouter
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Drift:
+    pool: int
+    # None for the LP supply
+    erc20_address: int
+    replica: int
+    chain: int
+
+
+class PoolReplica:
+    def __init__(self, pools=(), position=None):
+        self.pools = {pool.address: pool for pool in pools}
+        # (block_number, transaction_index, event_index) of the last applied event
+        self.position = position
+
+    ##########
+    # EVENTS
+    ##########
+
+    def apply(self, name, fields):
+        """Apply one decoded router event, unknown events and pools are ignored."""
+        if name == "pool_created":
+            self._pool_created(fields)
+            return
+
+        pool = self.pools.get(fields.get("pool"))
+        if pool is None:
+            return
+
+        if name == "swap_called":
+            self._swap(pool, fields["amount_swapped_in"], fields["token_in"], fields["token_out"])
+        elif name == "swap_exact_out_called":
+            self._add(pool, fields["token_in"], fields["amount_swapped_in"])
+            self._add(pool, fields["token_out"], -fields["amount_swapped_out"])
+        elif name == "deposit_single_called":
+            self._deposit_single(pool, fields["amount_deposited"], fields["token"])
+        elif name == "deposit_proportional_called":
+            self._deposit_proportional(pool, fields["lp_out"])
+        elif name == "withdraw_single_called":
+            self._withdraw_single(pool, fields["amount_withdrawn"], fields["token"])
+        elif name == "withdraw_proportional_called":
+            self._withdraw_proportional(pool, fields["lp_in"])
+
+    def sync(self, indexer):
+        """Apply every event the indexer stored after the last applied one."""
+        events = indexer.events_since(self.position)
+        for position, name, fields in events:
+            self.apply(name, fields)
+            self.position = position
+        return len(events)
+
+    def _pool_created(self, fields):
+        tokens = {}
+        for token in fields["tokens"]:
+            weight = token["weight_low"] + (token["weight_high"] << 128)
+            balance = token["initial_liquidity_low"] + (token["initial_liquidity_high"] << 128)
+            tokens[token["erc_address"]] = (balance, weight)
+
+        self.pools[fields["pool"]] = Pool(
+            address=fields["pool"],
+            swap_fee=fields["swap_fee"],
+            tokens=tokens,
+            exit_fee=fields["exit_fee"],
+            total_weight=DECIMALS,
+            lp_supply=fields["initial_lp_minted"],
+        )
+
+    def _add(self, pool, erc20_address, amount):
+        balance, weight = pool.tokens[erc20_address]
+        pool.tokens[erc20_address] = (balance + amount, weight)
+
+    def _swap(self, pool, amount_in, erc20_address_in, erc20_address_out):
+        amount_out = self.quote_out_given_in(
+            pool.address, amount_in, erc20_address_in, erc20_address_out)
+        self._add(pool, erc20_address_in, amount_in)
+        self._add(pool, erc20_address_out, -amount_out)
+
+    def _deposit_single(self, pool, amount_in, erc20_address):
+        balance, weight = pool.tokens[erc20_address]
+        minted = balancer_math.get_pool_minted_given_single_in(
+            amount_in, balance, pool.lp_supply, weight, pool.total_weight, pool.swap_fee)
+        self._add(pool, erc20_address, amount_in)
+        pool.lp_supply += minted
+
+    def _deposit_proportional(self, pool, pool_amount_out):
+        deposits = balancer_math.get_proportional_deposits_given_pool_out(
+            pool.lp_supply, pool_amount_out, self._balances(pool))
+        for erc20_address, amount in deposits:
+            self._add(pool, erc20_address, amount)
+        pool.lp_supply += pool_amount_out
+
+    def _withdraw_single(self, pool, pool_amount_in, erc20_address):
+        balance, weight = pool.tokens[erc20_address]
+        amount_out = balancer_math.get_single_out_given_pool_in(
+            pool_amount_in, balance, pool.lp_supply, weight, pool.total_weight,
+            pool.swap_fee, pool.exit_fee)
+        self._add(pool, erc20_address, -amount_out)
+        pool.lp_supply -= pool_amount_in
+
+    def _withdraw_proportional(self, pool, pool_amount_in):
+        withdrawals = balancer_math.get_proportional_withdraw_given_pool_in(
+            pool.lp_supply, pool_amount_in, pool.exit_fee, self._balances(pool))
+        for erc20_address, amount in withdrawals:
+            self._add(pool, erc20_address, -amount)
+        pool.lp_supply -= pool_amount_in
+
+    @staticmethod
+    def _balances(pool):
+        return [(erc, balance) for erc, (balance, _) in pool.tokens.items()]
+
+    ##########
+    # QUOTES
+    ##########
+
+    def quote_out_given_in(self, pool_address, amount_in, erc20_address_in, erc20_address_out):
+        pool = self.pools[pool_address]
+        a_balance, a_weight = pool.tokens[erc20_address_in]
+        b_balance, b_weight = pool.tokens[erc20_address_out]
+        return balancer_math.get_out_given_in(
+            amount_in, a_balance, a_weight, b_balance, b_weight, pool.swap_fee)
+
+    def quote_in_given_out(self, pool_address, amount_out, erc20_address_in, erc20_address_out):
+        pool = self.pools[pool_address]
+        a_balance, a_weight = pool.tokens[erc20_address_in]
+        b_balance, b_weight = pool.tokens[erc20_address_out]
+        return balancer_math.get_in_given_out(
+            amount_out, b_balance, b_weight, a_balance, a_weight, pool.swap_fee)
+
+    def router(self, **kwargs):
+        """A SmartOrderRouter over the current replica state."""
+        return SmartOrderRouter(list(self.pools.values()), **kwargs)
+
+    ##########
+    # RECONCILIATION
+    ##########
+
+    def reconcile(self, get_balance, get_supply=None):
+        """Compare with chain and reset every value that drifted.
+
+        get_balance(pool_address, erc20_address) and get_supply(pool_address)
+        read the chain, e.g. through get_ERC20_balance and totalSupply.
+        """
+        drifts = []
+        for pool in self.pools.values():
+            for erc20_address, (balance, weight) in list(pool.tokens.items()):
+                chain_balance = get_balance(pool.address, erc20_address)
+                if chain_balance != balance:
+                    drifts.append(Drift(pool.address, erc20_address, balance, chain_balance))
+                    pool.tokens[erc20_address] = (chain_balance, weight)
+            if get_supply is not None:
+                chain_supply = get_supply(pool.address)
+                if chain_supply != pool.lp_supply:
+                    drifts.append(Drift(pool.address, None, pool.lp_supply, chain_supply))
+                    pool.lp_supply = chain_supply
+        return drifts
+
+
+def follow(replica, indexer, get_balance, get_supply=None, poll_interval=10,
+           reconcile_interval=600, on_drift=None):
+    """Keep a replica current forever: index, apply, and reconcile every reconcile_interval seconds.
+
+    Every drift found is passed to on_drift, or logged as a warning without one.
+    """
+    last_reconcile = time.monotonic()
+    while True:
+        indexer.sync()
+        replica.sync(indexer)
+        if time.monotonic() - last_reconcile >= reconcile_interval:
+            for drift in replica.reconcile(get_balance, get_supply):
+                if on_drift is None:
+                    logger.warning("replica drift: %s", drift)
+                else:
+                    on_drift(drift)
+            last_reconcile = time.monotonic()
+        time.sleep(poll_interval)
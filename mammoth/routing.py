@@ -0,0 +1,271 @@
+"""Off-chain order routing across approved mammoth pools.
+
+A SmartOrderRouter is built from a snapshot of pools (for example the
+get_pool_state of every pool_created / is_pool_approved address). route()
+enumerates every path from token in to token out of at most max_hops hops,
+then hands out the trade in equal chunks, each going to the path with the
+best marginal output given the balances the previous chunks left behind.
+The search runs in float64 on numpy arrays holding every path at once;
+the chosen split is then re-quoted leg by leg with the exact fixed point
+math of mammoth.balancer_math, applying each leg to the pool balances
+before quoting the next, in the order the router will execute them.
+
+Route.calls() turns the result into mammoth_swap_path calls for the router,
+ready for a multicall. fetch_pool_addresses() pages through the router's pool
+index (by token or token pair) to find the pools to snapshot.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from . import balancer_math
+from .config import DECIMALS, MIN_DECIMAL_POW_BASE
+
+_MIN_BASE = MIN_DECIMAL_POW_BASE / DECIMALS
+
+# (pool_address, erc20_address_in, erc20_address_out), as the router SwapHop struct
+Hop = Tuple[int, int, int]
+
+
+def _from_uint(uint):
+    return uint[0] + (uint[1] << 128)
+
+
+@dataclass
+class Pool:
+    """Snapshot of one pool, amounts in DECIMALS fixed point."""
+
+    address: int
+    swap_fee: int
+    # erc20 address -> (balance, weight)
+    tokens: Dict[int, Tuple[int, int]]
+    exit_fee: int = 0
+    total_weight: int = DECIMALS
+    lp_supply: int = 0
+
+    @classmethod
+    def from_pool_state(cls, address, state):
+        """Build from the result of the pool get_pool_state view."""
+        return cls(
+            address=address,
+            swap_fee=_from_uint(state.swap_fee),
+            tokens={
+                erc: (_from_uint(balance), _from_uint(weight))
+                for erc, balance, weight in state.token_states
+            },
+            exit_fee=_from_uint(state.exit_fee),
+            total_weight=_from_uint(state.total_weight),
+            lp_supply=_from_uint(state.lp_supply),
+        )
+
+
+async def fetch_pool_addresses(router, erc20_address=None, erc20_address_out=None, page_size=100):
+    """Every pool created on the router, every pool holding erc20_address, or
+    with erc20_address_out as well every pool holding both (the direct routes).
+
+    router is a contract object with the router abi (starknet.py or the
+    testing framework), read page_size pools per call.
+    """
+    addresses = []
+    while True:
+        if erc20_address is None:
+            page = await router.get_pools(len(addresses), page_size).call()
+        elif erc20_address_out is None:
+            page = await router.get_pools_for_token(
+                erc20_address, len(addresses), page_size).call()
+        else:
+            page = await router.get_pools_for_pair(
+                erc20_address, erc20_address_out, len(addresses), page_size).call()
+        pools = page.result.pools
+        addresses.extend(pools)
+        if len(pools) < page_size:
+            return addresses
+
+
+@dataclass
+class RouteLeg:
+    path: List[Hop]
+    amount_in: int
+    amount_out: int
+
+
+@dataclass
+class Route:
+    erc20_address_in: int
+    erc20_address_out: int
+    amount_in: int
+    legs: List[RouteLeg] = field(default_factory=list)
+
+    @property
+    def amount_out(self):
+        return sum(leg.amount_out for leg in self.legs)
+
+    def calls(self, router_address, user_address, slippage=0):
+        """mammoth_swap_path calls for the router, one per leg.
+
+        slippage is a fraction in DECIMALS fixed point taken off each leg's
+        exact quote to give its min_amount_out.
+        """
+        calls = []
+        for leg in self.legs:
+            min_amount_out = leg.amount_out * (DECIMALS - slippage) // DECIMALS
+            calldata = [
+                leg.amount_in & (2 ** 128 - 1),
+                leg.amount_in >> 128,
+                user_address,
+                min_amount_out & (2 ** 128 - 1),
+                min_amount_out >> 128,
+                len(leg.path),
+                *[x for hop in leg.path for x in hop],
+            ]
+            calls.append((router_address, "mammoth_swap_path", calldata))
+        return calls
+
+
+class SmartOrderRouter:
+    """Splits exact-in trades across the paths of a set of pools."""
+
+    def __init__(self, pools, max_hops=2, chunks=32):
+        self.pools = {pool.address: pool for pool in pools}
+        self.max_hops = max_hops
+        self.chunks = chunks
+
+        # one slot per (pool, token) so paths through the same pool share balances
+        self._slots = {}
+        balances, weights, fees = [], [], []
+        for pool in pools:
+            for erc, (balance, weight) in pool.tokens.items():
+                self._slots[(pool.address, erc)] = len(balances)
+                balances.append(balance / DECIMALS)
+                weights.append(weight / DECIMALS)
+                fees.append(pool.swap_fee / DECIMALS)
+        self._balances = np.array(balances, dtype=np.float64)
+        self._weights = np.array(weights, dtype=np.float64)
+        self._fees = np.array(fees, dtype=np.float64)
+
+        self._pools_by_token = {}
+        for pool in pools:
+            for erc in pool.tokens:
+                self._pools_by_token.setdefault(erc, []).append(pool)
+
+        self._path_cache = {}
+
+    def paths(self, erc20_address_in, erc20_address_out):
+        """Every path of at most max_hops hops that never visits a pool or token twice."""
+        key = (erc20_address_in, erc20_address_out)
+        if key not in self._path_cache:
+            found = []
+            self._extend_paths(
+                erc20_address_in, erc20_address_out, [], {erc20_address_in}, set(), found)
+            self._path_cache[key] = found
+        return self._path_cache[key]
+
+    def _extend_paths(self, token, target, path, seen_tokens, seen_pools, found):
+        if len(path) == self.max_hops:
+            return
+        for pool in self._pools_by_token.get(token, ()):
+            if pool.address in seen_pools:
+                continue
+            for next_token in pool.tokens:
+                if next_token in seen_tokens:
+                    continue
+                hop = (pool.address, token, next_token)
+                if next_token == target:
+                    found.append(path + [hop])
+                else:
+                    self._extend_paths(
+                        next_token, target, path + [hop], seen_tokens | {next_token},
+                        seen_pools | {pool.address}, found)
+
+    def route(self, erc20_address_in, erc20_address_out, amount_in):
+        """Best split of amount_in (DECIMALS fixed point) into erc20_address_out."""
+        paths = self.paths(erc20_address_in, erc20_address_out)
+        route = Route(erc20_address_in, erc20_address_out, amount_in)
+        if not paths or amount_in == 0:
+            return route
+
+        chunk_counts = self._split(paths, amount_in / DECIMALS)
+
+        chunk = amount_in // self.chunks
+        allocated = [(path, int(count) * chunk) for path, count in zip(paths, chunk_counts) if count]
+        # rounding dust goes to the leg with the most chunks
+        largest = max(range(len(allocated)), key=lambda i: allocated[i][1])
+        path, amount = allocated[largest]
+        allocated[largest] = (path, amount + amount_in - chunk * self.chunks)
+
+        balances = {
+            (pool.address, erc): balance
+            for pool in self.pools.values()
+            for erc, (balance, _) in pool.tokens.items()
+        }
+        for path, amount in allocated:
+            route.legs.append(RouteLeg(path, amount, self._quote_exact(path, amount, balances)))
+        return route
+
+    def _split(self, paths, amount_in):
+        """Greedy chunk allocation in float64, returns chunk counts per path."""
+        n_paths = len(paths)
+        in_slots = np.zeros((n_paths, self.max_hops), dtype=np.int64)
+        out_slots = np.zeros((n_paths, self.max_hops), dtype=np.int64)
+        active = np.zeros((n_paths, self.max_hops), dtype=bool)
+        for i, path in enumerate(paths):
+            for j, (pool_address, erc_in, erc_out) in enumerate(path):
+                in_slots[i, j] = self._slots[(pool_address, erc_in)]
+                out_slots[i, j] = self._slots[(pool_address, erc_out)]
+                active[i, j] = True
+
+        exponents = self._weights[in_slots] / self._weights[out_slots]
+        one_minus_fee = 1 - self._fees[in_slots]
+        balances = self._balances.copy()
+        chunk = amount_in / self.chunks
+        counts = np.zeros(n_paths, dtype=np.int64)
+        rows = np.arange(n_paths)
+
+        for _ in range(self.chunks):
+            amounts = np.empty((n_paths, self.max_hops + 1))
+            amounts[:, 0] = chunk
+            for j in range(self.max_hops):
+                amounts[:, j + 1] = np.where(
+                    active[:, j],
+                    _out_given_in(
+                        amounts[:, j],
+                        balances[in_slots[:, j]],
+                        balances[out_slots[:, j]],
+                        exponents[:, j],
+                        one_minus_fee[:, j]),
+                    amounts[:, j])
+
+            best = int(np.argmax(amounts[rows, active.sum(axis=1)]))
+            counts[best] += 1
+            for j in range(len(paths[best])):
+                balances[in_slots[best, j]] += amounts[best, j]
+                balances[out_slots[best, j]] -= amounts[best, j + 1]
+
+        return counts
+
+    def _quote_exact(self, path, amount, balances):
+        """Exact output of one leg, updating balances as the pools would."""
+        for pool_address, erc_in, erc_out in path:
+            pool = self.pools[pool_address]
+            a_balance = balances[(pool_address, erc_in)]
+            b_balance = balances[(pool_address, erc_out)]
+            amount_out = balancer_math.get_out_given_in(
+                amount,
+                a_balance,
+                pool.tokens[erc_in][1],
+                b_balance,
+                pool.tokens[erc_out][1],
+                pool.swap_fee)
+            balances[(pool_address, erc_in)] = a_balance + amount
+            balances[(pool_address, erc_out)] = b_balance - amount_out
+            amount = amount_out
+        return amount
+
+
+def _out_given_in(amount_in, a_balance, b_balance, exponent, one_minus_fee):
+    base = a_balance / (a_balance + amount_in * one_minus_fee)
+    out = b_balance * (1 - np.power(base, exponent))
+    # the pool reverts when the pow base leaves its bounds
+    return np.where(base >= _MIN_BASE, out, -np.inf)
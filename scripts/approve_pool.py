@@ -1,12 +1,11 @@
 import os
 import sys
-import time
 
 current = os.path.dirname(os.path.realpath(__file__))
 parent = os.path.dirname(current)
 sys.path.append(parent)
 
-from scripts.script_utils import DECIMALS, MAX_FEE
+from scripts.script_utils import DECIMALS, send_multicall, wait_for_transaction
 
 
 def run(nre):
@@ -24,19 +23,12 @@ def run(nre):
     # approve pool to spend args
     approve_args = [int(pool_address, 16), 400000 * DECIMALS, 0]
 
-    # send tx
-    tx_one = user_account.send(
-        to=tZWBTC, method='approve', calldata=approve_args, max_fee=MAX_FEE)
+    # one transaction for all three approvals
+    tx = send_multicall(user_account, [
+        (tZWBTC, 'approve', approve_args),
+        (tUSDC, 'approve', approve_args),
+        (tETH, 'approve', approve_args),
+    ])
 
-    time.sleep(200)
-
-    tx_two = user_account.send(
-        to=tUSDC, method='approve', calldata=approve_args, max_fee=MAX_FEE)
-
-    time.sleep(200)
-    tx_three = user_account.send(
-        to=tETH, method='approve', calldata=approve_args, max_fee=MAX_FEE)
-
-    print(tx_one)
-    print(tx_two)
-    print(tx_three)
+    print(tx)
+    wait_for_transaction(tx, nre.network)
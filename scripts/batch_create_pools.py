@@ -0,0 +1,144 @@
+"""Deploy and create a set of pools in one transaction from a JSON or YAML spec
+
+    MAMMOTH_POOLS_SPEC=pools.yaml nile run scripts/batch_create_pools.py
+
+    pool_type: DEFAULTv0          # optional, for every pool without its own
+    pools:
+      - name: MAMMOTH_LP
+        symbol: MLP
+        decimals: 18              # optional, 18
+        swap_fee: 0.002           # fractions, scaled by DECIMALS
+        exit_fee: 0.002
+        tokens:                   # nile alias or address, weights sum to 1
+          - {address: tUSDC, weight: 0.5, liquidity: 100000}
+          - {address: tETH, weight: 0.5, liquidity: 50}
+
+The pool addresses are computed from the router's get_deployment_info, so the
+approvals of the initial liquidity and deploy_and_create_pools are sent as one
+multicall. YAML specs need pyyaml.
+"""
+
+import json
+import os
+import sys
+from decimal import Decimal
+
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+from nile.core.call_or_invoke import call_or_invoke
+from starkware.starknet.core.os.contract_address.contract_address import (
+    calculate_contract_address_from_hash
+)
+from tests.oz_utils import str_to_felt, to_uint
+from scripts.script_utils import DECIMALS, _to_int, send_multicall, wait_for_transaction
+
+DEFAULT_POOL_TYPE = "DEFAULTv0"
+
+
+def load_spec(path):
+    with open(path) as file:
+        if path.endswith((".yaml", ".yml")):
+            import yaml
+            return yaml.safe_load(file)
+        return json.load(file)
+
+
+def to_wad(value):
+    """Decimal amount scaled by DECIMALS, exact for decimal strings and numbers"""
+    return int(Decimal(str(value)) * DECIMALS)
+
+
+def pool_type_felt(spec, pool):
+    return str_to_felt(pool.get("pool_type", spec.get("pool_type", DEFAULT_POOL_TYPE)))
+
+
+def deploy_and_create_calldata(spec, caller_address, proxy_admin, resolve=_to_int):
+    """Calldata of deploy_and_create_pools, resolve maps a token address or alias to an int"""
+    configs, erc_list = [], []
+    for pool in spec["pools"]:
+        configs += [
+            pool_type_felt(spec, pool),
+            proxy_admin,
+            str_to_felt(pool["name"]),
+            str_to_felt(pool["symbol"]),
+            pool.get("decimals", 18),
+            *to_uint(to_wad(pool["swap_fee"])),
+            *to_uint(to_wad(pool["exit_fee"])),
+            len(pool["tokens"]),
+        ]
+        for token in pool["tokens"]:
+            erc_list += [
+                resolve(token["address"]),
+                *to_uint(to_wad(token["weight"])),
+                *to_uint(to_wad(token["liquidity"])),
+            ]
+
+    num_tokens = sum(len(pool["tokens"]) for pool in spec["pools"])
+    return [caller_address, len(spec["pools"]), *configs, num_tokens, *erc_list]
+
+
+def pool_addresses(spec, router_address, proxy_admin, deployment_info):
+    """Addresses the router will deploy the pools at
+
+    deployment_info maps each pool type felt to the (proxy_hash, pool_hash, salt)
+    returned by the router's get_deployment_info.
+    """
+    addresses = []
+    for index, pool in enumerate(spec["pools"]):
+        proxy_hash, pool_hash, salt = deployment_info[pool_type_felt(spec, pool)]
+        addresses.append(calculate_contract_address_from_hash(
+            salt=salt + index,
+            class_hash=proxy_hash,
+            constructor_calldata=[pool_hash, proxy_admin],
+            deployer_address=router_address,
+        ))
+    return addresses
+
+
+def approve_calls(spec, addresses, resolve=_to_int):
+    """(to, method, calldata) approvals of every pool's initial liquidity"""
+    return [
+        (resolve(token["address"]), "approve", [pool_address, *to_uint(to_wad(token["liquidity"]))])
+        for pool, pool_address in zip(spec["pools"], addresses)
+        for token in pool["tokens"]
+    ]
+
+
+def run(nre):
+    spec = load_spec(os.environ.get("MAMMOTH_POOLS_SPEC", "pools.json"))
+
+    user_account = nre.get_or_deploy_account("BALLER")
+    user_address = int(user_account.address, 16)
+    router_address, _ = nre.get_deployment("mammoth_router")
+    router_address = int(router_address, 16)
+
+    def resolve(token):
+        if isinstance(token, int) or str(token).startswith("0x"):
+            return _to_int(token)
+        address, _ = nre.get_deployment(token)
+        return int(address, 16)
+
+    deployment_info = {}
+    for pool in spec["pools"]:
+        pool_type = pool_type_felt(spec, pool)
+        if pool_type not in deployment_info:
+            output = call_or_invoke(
+                # nile looks the contract up in its deployments by alias or address
+                contract="mammoth_router", type="call", method="get_deployment_info",
+                params=[str(pool_type)], network=nre.network)
+            deployment_info[pool_type] = [_to_int(value) for value in str(output).split()]
+
+    addresses = pool_addresses(spec, router_address, user_address, deployment_info)
+    calldata = deploy_and_create_calldata(spec, user_address, user_address, resolve)
+
+    tx = send_multicall(user_account, [
+        *approve_calls(spec, addresses, resolve),
+        (router_address, "deploy_and_create_pools", calldata),
+    ])
+    print(tx)
+    print(wait_for_transaction(tx, nre.network))
+
+    for pool, address in zip(spec["pools"], addresses):
+        print(f"{pool['name']}: {hex(address)}")
@@ -6,7 +6,7 @@ parent = os.path.dirname(current)
 sys.path.append(parent)
 
 from starkware.starknet.public.abi import get_selector_from_name
-from scripts.script_utils import DECIMALS, MAX_FEE
+from scripts.script_utils import DECIMALS, MAX_FEE, wait_for_transaction
 from tests.oz_utils import str_to_felt
 
 
@@ -47,3 +47,4 @@ def run(nre):
                            calldata=create_pool_args, max_fee=MAX_FEE)
 
     print(tx)
+    print(wait_for_transaction(tx, nre.network))
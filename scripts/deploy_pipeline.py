@@ -0,0 +1,219 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+from tests.oz_utils import str_to_felt
+from scripts.script_utils import (
+    DECIMALS, get_nonce, get_tx_hash, send_multicall, wait_for_transaction, wait_for_deployment,
+    wait_for_declaration,
+)
+
+
+class Step:
+    """One declare, deploy or invoke of the pipeline
+
+    action is called as action(context, results) in a worker thread, where
+    results holds the outputs of every completed step by name. It must block
+    until its transaction is accepted and return something JSON serializable.
+    """
+
+    def __init__(self, name, action, depends_on=()):
+        self.name = name
+        self.action = action
+        self.depends_on = tuple(depends_on)
+
+
+class PipelineContext:
+    """What step actions share: the nile runtime, the account and its nonces"""
+
+    def __init__(self, nre, account):
+        self.nre = nre
+        self.account = account
+        self._nonce = None
+        # held from nonce allocation until the transaction is submitted so
+        # the sequencer receives an account's transactions in nonce order
+        self._submit_lock = threading.Lock()
+        # nile appends to its declarations and deployments files without locking
+        self._nile_lock = threading.Lock()
+
+    def send(self, calls):
+        """Submit a multicall with the next nonce and wait for it to be accepted"""
+        with self._submit_lock:
+            if self._nonce is None:
+                self._nonce = get_nonce(self.account)
+            tx = send_multicall(self.account, calls, nonce=self._nonce)
+            self._nonce += 1
+        wait_for_transaction(tx, self.nre.network)
+        return get_tx_hash(tx)
+
+    def declare(self, contract, alias):
+        """Declare a contract class and wait for it to be accepted, returns the class hash"""
+        with self._nile_lock:
+            class_hash = self.nre.declare(contract=contract, alias=alias)
+        wait_for_declaration(class_hash, self.nre.network)
+        return class_hash
+
+    def deploy(self, contract, arguments, alias):
+        """Deploy a contract and wait for it to have code, returns its address"""
+        with self._nile_lock:
+            address, _ = self.nre.deploy(contract=contract, arguments=arguments, alias=alias)
+        wait_for_deployment(address, self.nre.network)
+        return address
+
+
+def _ordered(steps):
+    """Steps sorted so every step comes after its dependencies"""
+    by_name = {step.name: step for step in steps}
+    ordered, done, visiting = [], set(), set()
+
+    def visit(step):
+        if step.name in done:
+            return
+        if step.name in visiting:
+            raise ValueError(f"dependency cycle through {step.name}")
+        visiting.add(step.name)
+        for dependency in step.depends_on:
+            if dependency not in by_name:
+                raise ValueError(f"{step.name} depends on unknown step {dependency}")
+            visit(by_name[dependency])
+        visiting.discard(step.name)
+        done.add(step.name)
+        ordered.append(step)
+
+    for step in steps:
+        visit(step)
+    return ordered
+
+
+def load_progress(progress_file):
+    if not os.path.exists(progress_file):
+        return {}
+    with open(progress_file) as file:
+        return json.load(file)
+
+
+def save_progress(progress_file, progress):
+    tmp_file = f"{progress_file}.tmp"
+    with open(tmp_file, "w") as file:
+        json.dump(progress, file, indent=2)
+    os.replace(tmp_file, progress_file)
+
+
+async def run_pipeline(steps, context, progress_file):
+    """Run steps as soon as their dependencies finish, skipping steps already completed
+
+    Every completed step is written to progress_file with its result and
+    latency, so a failed run resumes from where it stopped.
+    """
+    progress = load_progress(progress_file)
+    results = {name: entry["result"] for name, entry in progress.items()}
+    tasks = {}
+
+    async def run_step(step):
+        await asyncio.gather(*(tasks[dependency] for dependency in step.depends_on))
+        if step.name in progress:
+            print(f"{step.name}: already done")
+            return
+
+        start = time.monotonic()
+        result = await asyncio.to_thread(step.action, context, results)
+        latency = time.monotonic() - start
+
+        results[step.name] = result
+        progress[step.name] = {"result": result, "seconds": round(latency, 3)}
+        save_progress(progress_file, progress)
+        print(f"{step.name}: done in {latency:.1f}s")
+
+    for step in _ordered(steps):
+        tasks[step.name] = asyncio.ensure_future(run_step(step))
+
+    await asyncio.gather(*tasks.values())
+    return progress
+
+
+def report(progress):
+    width = max(len(name) for name in progress)
+    for name, entry in progress.items():
+        print(f"{name.ljust(width)}  {entry['seconds']:>8.1f}s  {entry['result']}")
+
+
+##########
+# STEPS
+##########
+
+
+def declare(contract, alias):
+    def action(context, results):
+        return context.declare(contract, alias)
+    return action
+
+
+def deploy(contract, alias, arguments):
+    def action(context, results):
+        return context.deploy(contract, arguments(context, results), alias)
+    return action
+
+
+def erc20_arguments(symbol):
+    def arguments(context, results):
+        return [
+            str(str_to_felt(symbol)),
+            str(str_to_felt(symbol)),
+            str(18),
+            str(5000000 * DECIMALS),
+            str(0),
+            context.account.address,
+            context.account.address,
+        ]
+    return arguments
+
+
+def setup_router(context, results):
+    router_address = results["deploy_router"]
+    return context.send([
+        (router_address, "initialize", [context.account.address]),
+        (router_address, "set_proxy_class_hash", [results["declare_proxy"]]),
+        (router_address, "define_pool_type_class_hash",
+         [str_to_felt("DEFAULTv0"), results["declare_pool"]]),
+        (router_address, "deploy_pool", [str_to_felt("DEFAULTv0"), context.account.address]),
+    ])
+
+
+def mammoth_steps():
+    return [
+        Step("declare_proxy", declare("Proxy", "Proxy_Class")),
+        Step("declare_pool", declare("mammoth_pool", "Pool_Class")),
+        Step("declare_router", declare("mammoth_router", "Router_Class")),
+        Step(
+            "deploy_router",
+            deploy(
+                "Proxy", "mammoth_router",
+                lambda context, results: [results["declare_router"], context.account.address]),
+            depends_on=["declare_router"],
+        ),
+        Step(
+            "setup_router", setup_router,
+            depends_on=["deploy_router", "declare_proxy", "declare_pool"],
+        ),
+        *[
+            Step(f"deploy_{symbol}", deploy("Non_owner_ERC20_mintable", symbol, erc20_arguments(symbol)))
+            for symbol in ["tZWBTC", "tUSDC", "tETH"]
+        ],
+    ]
+
+
+def run(nre):
+    owner_account = nre.get_or_deploy_account("BALLER")
+    context = PipelineContext(nre, owner_account)
+
+    progress = asyncio.run(run_pipeline(
+        mammoth_steps(), context, f"{nre.network}.pipeline.json"))
+
+    report(progress)
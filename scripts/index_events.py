@@ -0,0 +1,23 @@
+import os
+import sys
+
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+from mammoth.indexer import FEEDER_GATEWAYS, FeederGatewayClient, Indexer
+
+
+def run(nre):
+    # get router adddress
+    router_address, _ = nre.get_deployment("mammoth_router")
+
+    indexer = Indexer(
+        f"{nre.network}.events.db",
+        router_address,
+        FeederGatewayClient(FEEDER_GATEWAYS[nre.network]),
+    )
+
+    # catch up from the last indexed block to the latest accepted one
+    indexed = indexer.sync()
+    print(f"{indexed} router events indexed up to block {indexer.last_block()}")
@@ -1,16 +1,188 @@
+import json
+import re
+import subprocess
+import time
+
+from nile.core.call_or_invoke import call_or_invoke
+
 DECIMALS = 10 ** 18
 MAX_FEE = 10000000000000000
 
+LOCAL_GATEWAY = "http://127.0.0.1:5050"
+
+ACCEPTED_STATUSES = ("ACCEPTED_ON_L2", "ACCEPTED_ON_L1")
+REJECTED_STATUS = "REJECTED"
+
 
 def write_result_to_storage(result, file_name):
     with open(f"current_state_info/{file_name}.json", "w") as file:
         file.write(str(result))
 
 
-def get_transaction(tx):
+def network_args(network):
+    """starknet CLI flags for a nile network name"""
+    if network in ("goerli", "mainnet"):
+        return [f"--network alpha-{network}"]
+    return [f"--gateway_url {LOCAL_GATEWAY}", f"--feeder_gateway_url {LOCAL_GATEWAY}"]
+
+
+def get_transaction(tx, network=None):
     cmd_list = [
-        f"starknet get_transaction",
-        f"--hash",
+        "starknet get_transaction",
+        "--hash",
         f"{tx}",
+        *(network_args(network) if network else []),
+    ]
+    return " ".join(cmd_list)
+
+
+def get_tx_status(tx, network):
+    cmd_list = [
+        "starknet tx_status",
+        "--hash",
+        f"{tx}",
+        *network_args(network),
+    ]
+    return " ".join(cmd_list)
+
+
+def get_code(address, network):
+    cmd_list = [
+        "starknet get_code",
+        "--contract_address",
+        f"{address}",
+        *network_args(network),
     ]
     return " ".join(cmd_list)
+
+
+def get_class_by_hash(class_hash, network):
+    cmd_list = [
+        "starknet get_class_by_hash",
+        "--class_hash",
+        f"{class_hash}",
+        *network_args(network),
+    ]
+    return " ".join(cmd_list)
+
+
+def _to_int(value):
+    return int(value, 16) if isinstance(value, str) and value.startswith("0x") else int(value)
+
+
+def get_nonce(account):
+    """Current nonce of a nile account as stored in the account contract"""
+    nonce_output = call_or_invoke(
+        contract=account.address, type="call", method="get_nonce", params=[],
+        network=account.network)
+    return _to_int(str(nonce_output).split()[0])
+
+
+def send_multicall(account, calls, max_fee=MAX_FEE, nonce=None):
+    """Send (to, method, calldata) calls from a nile account in one __execute__ transaction
+
+    The calls run in order inside the transaction, so later calls see the
+    state written by earlier ones and they all revert together. Addresses
+    must be given as ints or hex strings, not deployment aliases. The
+    nonce is read from the account unless one is given.
+    """
+    if nonce is None:
+        nonce = get_nonce(account)
+
+    # nile's Signer parses every target address as a hex string
+    calls = [
+        [hex(_to_int(to)), method, [_to_int(x) for x in calldata]]
+        for to, method, calldata in calls
+    ]
+    (call_array, calldata, sig_r, sig_s) = account.signer.sign_transaction(
+        sender=account.address, calls=calls, nonce=nonce, max_fee=max_fee)
+
+    params = [str(len(call_array))]
+    params.extend(str(elem) for call in call_array for elem in call)
+    params.append(str(len(calldata)))
+    params.extend(str(elem) for elem in calldata)
+    params.append(str(nonce))
+
+    return call_or_invoke(
+        contract=account.address,
+        type="invoke",
+        method="__execute__",
+        params=params,
+        network=account.network,
+        signature=[str(sig_r), str(sig_s)],
+        max_fee=str(max_fee),
+    )
+
+
+def get_tx_hash(output):
+    """Transaction hash from the output of a nile send / invoke"""
+    match = re.search(r"[Tt]ransaction hash: (0x[0-9a-fA-F]+)", str(output))
+    if match is None:
+        raise ValueError(f"no transaction hash in: {output}")
+    return match.group(1)
+
+
+def _run_json(cmd):
+    result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    return json.loads(result.stdout)
+
+
+def _poll(check, description, timeout, interval, max_interval):
+    """Call check with exponential backoff until it returns something other than None"""
+    deadline = time.monotonic() + timeout
+    while True:
+        result = check()
+        if result is not None:
+            return result
+        if time.monotonic() + interval > deadline:
+            raise TimeoutError(f"{description} not done after {timeout}s")
+        time.sleep(interval)
+        interval = min(interval * 2, max_interval)
+
+
+def wait_for_transaction(tx, network, timeout=900, interval=1, max_interval=30):
+    """Poll the status of a transaction (hash or nile output) until it is accepted.
+
+    Returns the final status, raises RuntimeError if the transaction is
+    rejected and TimeoutError if it is still pending after timeout seconds.
+    """
+    tx_hash = tx if str(tx).startswith("0x") else get_tx_hash(tx)
+
+    def check():
+        status = _run_json(get_tx_status(tx_hash, network))
+        if status is None:
+            return None
+        if status["tx_status"] == REJECTED_STATUS:
+            raise RuntimeError(
+                f"transaction {tx_hash} rejected: {status.get('tx_failure_reason')}")
+        if status["tx_status"] in ACCEPTED_STATUSES:
+            return status["tx_status"]
+        return None
+
+    return _poll(check, f"transaction {tx_hash}", timeout, interval, max_interval)
+
+
+def wait_for_deployment(address, network, timeout=900, interval=1, max_interval=30):
+    """Poll until a deployed contract has code, nile deploy does not return its tx hash."""
+
+    def check():
+        code = _run_json(get_code(address, network))
+        if code is None or not code.get("bytecode"):
+            return None
+        return address
+
+    return _poll(check, f"deployment of {address}", timeout, interval, max_interval)
+
+
+def wait_for_declaration(class_hash, network, timeout=900, interval=1, max_interval=30):
+    """Poll until a declared class is known to the network, nile declare does not return its tx hash."""
+
+    def check():
+        contract_class = _run_json(get_class_by_hash(class_hash, network))
+        if contract_class is None:
+            return None
+        return class_hash
+
+    return _poll(check, f"declaration of {class_hash}", timeout, interval, max_interval)
@@ -1,14 +1,13 @@
 import os
 import sys
-import time
 
 current = os.path.dirname(os.path.realpath(__file__))
 parent = os.path.dirname(current)
 sys.path.append(parent)
 
-from tests.oz_utils import str_to_felt, to_uint, felt_to_str
+from tests.oz_utils import str_to_felt
 from scripts.script_utils import (
-    DECIMALS, MAX_FEE
+    DECIMALS, send_multicall, wait_for_transaction, wait_for_deployment
 )
 
 
@@ -43,6 +42,7 @@ def run(nre):
         router_class = nre.get_declaration("Router_Class")
 
     # deploy router
+    router_is_new = True
     try:
         router_address, router_abi = nre.deploy(
             contract="Proxy", arguments=[router_class, owner_account.address], alias="mammoth_router")
@@ -50,49 +50,30 @@ def run(nre):
         print("ROUTER DEPLOYED")
     except Exception as e:
         print(e)
+        router_is_new = False
         router_address, _ = nre.get_deployment("mammoth_router")
 
     # wait for transaction to get accepted
-     time.sleep(180)
-
-    # initialize router
-    try:
-         initialize_router = owner_account.send(to="mammoth_router", method="initialize", calldata=[
-                                               int(owner_account.address, 16)], max_fee = MAX_FEE)
+    wait_for_deployment(router_address, nre.network)
+
+    # initialize router, set proxy and pool class hash and deploy the pool in one
+    # transaction, the calls run in order so each sees the state of the previous one
+    setup_calls = [
+        (router_address, "set_proxy_class_hash", [proxy_class]),
+        (router_address, "define_pool_type_class_hash", [str_to_felt("DEFAULTv0"), pool_class]),
+        (router_address, "deploy_pool", [str_to_felt("DEFAULTv0"), owner_account.address]),
+    ]
+    if router_is_new:
+        setup_calls.insert(0, (router_address, "initialize", [owner_account.address]))
+
+    router_setup = send_multicall(owner_account, setup_calls)
+
+    print(router_setup)
+    wait_for_transaction(router_setup, nre.network)
+    if router_is_new:
         print("Router Initialized")
-    except Exception as e:
-        print(e)
-
-    # wait for transaction to get accepted
-     time.sleep(180)
-
-    # set proxy and pool class hash
-     success = owner_account.send(to="mammoth_router", method="set_proxy_class_hash", calldata=[
-        int(proxy_class, 16)], max_fee=MAX_FEE)
-
-     assert success == 1
-     print(success)
-     print("Proxy Hash Set Successfully")
-
-    success = owner_account.send(to="mammoth_router", method="define_pool_type_class_hash", calldata=[
-        str(str_to_felt("DEFAULTv0")), int(pool_class, 16)], max_fee=MAX_FEE)
-
-    # wait for transaction to get accepted
-     time.sleep(180)
-
-    # assert success == 1
-    print(success)
+    print("Proxy Hash Set Successfully")
     print("Pool Hash Set Successfully")
-
-    # wait for transactions to get accepted
-    time.sleep(180)
-
-    # deploy pool
-    pool_address = owner_account.send(to="mammoth_router", method="deploy_pool",
-                                      calldata=[str(str_to_felt("DEFAULTv0")), int(owner_account.address, 16)], max_fee=MAX_FEE)
-
-    print(pool_address)
-
     print("POOL DEPLOYED")
 
     # deploy 3 ERCs
@@ -125,11 +106,11 @@ def run(nre):
     ], "tETH"]
     list_of_erc = [erc_one_args, erc_two_args, erc_three_args]
 
-    list_of_erc_data = list()
     for erc in list_of_erc:
         try:
             erc_address, erc_abi = nre.deploy(
                 contract="Non_owner_ERC20_mintable", arguments=erc[0], alias=erc[1])
+            wait_for_deployment(erc_address, nre.network)
             print(f'{erc[1]} DEPLOYED')
         except Exception as e:
             print(e)
@@ -0,0 +1,142 @@
+"""Hypothesis strategies and error measures for fuzzing Balancer_Math.
+
+Every fuzzed function maps to a FuzzedFunction: a strategy drawing its
+argument tuple (in the Cairo argument order, DECIMALS fixed point ints)
+plus how to read that tuple for the error map: the pow exponent, the
+trade size relative to the balance it moves, the amount the result is
+scaled by and the balances it reads. Weights are in [0.02, 0.9], fees up to
+10% and trades up to half a balance, as for the mammoth.batch error bound.
+
+Balances go down to 10^-6 tokens and trades down to 10^-12 of a balance,
+past the point where the 9 decimal truncation of FixedPoint still keeps
+the error within that bound. measure() flags a case as bounded only when
+every balance is at least one token and the trade at least 10^-9 of it.
+"""
+
+import math
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Callable
+
+from hypothesis import strategies as st
+
+from mammoth import balancer_math, reference_math
+from mammoth.config import DECIMALS
+from mammoth.fixed_point import FixedPointError
+
+# 10^-6 to 10^12 tokens
+balances = st.builds(lambda m, e: m * 10 ** e, st.integers(1, 999), st.integers(10, 27))
+weights = st.integers(2 * 10 ** 16, 9 * 10 ** 17)
+fees = st.integers(0, 10 ** 17)
+# fraction of a balance, 10^-12 to 1/2, in DECIMALS
+fractions = st.builds(lambda m, e: m * 10 ** e, st.integers(1, 500), st.integers(4, 15))
+
+
+def _part(balance, fraction):
+    return max(1, balance * fraction // DECIMALS)
+
+
+@st.composite
+def swap_in_args(draw):
+    a_balance, b_balance = draw(balances), draw(balances)
+    amount = _part(a_balance, draw(fractions))
+    return (amount, a_balance, draw(weights), b_balance, draw(weights), draw(fees))
+
+
+@st.composite
+def swap_out_args(draw):
+    b_balance, a_balance = draw(balances), draw(balances)
+    amount = _part(b_balance, draw(fractions))
+    return (amount, b_balance, draw(weights), a_balance, draw(weights), draw(fees))
+
+
+@st.composite
+def join_args(draw, sized_by_supply):
+    a_balance, supply = draw(balances), draw(balances)
+    amount = _part(supply if sized_by_supply else a_balance, draw(fractions))
+    return (amount, a_balance, supply, draw(weights), DECIMALS, draw(fees))
+
+
+@st.composite
+def exit_args(draw, sized_by_supply):
+    a_balance, supply = draw(balances), draw(balances)
+    amount = _part(supply if sized_by_supply else a_balance, draw(fractions))
+    return (amount, a_balance, supply, draw(weights), DECIMALS, draw(fees), draw(fees))
+
+
+@st.composite
+def spot_price_args(draw):
+    return (draw(balances), draw(weights), draw(balances), draw(weights), draw(fees))
+
+
+@dataclass
+class FuzzedFunction:
+    args: st.SearchStrategy
+    exponent: Callable
+    size: Callable
+    scale: Callable
+    balances: Callable
+
+
+FUNCTIONS = {
+    "get_spot_price": FuzzedFunction(
+        spot_price_args(), lambda a: 1, lambda a: 1, lambda a: 0, lambda a: (a[0], a[2])),
+    "get_out_given_in": FuzzedFunction(
+        swap_in_args(), lambda a: a[2] / a[4], lambda a: a[0] / a[1], lambda a: a[3],
+        lambda a: (a[1], a[3])),
+    "get_in_given_out": FuzzedFunction(
+        swap_out_args(), lambda a: a[2] / a[4], lambda a: a[0] / a[1], lambda a: a[3],
+        lambda a: (a[1], a[3])),
+    "get_pool_minted_given_single_in": FuzzedFunction(
+        join_args(False), lambda a: a[3] / a[4], lambda a: a[0] / a[1], lambda a: a[2],
+        lambda a: (a[1], a[2])),
+    "get_single_in_given_pool_out": FuzzedFunction(
+        join_args(True), lambda a: a[4] / a[3], lambda a: a[0] / a[2], lambda a: a[1],
+        lambda a: (a[1], a[2])),
+    "get_single_out_given_pool_in": FuzzedFunction(
+        exit_args(True), lambda a: a[4] / a[3], lambda a: a[0] / a[2], lambda a: a[1],
+        lambda a: (a[1], a[2])),
+    "get_pool_in_given_single_out": FuzzedFunction(
+        exit_args(False), lambda a: a[3] / a[4], lambda a: a[0] / a[1], lambda a: a[2],
+        lambda a: (a[1], a[2])),
+}
+
+
+# the mammoth.batch error bound coefficient
+_BOUND = Decimal("1e-8")
+
+
+def on_chain_result(name, args):
+    """What the Cairo function returns, from the bit exact python port, None where it reverts."""
+    try:
+        return getattr(balancer_math, name)(*args)
+    except FixedPointError:
+        return None
+
+
+def measure(name, args, result):
+    """Errors of an on-chain result against the arbitrary precision reference."""
+    function = FUNCTIONS[name]
+    reference = getattr(reference_math, name)(*args)
+    error = abs(Decimal(result) - reference)
+    exponent = function.exponent(args)
+    size = function.size(args)
+    bound = (_BOUND * Decimal(max(1, exponent)) * (function.scale(args) + abs(reference))
+             + _BOUND * DECIMALS)
+    return {
+        "error": float(error),
+        "relative_error": float(error / max(abs(reference), 1)),
+        "bound_ratio": float(error / bound),
+        "exponent": exponent,
+        "size": size,
+        "bounded": min(function.balances(args)) >= DECIMALS and size >= 1e-9,
+    }
+
+
+def bucket(name, measured):
+    """Error map key: function, pow exponent range and order of magnitude of the trade size."""
+    edges = [0.02, 0.1, 0.5, 1, 2, 10, 50]
+    index = sum(measured["exponent"] >= edge for edge in edges[1:-1])
+    size = math.floor(math.log10(measured["size"])) if measured["size"] > 0 else -99
+    domain = "" if measured["bounded"] else " unbounded"
+    return f"{name} exponent {edges[index]}-{edges[index + 1]} size 1e{size}{domain}"
@@ -3,8 +3,9 @@ import asyncio
 import pytest
 
 from starkware.starknet.testing.starknet import Starknet
+from starkware.starknet.testing.contract import StarknetContract
 from .oz_signers import MockSigner
-from .oz_utils import str_to_felt, to_uint
+from .oz_utils import str_to_felt, to_uint, get_contract_class, cached_contract
 
 DECIMALS = 10 ** 18
 
@@ -37,151 +38,221 @@ BALANCER_CONTRACT = os.path.join(
 )
 
 
-@pytest.fixture(scope="module")
+# the deployed state is built once per session (once per worker under pytest-xdist)
+@pytest.fixture(scope="session")
 def event_loop():
     return asyncio.new_event_loop()
 
 
-# contract and object factories
-@pytest.fixture(scope="module")
-async def starknet_factory():
-    starknet = await Starknet.empty()
-    return starknet
+@pytest.fixture(scope="session")
+def contract_classes():
+    return {
+        "account": get_contract_class(ACCOUNT_CONTRACT),
+        "proxy": get_contract_class(PROXY_CONTRACT),
+        "pool": get_contract_class(POOL_CONTRACT),
+        "router": get_contract_class(ROUTER_CONTRACT),
+        "erc20": get_contract_class(ERC20_CONTRACT),
+        "balancer": get_contract_class(BALANCER_CONTRACT),
+    }
 
 
-@pytest.fixture(scope="module")
-async def signer_factory():
-    signer = MockSigner(12345)
-    return signer
+async def deploy_erc20(starknet, erc20_class, name, symbol, user):
+    return await starknet.deploy(
+        contract_class=erc20_class,
+        constructor_calldata=[
+            str_to_felt(name),
+            str_to_felt(symbol),
+            18,
+            *to_uint(900000 * DECIMALS),
+            user,
+            user,
+        ],
+    )
 
 
-@pytest.fixture(scope="module")
-async def account_factory(starknet_factory, signer_factory):
-    starknet = starknet_factory
-    signer = signer_factory
+@pytest.fixture(scope="session")
+async def deployed_state(contract_classes):
+    """Router, a created three token pool and its ERC20s on one Starknet, built once."""
+    starknet = await Starknet.empty()
+    signer = MockSigner(12345)
 
     # Deploy the account contract
     user_account = await starknet.deploy(
-        source=ACCOUNT_CONTRACT, constructor_calldata=[signer.public_key]
+        contract_class=contract_classes["account"], constructor_calldata=[signer.public_key]
     )
+    user = user_account.contract_address
 
-    return user_account, user_account.contract_address
-
-
-@pytest.fixture(scope="module")
-async def class_hash_factory(starknet_factory, signer_factory):
-    starknet = starknet_factory
-    signer = signer_factory
-
-    # Declare the proxy contract
-    proxy = await starknet.declare(source=PROXY_CONTRACT)
-    proxy_hash = proxy.class_hash
-
-    pool = await starknet.declare(source=POOL_CONTRACT)
-    pool_hash = pool.class_hash
-    pool_abi = pool.abi
+    # Declare the proxy, pool and router classes
+    proxy = await starknet.declare(contract_class=contract_classes["proxy"])
+    pool = await starknet.declare(contract_class=contract_classes["pool"])
+    router = await starknet.declare(contract_class=contract_classes["router"])
 
-    router = await starknet.declare(source=ROUTER_CONTRACT)
-    router_hash = router.class_hash
-
-    return proxy_hash, pool_hash, router_hash, pool_abi
-
-
-@pytest.fixture(scope="module")
-async def router_factory(starknet_factory, signer_factory, account_factory, class_hash_factory):
-    starknet = starknet_factory
-    signer = signer_factory
-    _, _, router_hash, _ = class_hash_factory
-    user_account, user = account_factory
-
-    # deploy router
+    # deploy and initialize router
     router_contract = await starknet.deploy(
-        source=PROXY_CONTRACT,
-        constructor_calldata=[router_hash, user],
+        contract_class=contract_classes["proxy"],
+        constructor_calldata=[router.class_hash, user],
     )
+    router_address = router_contract.contract_address
 
-    # initialize router
     await signer.send_transaction(
         account=user_account,
-        to=router_contract.contract_address,
+        to=router_address,
         selector_name="initialize",
         calldata=[user],
     )
 
-    return router_contract, router_contract.contract_address
-
-# will be assigned in test deploy pool
-
-
-@pytest.fixture(scope="module")
-async def pool_factory():
-    return {}
-
+    await signer.send_transaction(
+        account=user_account,
+        to=router_address,
+        selector_name="set_proxy_class_hash",
+        calldata=[proxy.class_hash],
+    )
 
-@pytest.fixture(scope="module")
-async def tusdc_factory(starknet_factory, account_factory):
-    starknet = starknet_factory
-    _, user = account_factory
+    await signer.send_transaction(
+        account=user_account,
+        to=router_address,
+        selector_name="define_pool_type_class_hash",
+        calldata=[str_to_felt("DEFAULTv0"), pool.class_hash],
+    )
 
-    tusdc = await starknet.deploy(
-        ERC20_CONTRACT,
-        constructor_calldata=[
-            str_to_felt("testUSDC"),
-            str_to_felt("TUSDC"),
-            18,
-            *to_uint(900000 * DECIMALS),
+    deploy_pool_return = await signer.send_transaction(
+        account=user_account,
+        to=router_address,
+        selector_name="deploy_pool",
+        calldata=[str_to_felt("DEFAULTv0"), user],
+    )
+    pool_address = deploy_pool_return.result.response[0]
+
+    tusdc = await deploy_erc20(starknet, contract_classes["erc20"], "testUSDC", "TUSDC", user)
+    fc = await deploy_erc20(starknet, contract_classes["erc20"], "FantieCoin", "FC", user)
+    teeth = await deploy_erc20(starknet, contract_classes["erc20"], "testETH", "TEETH", user)
+
+    # approve ERC20s to be deposited to POOL
+    for erc in (tusdc, fc, teeth):
+        await signer.send_transaction(
+            account=user_account,
+            to=erc.contract_address,
+            selector_name="approve",
+            calldata=[pool_address, *to_uint(800000 * DECIMALS)],
+        )
+
+    # weights of 1/3 with 3000 TUSDC, 20 FC and 35 TEETH of initial liquidity
+    await signer.send_transaction(
+        account=user_account,
+        to=router_address,
+        selector_name="create_pool",
+        calldata=[
+            pool_address,
+            str_to_felt("MAMMOTH_LP"),  # name
+            str_to_felt("MLP"),  # symbol
+            18,  # decimals
             user,
-            user
+            *to_uint(2 * 10 ** 16),  # swap fee
+            *to_uint(2 * 10 ** 16),  # exit fee
+            3,
+            tusdc.contract_address, *to_uint(333333333333333333), *to_uint(3000 * DECIMALS),
+            fc.contract_address, *to_uint(333333333333333333), *to_uint(20 * DECIMALS),
+            teeth.contract_address, *to_uint(333333333333333334), *to_uint(35 * DECIMALS),
         ],
     )
 
-    return tusdc, tusdc.contract_address
+    balancer = await starknet.deploy(contract_class=contract_classes["balancer"])
+
+    return {
+        "starknet": starknet,
+        "signer": signer,
+        "hashes": (proxy.class_hash, pool.class_hash, router.class_hash),
+        "account": user_account,
+        "router": router_contract,
+        "pool": (pool_address, deploy_pool_return),
+        "tusdc": tusdc,
+        "fc": fc,
+        "teeth": teeth,
+        "balancer": balancer,
+    }
+
+
+@pytest.fixture
+def fork_factory(contract_classes, deployed_state):
+    """A private copy of the deployed state for one test."""
+    state = deployed_state["starknet"].state.copy()
+    pool_address, deploy_pool_return = deployed_state["pool"]
+
+    def fork(name, class_name):
+        return cached_contract(state, contract_classes[class_name], deployed_state[name])
+
+    return {
+        "starknet": Starknet(state=state),
+        "signer": deployed_state["signer"],
+        "hashes": deployed_state["hashes"],
+        "account": fork("account", "account"),
+        "router": fork("router", "proxy"),
+        "pool": StarknetContract(
+            state, contract_classes["pool"].abi, pool_address, deploy_pool_return),
+        "tusdc": fork("tusdc", "erc20"),
+        "fc": fork("fc", "erc20"),
+        "teeth": fork("teeth", "erc20"),
+        "balancer": fork("balancer", "balancer"),
+    }
+
+
+# contract and object factories, all views on the current test's fork
+@pytest.fixture
+def starknet_factory(fork_factory):
+    return fork_factory["starknet"]
+
+
+@pytest.fixture
+def signer_factory(fork_factory):
+    return fork_factory["signer"]
+
+
+@pytest.fixture
+def account_factory(fork_factory):
+    user_account = fork_factory["account"]
+    return user_account, user_account.contract_address
 
 
-@pytest.fixture(scope="module")
-async def fc_factory(starknet_factory, account_factory):
-    starknet = starknet_factory
-    _, user = account_factory
+@pytest.fixture
+def class_hash_factory(fork_factory, contract_classes):
+    proxy_hash, pool_hash, router_hash = fork_factory["hashes"]
+    return proxy_hash, pool_hash, router_hash, contract_classes["pool"].abi
 
-    fc = await starknet.deploy(
-        ERC20_CONTRACT,
-        constructor_calldata=[
-            str_to_felt("FantieCoin"),
-            str_to_felt("FC"),
-            18,
-            *to_uint(900000 * DECIMALS),
-            user,
-            user
-        ],
-    )
 
-    return fc, fc.contract_address
+@pytest.fixture
+def router_factory(fork_factory):
+    router_contract = fork_factory["router"]
+    return router_contract, router_contract.contract_address
 
 
-@pytest.fixture(scope="module")
-async def teeth_factory(starknet_factory, account_factory):
-    starknet = starknet_factory
-    _, user = account_factory
+@pytest.fixture
+def pool_factory(fork_factory):
+    pool_contract = fork_factory["pool"]
+    return {
+        "pool_address": pool_contract.contract_address,
+        "pool_contract": pool_contract,
+    }
 
-    teeth = await starknet.deploy(
-        ERC20_CONTRACT,
-        constructor_calldata=[
-            str_to_felt("testETH"),
-            str_to_felt("TEETH"),
-            18,
-            *to_uint(900000 * DECIMALS),
-            user,
-            user,
-        ],
-    )
 
-    return teeth, teeth.contract_address
+@pytest.fixture
+def tusdc_factory(fork_factory):
+    tusdc = fork_factory["tusdc"]
+    return tusdc, tusdc.contract_address
 
 
-@pytest.fixture(scope="module")
-async def balancer_factory(starknet_factory):
-    starknet = starknet_factory
+@pytest.fixture
+def fc_factory(fork_factory):
+    fc = fork_factory["fc"]
+    return fc, fc.contract_address
+
+
+@pytest.fixture
+def teeth_factory(fork_factory):
+    teeth = fork_factory["teeth"]
+    return teeth, teeth.contract_address
 
-    balancer_contract = await starknet.deploy(source=BALANCER_CONTRACT)
 
+@pytest.fixture
+def balancer_factory(fork_factory):
+    balancer_contract = fork_factory["balancer"]
     return balancer_contract, balancer_contract.contract_address
@@ -1,12 +1,18 @@
 """Utilities for testing Cairo contracts."""
 
 from pathlib import Path
+import hashlib
 import math
+import os
+import re
+import sys
+from importlib.metadata import version
 from starkware.starknet.public.abi import get_selector_from_name
 from starkware.starknet.compiler.compile import compile_starknet_files
 from starkware.starkware_utils.error_handling import StarkException
 from starkware.starknet.testing.starknet import StarknetContract
 from starkware.starknet.business_logic.execution.objects import Event
+from starkware.starknet.services.api.contract_class import ContractClass
 
 
 MAX_UINT256 = (2**128 - 1, 2**128 - 1)
@@ -20,6 +26,12 @@ TRANSACTION_VERSION = 0
 
 _root = Path(__file__).parent.parent
 
+# compiled classes are stored here keyed on the hash of every imported .cairo file
+CONTRACT_CACHE_DIR = Path(
+    os.environ.get("MAMMOTH_CONTRACT_CACHE", _root / ".contract_cache"))
+
+_IMPORT_RE = re.compile(r"^from\s+([\w.]+)\s+import", re.MULTILINE)
+
 
 def contract_path(name):
     if name.startswith("tests/"):
@@ -111,13 +123,64 @@ def assert_event_emitted(tx_exec_info, from_address, name, data):
     ) in tx_exec_info.raw_events
 
 
+def _module_file(module):
+    """Resolve a cairo import to a file the way the default cairo path does."""
+    relative = Path(*module.split(".")).with_suffix(".cairo")
+    for search_root in [_root, Path.cwd(), *map(Path, sys.path)]:
+        candidate = search_root / relative
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def _import_closure(path):
+    """The contract file and every .cairo file it imports, transitively."""
+    seen = {}
+    stack = [Path(path).resolve()]
+    while stack:
+        current = stack.pop()
+        if current in seen:
+            continue
+        source = current.read_bytes()
+        seen[current] = source
+        for module in _IMPORT_RE.findall(source.decode()):
+            # starkware.* ships with the compiler and is covered by its version
+            if module.startswith("starkware."):
+                continue
+            module_file = _module_file(module)
+            if module_file is not None:
+                stack.append(module_file.resolve())
+    return seen
+
+
+def contract_cache_key(path):
+    """Hash of the compiler version and the sources of every imported .cairo file."""
+    digest = hashlib.sha256(version("cairo-lang").encode())
+    # sorted by content so the key does not depend on where the repo is checked out
+    for source_hash in sorted(hashlib.sha256(source).digest() for source in _import_closure(path).values()):
+        digest.update(source_hash)
+    return digest.hexdigest()
+
+
 def get_contract_class(path):
-    """Return the contract class from the contract path"""
+    """Return the contract class from the contract path, compiling only on a cache miss"""
     path = contract_path(path)
+    cache_file = CONTRACT_CACHE_DIR / f"{Path(path).stem}-{contract_cache_key(path)}.json"
+
+    if cache_file.is_file():
+        return ContractClass.loads(cache_file.read_text())
+
     contract_class = compile_starknet_files(
         files=[path],
         debug_info=True
     )
+
+    CONTRACT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    # write then rename so parallel sessions never read a partial file
+    tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+    tmp_file.write_text(contract_class.dumps())
+    tmp_file.replace(cache_file)
+
     return contract_class
 
 
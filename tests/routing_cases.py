@@ -0,0 +1,22 @@
+"""Random pool snapshots for the routing tests and benchmarks/bench_routing.py."""
+
+import random
+
+from mammoth.config import DECIMALS
+from mammoth.routing import Pool
+
+SWAP_FEE = 2 * 10 ** 16
+
+
+def random_pools(n_pools, n_tokens, seed=0):
+    """n_pools pools of 2 to 4 of tokens 1..n_tokens, with random balances and weights"""
+    rng = random.Random(seed)
+    pools = []
+    for address in range(100, 100 + n_pools):
+        tokens = rng.sample(range(1, n_tokens + 1), rng.randint(2, 4))
+        weights = [rng.randint(1, 9) for _ in tokens]
+        pools.append(Pool(address, SWAP_FEE, {
+            erc: (rng.randint(1000, 100000) * DECIMALS, weight * DECIMALS // sum(weights))
+            for erc, weight in zip(tokens, weights)
+        }))
+    return pools
@@ -0,0 +1,130 @@
+import random
+import time
+
+import numpy as np
+import pytest
+
+from mammoth import balancer_math
+from mammoth.backtest import (
+    SWAP, DEPOSIT_SINGLE, DEPOSIT_PROPORTIONAL, WITHDRAW_SINGLE, WITHDRAW_PROPORTIONAL,
+    SWAP_EXACT_OUT, Backtest, Events, PoolConfig, read_csv,
+)
+from mammoth.config import DECIMALS
+
+USDC, ETH, FC = "USDC", "ETH", "FC"
+
+
+def config(swap_fee=2 * 10 ** 16, exit_fee=0, weights=(5 * 10 ** 17, 5 * 10 ** 17)):
+    return PoolConfig(swap_fee, exit_fee, {
+        USDC: (1000 * DECIMALS, weights[0]),
+        ETH: (1000 * DECIMALS, weights[1]),
+    })
+
+
+def random_events(n, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        kind = rng.choice([SWAP, SWAP, SWAP, DEPOSIT_SINGLE, DEPOSIT_PROPORTIONAL,
+                           WITHDRAW_SINGLE, WITHDRAW_PROPORTIONAL])
+        i = rng.randrange(2)
+        if kind in (SWAP, DEPOSIT_SINGLE):
+            rows.append((kind, i, 1 - i, rng.uniform(0.1, 20)))
+        else:
+            rows.append((kind, i, 0, rng.uniform(0.0001, 0.01)))
+    return Events.from_rows(rows)
+
+
+def test_swaps_match_exact_math():
+    swaps = [(SWAP, 0, 1, 10.0), (SWAP, 1, 0, 3.0), (SWAP, 0, 1, 50.0)]
+    backtest = Backtest([config(weights=(3 * 10 ** 17, 7 * 10 ** 17))])
+    result = backtest.run(Events.from_rows(swaps))
+
+    balances = [1000 * DECIMALS, 1000 * DECIMALS]
+    weights = [3 * 10 ** 17, 7 * 10 ** 17]
+    for _, i, j, amount in swaps:
+        amount_in = int(amount * DECIMALS)
+        out = balancer_math.get_out_given_in(
+            amount_in, balances[i], weights[i], balances[j], weights[j], 2 * 10 ** 16)
+        balances[i] += amount_in
+        balances[j] -= out
+
+    # within the mammoth.batch error bound
+    np.testing.assert_allclose(
+        result.balances[0] * DECIMALS, [float(b) for b in balances], rtol=1e-8)
+
+
+def test_exact_out_swaps_match_exact_math():
+    swaps = [(SWAP_EXACT_OUT, 0, 1, 10.0), (SWAP_EXACT_OUT, 1, 0, 3.0)]
+    backtest = Backtest([config(weights=(3 * 10 ** 17, 7 * 10 ** 17))])
+    result = backtest.run(Events.from_rows(swaps + [(SWAP_EXACT_OUT, 0, 1, 5000.0)]))
+
+    balances = [1000 * DECIMALS, 1000 * DECIMALS]
+    weights = [3 * 10 ** 17, 7 * 10 ** 17]
+    for _, i, j, amount in swaps:
+        amount_out = int(amount * DECIMALS)
+        amount_in = balancer_math.get_in_given_out(
+            amount_out, balances[j], weights[j], balances[i], weights[i], 2 * 10 ** 16)
+        balances[i] += amount_in
+        balances[j] -= amount_out
+
+    np.testing.assert_allclose(
+        result.balances[0] * DECIMALS, [float(b) for b in balances], rtol=1e-8)
+    # more than the pool holds
+    assert result.reverted[0] == 1
+
+
+def test_fee_less_lp_loses_exactly_the_impermanent_loss():
+    backtest = Backtest([config(swap_fee=0), config(swap_fee=3 * 10 ** 16)])
+    result = backtest.run(Events.from_rows([(SWAP, 0, 1, 300.0), (SWAP, 1, 0, 20.0)]))
+
+    fee_less, with_fee = result.summary()
+    assert fee_less["fee_income"] == 0
+    assert fee_less["impermanent_loss"] < 0
+    assert fee_less["lp_value"] / fee_less["hold_value"] - 1 == pytest.approx(
+        fee_less["impermanent_loss"], abs=1e-12)
+    assert with_fee["fee_income"] > 0
+    assert with_fee["lp_value"] / with_fee["hold_value"] - 1 > with_fee["impermanent_loss"]
+
+
+def test_reverting_events_are_skipped_per_candidate():
+    backtest = Backtest([config(), config(weights=(9 * 10 ** 17, 10 ** 17))])
+    # the swap takes the pow base below 0.01 in both pools, the deposit only takes it
+    # above 1.9 in the second one, where the heavier weight charges it a smaller fee
+    result = backtest.run(Events.from_rows([
+        (SWAP, 0, 1, 200000.0),
+        (DEPOSIT_SINGLE, 0, 0, 905.0),
+    ]))
+
+    assert result.reverted.tolist() == [1, 2]
+    assert result.balances[1].tolist() == [1000.0, 1000.0]
+
+
+def test_read_csv(tmp_path):
+    path = tmp_path / "flow.csv"
+    path.write_text(
+        "kind,token_in,token_out,amount\n"
+        "swap,USDC,ETH,10\n"
+        "deposit_single,ETH,,5\n"
+        "withdraw_proportional,,,0.01\n"
+    )
+
+    events, = read_csv(path, [USDC, ETH])
+
+    assert events.kind.tolist() == [SWAP, DEPOSIT_SINGLE, WITHDRAW_PROPORTIONAL]
+    assert events.token_in.tolist() == [0, 1, 0]
+    assert events.token_out.tolist() == [1, 0, 0]
+    assert events.amount.tolist() == [10.0, 5.0, 0.01]
+
+
+def test_replay_throughput():
+    candidates = [config(swap_fee=fee * 10 ** 15) for fee in range(1, 9)]
+    events = random_events(100000)
+
+    start = time.perf_counter()
+    result = Backtest(candidates).run(events, sample_every=10000)
+    elapsed = time.perf_counter() - start
+
+    assert len(result.sampled_at) == 11
+    # at least a million events a minute for all eight candidates together
+    assert elapsed < 6
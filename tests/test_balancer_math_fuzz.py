@@ -0,0 +1,35 @@
+import os
+
+import pytest
+from hypothesis import HealthCheck, given, settings, strategies as st
+
+from .balancer_cases import FUNCTIONS, measure, on_chain_result
+from .oz_utils import to_uint, from_uint
+
+# views only, so the function scoped fork can be shared by every example;
+# raise MAMMOTH_FUZZ_EXAMPLES for a longer run, or use benchmarks.fuzz_balancer_math
+FUZZ_SETTINGS = settings(
+    max_examples=int(os.environ.get("MAMMOTH_FUZZ_EXAMPLES", 50)),
+    deadline=None,
+    suppress_health_check=[HealthCheck.function_scoped_fixture, HealthCheck.too_slow],
+)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", sorted(FUNCTIONS))
+@FUZZ_SETTINGS
+@given(data=st.data())
+async def test_fuzz_balancer_math(balancer_factory, name, data):
+    balancer_contract, _ = balancer_factory
+    args = data.draw(FUNCTIONS[name].args, label="args")
+    expected = on_chain_result(name, args)
+    if expected is None:
+        return
+
+    on_chain = await getattr(balancer_contract, name)(*map(to_uint, args)).call()
+    result = from_uint(on_chain.result[0])
+
+    assert result == expected
+    measured = measure(name, args, result)
+    if measured["bounded"]:
+        assert measured["bound_ratio"] <= 1, measured
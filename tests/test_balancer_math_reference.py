@@ -0,0 +1,155 @@
+import pytest
+from .conftest import DECIMALS
+from .oz_utils import to_uint, from_uint
+
+from mammoth import balancer_math, fixed_point
+
+# every case is evaluated on the Cairo contract and the python reference
+# and the results must match exactly
+
+SWAP_CASES = [
+    (100 * DECIMALS, 2324 * DECIMALS, 333333333300000000,
+     1234 * DECIMALS, 333333333300000000, 10 ** 16),
+    (1 * DECIMALS, 3000 * DECIMALS, 333333333333333334,
+     20 * DECIMALS, 333333333333333334, 2 * 10 ** 16),
+    (7 * DECIMALS, 3000 * DECIMALS, 200000000000000000,
+     20 * DECIMALS, 800000000000000000, 3 * 10 ** 15),
+]
+
+JOIN_CASES = [
+    (100 * DECIMALS, 45789 * DECIMALS, 100000 * DECIMALS,
+     333333333300000000, DECIMALS, 10 ** 16),
+    (1 * DECIMALS, 3000 * DECIMALS, 3000 * DECIMALS,
+     333333333333333334, DECIMALS, 2 * 10 ** 16),
+]
+
+EXIT_CASES = [
+    (1000 * DECIMALS, 5324 * DECIMALS, 1234567 * DECIMALS,
+     333333333300000000, DECIMALS, 10 ** 16, 10 ** 16),
+    (1 * DECIMALS, 3000 * DECIMALS, 3000 * DECIMALS,
+     333333333333333334, DECIMALS, 2 * 10 ** 16, 2 * 10 ** 16),
+]
+
+
+@pytest.mark.asyncio
+async def test_reference_get_spot_price(balancer_factory):
+    balancer_contract, _ = balancer_factory
+    args = (10 * DECIMALS, 5 * 10 ** 17, 4 * DECIMALS, 333333333300000000, 10 ** 16)
+
+    on_chain = await balancer_contract.get_spot_price(*map(to_uint, args)).call()
+    assert from_uint(on_chain.result[0]) == balancer_math.get_spot_price(*args)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("args", SWAP_CASES)
+async def test_reference_get_out_given_in(balancer_factory, args):
+    balancer_contract, _ = balancer_factory
+
+    on_chain = await balancer_contract.get_out_given_in(*map(to_uint, args)).call()
+    assert from_uint(on_chain.result[0]) == balancer_math.get_out_given_in(*args)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("args", SWAP_CASES)
+async def test_reference_get_in_given_out(balancer_factory, args):
+    balancer_contract, _ = balancer_factory
+    amount, a_balance, a_weight, b_balance, b_weight, fee = args
+    args = (amount // 2, b_balance, b_weight, a_balance, a_weight, fee)
+
+    on_chain = await balancer_contract.get_in_given_out(*map(to_uint, args)).call()
+    assert from_uint(on_chain.result[0]) == balancer_math.get_in_given_out(*args)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("args", JOIN_CASES)
+async def test_reference_get_pool_minted_given_single_in(balancer_factory, args):
+    balancer_contract, _ = balancer_factory
+
+    on_chain = await balancer_contract.get_pool_minted_given_single_in(
+        *map(to_uint, args)).call()
+    assert from_uint(on_chain.result[0]) == balancer_math.get_pool_minted_given_single_in(*args)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("args", JOIN_CASES)
+async def test_reference_get_single_in_given_pool_out(balancer_factory, args):
+    balancer_contract, _ = balancer_factory
+
+    on_chain = await balancer_contract.get_single_in_given_pool_out(
+        *map(to_uint, args)).call()
+    assert from_uint(on_chain.result[0]) == balancer_math.get_single_in_given_pool_out(*args)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("args", EXIT_CASES)
+async def test_reference_get_single_out_given_pool_in(balancer_factory, args):
+    balancer_contract, _ = balancer_factory
+
+    on_chain = await balancer_contract.get_single_out_given_pool_in(
+        *map(to_uint, args)).call()
+    assert from_uint(on_chain.result[0]) == balancer_math.get_single_out_given_pool_in(*args)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("args", EXIT_CASES)
+async def test_reference_get_pool_in_given_single_out(balancer_factory, args):
+    balancer_contract, _ = balancer_factory
+    args = (args[0] // 100, *args[1:])
+
+    on_chain = await balancer_contract.get_pool_in_given_single_out(
+        *map(to_uint, args)).call()
+    assert from_uint(on_chain.result[0]) == balancer_math.get_pool_in_given_single_out(*args)
+
+
+@pytest.mark.asyncio
+async def test_reference_proportional(balancer_factory):
+    balancer_contract, _ = balancer_factory
+    token_list = [(1, 200 * DECIMALS), (2, 1111 * DECIMALS), (3, 7777 * DECIMALS)]
+    token_list_input = [(erc, to_uint(amount)) for erc, amount in token_list]
+
+    deposits = await balancer_contract.get_proportional_deposits_given_pool_out(
+        to_uint(578347 * DECIMALS), to_uint(10000 * DECIMALS), token_list_input).call()
+    expected = balancer_math.get_proportional_deposits_given_pool_out(
+        578347 * DECIMALS, 10000 * DECIMALS, token_list)
+    assert [(erc, from_uint(amount)) for erc, amount in deposits.result[0]] == expected
+
+    withdrawals = await balancer_contract.get_proportional_withdraw_given_pool_in(
+        to_uint(578347 * DECIMALS), to_uint(10000 * DECIMALS), to_uint(10 ** 15),
+        token_list_input).call()
+    expected = balancer_math.get_proportional_withdraw_given_pool_in(
+        578347 * DECIMALS, 10000 * DECIMALS, 10 ** 15, token_list)
+    assert [(erc, from_uint(amount)) for erc, amount in withdrawals.result[0]] == expected
+
+
+def test_reference_bounded_pow_rejects_out_of_bound_base():
+    with pytest.raises(fixed_point.FixedPointError):
+        fixed_point.bounded_pow(2 * DECIMALS, DECIMALS // 2)
+
+    with pytest.raises(fixed_point.FixedPointError):
+        fixed_point.bounded_pow(10 ** 15, DECIMALS // 2)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("args", SWAP_CASES)
+async def test_reference_with_exponent(balancer_factory, args):
+    balancer_contract, _ = balancer_factory
+    amount, a_balance, a_weight, b_balance, b_weight, fee = args
+    weight_ratio = fixed_point.div(a_weight, b_weight)
+    exponent = balancer_math.split_exponent(weight_ratio)
+
+    split = await balancer_contract.split_exponent(to_uint(weight_ratio)).call()
+    assert tuple(map(from_uint, split.result[0])) == exponent
+
+    on_chain = await balancer_contract.get_out_given_in_with_exponent(
+        to_uint(amount), to_uint(a_balance), to_uint(b_balance), tuple(map(to_uint, exponent)),
+        to_uint(fee)).call()
+    assert from_uint(on_chain.result[0]) == balancer_math.get_out_given_in(*args)
+
+
+@pytest.mark.parametrize("exponent", [
+    DECIMALS // 3, DECIMALS, 3 * DECIMALS, 4 * DECIMALS + 1, 5 * DECIMALS // 2, 10 ** 18 // 7])
+def test_reference_bounded_pow_with_exponent(exponent):
+    split = balancer_math.split_exponent(exponent)
+    for base in (10 ** 17, 5 * 10 ** 17, DECIMALS, 1234567 * 10 ** 12, 19 * 10 ** 17):
+        assert balancer_math.bounded_pow_with_exponent(base, split) == fixed_point.bounded_pow(
+            base, exponent)
@@ -0,0 +1,84 @@
+import numpy as np
+
+from mammoth import balancer_math, batch
+from mammoth.config import DECIMALS
+
+AMOUNTS = [10 ** 15, 10 ** 17, 1 * DECIMALS, 7 * DECIMALS, 500 * DECIMALS]
+
+A_BALANCE = 3000 * DECIMALS
+B_BALANCE = 20 * DECIMALS
+SUPPLY = 3000 * DECIMALS
+A_WEIGHT = 333333333333333333
+B_WEIGHT = 333333333333333334
+SWAP_FEE = 2 * 10 ** 16
+EXIT_FEE = 2 * 10 ** 16
+
+
+def assert_within_bound(result, expected, balance, exponent):
+    bound = 1e-8 * max(1, exponent) * (balance + abs(expected)) + 1e-8 * DECIMALS
+    assert abs(result - expected) <= bound
+
+
+def test_batch_get_out_given_in():
+    result = batch.get_out_given_in(
+        AMOUNTS, A_BALANCE, A_WEIGHT, B_BALANCE, B_WEIGHT, SWAP_FEE)
+
+    assert result.shape == (len(AMOUNTS),)
+    for amount, out in zip(AMOUNTS, result):
+        expected = balancer_math.get_out_given_in(
+            amount, A_BALANCE, A_WEIGHT, B_BALANCE, B_WEIGHT, SWAP_FEE)
+        assert_within_bound(out, expected, B_BALANCE, A_WEIGHT / B_WEIGHT)
+
+
+def test_batch_get_in_given_out():
+    amounts = [a // 100 for a in AMOUNTS[:-1]]
+    result = batch.get_in_given_out(
+        amounts, B_BALANCE, B_WEIGHT, A_BALANCE, A_WEIGHT, SWAP_FEE)
+
+    for amount, amount_in in zip(amounts, result):
+        expected = balancer_math.get_in_given_out(
+            amount, B_BALANCE, B_WEIGHT, A_BALANCE, A_WEIGHT, SWAP_FEE)
+        assert_within_bound(amount_in, expected, A_BALANCE, B_WEIGHT / A_WEIGHT)
+
+
+def test_batch_single_asset_joins_and_exits():
+    amounts = AMOUNTS[:-1]
+
+    minted = batch.get_pool_minted_given_single_in(
+        amounts, A_BALANCE, SUPPLY, A_WEIGHT, DECIMALS, SWAP_FEE)
+    single_in = batch.get_single_in_given_pool_out(
+        amounts, A_BALANCE, SUPPLY, A_WEIGHT, DECIMALS, SWAP_FEE)
+    single_out = batch.get_single_out_given_pool_in(
+        amounts, A_BALANCE, SUPPLY, A_WEIGHT, DECIMALS, SWAP_FEE, EXIT_FEE)
+    pool_in = batch.get_pool_in_given_single_out(
+        amounts, A_BALANCE, SUPPLY, A_WEIGHT, DECIMALS, SWAP_FEE, EXIT_FEE)
+
+    for i, amount in enumerate(amounts):
+        assert_within_bound(minted[i], balancer_math.get_pool_minted_given_single_in(
+            amount, A_BALANCE, SUPPLY, A_WEIGHT, DECIMALS, SWAP_FEE), SUPPLY, 1)
+        assert_within_bound(single_in[i], balancer_math.get_single_in_given_pool_out(
+            amount, A_BALANCE, SUPPLY, A_WEIGHT, DECIMALS, SWAP_FEE), A_BALANCE, 3)
+        assert_within_bound(single_out[i], balancer_math.get_single_out_given_pool_in(
+            amount, A_BALANCE, SUPPLY, A_WEIGHT, DECIMALS, SWAP_FEE, EXIT_FEE), A_BALANCE, 3)
+        assert_within_bound(pool_in[i], balancer_math.get_pool_in_given_single_out(
+            amount, A_BALANCE, SUPPLY, A_WEIGHT, DECIMALS, SWAP_FEE, EXIT_FEE), SUPPLY, 1)
+
+
+def test_batch_broadcasts_pool_states():
+    balances = [1000 * DECIMALS, 2000 * DECIMALS, 3000 * DECIMALS]
+
+    result = batch.get_spot_price(balances, A_WEIGHT, B_BALANCE, B_WEIGHT, SWAP_FEE)
+
+    for balance, price in zip(balances, result):
+        expected = balancer_math.get_spot_price(
+            balance, A_WEIGHT, B_BALANCE, B_WEIGHT, SWAP_FEE)
+        assert abs(price - expected) <= 1e-8 * (expected + DECIMALS)
+
+
+def test_batch_out_of_bound_base_is_nan():
+    # selling 1000x the pool balance pushes the pow base below MIN_DECIMAL_POW_BASE
+    result = batch.get_out_given_in(
+        [1 * DECIMALS, 1000 * A_BALANCE], A_BALANCE, A_WEIGHT, B_BALANCE, B_WEIGHT, SWAP_FEE)
+
+    assert not np.isnan(result[0])
+    assert np.isnan(result[1])
@@ -0,0 +1,75 @@
+import re
+from pathlib import Path
+
+from scripts.batch_create_pools import deploy_and_create_calldata, to_wad
+from tests.oz_utils import str_to_felt
+
+CONTRACTS = Path(__file__).parent.parent / "contracts"
+
+SPEC = {
+    "pools": [
+        {
+            "name": "MAMMOTH_LP", "symbol": "MLP", "swap_fee": "0.002", "exit_fee": "0.001",
+            "tokens": [
+                {"address": 11, "weight": "0.5", "liquidity": 100000},
+                {"address": 12, "weight": "0.5", "liquidity": 50},
+            ],
+        },
+        {
+            "name": "MAMMOTH_LP2", "symbol": "MLP2", "decimals": 6, "pool_type": "OTHER",
+            "swap_fee": "0.003", "exit_fee": 0, "tokens": [
+                {"address": 12, "weight": "0.2", "liquidity": 1},
+                {"address": 13, "weight": "0.3", "liquidity": 2},
+                {"address": 14, "weight": "0.5", "liquidity": 3},
+            ],
+        },
+    ],
+}
+
+
+def struct_members(path, name):
+    """Member names of a Cairo struct, every member of these structs is one felt"""
+    source = (CONTRACTS / path).read_text()
+    body = re.search(rf"struct {name}:\n(.*?)\nend", source, re.S).group(1)
+    members = re.findall(r"member (\w+) : (\w+)", body)
+    assert all(member_type == "felt" for _, member_type in members)
+    return [member for member, _ in members]
+
+
+def test_deploy_and_create_calldata_layout():
+    config_members = struct_members("lib/Router_base.cairo", "PoolConfig")
+    erc_members = struct_members("lib/Pool_registry_base.cairo", "ApprovedERC20")
+
+    calldata = deploy_and_create_calldata(SPEC, 7, 8)
+    caller_address, configs_len, rest = calldata[0], calldata[1], calldata[2:]
+    assert caller_address == 7
+    assert configs_len == len(SPEC["pools"])
+
+    configs = [
+        dict(zip(config_members, rest[i * len(config_members):(i + 1) * len(config_members)]))
+        for i in range(configs_len)
+    ]
+    rest = rest[configs_len * len(config_members):]
+    erc_list_len, erc_list = rest[0], rest[1:]
+    assert erc_list_len == 5
+    assert len(erc_list) == erc_list_len * len(erc_members)
+    assert erc_list_len == sum(config["num_tokens"] for config in configs)
+
+    assert configs[0] == {
+        "pool_type": str_to_felt("DEFAULTv0"), "proxy_admin": 8,
+        "name": str_to_felt("MAMMOTH_LP"), "symbol": str_to_felt("MLP"), "decimals": 18,
+        "swap_fee_low": 2 * 10 ** 15, "swap_fee_high": 0,
+        "exit_fee_low": 10 ** 15, "exit_fee_high": 0, "num_tokens": 2,
+    }
+    assert configs[1]["pool_type"] == str_to_felt("OTHER")
+    assert configs[1]["decimals"] == 6
+    assert configs[1]["num_tokens"] == 3
+
+    tokens = [
+        dict(zip(erc_members, erc_list[i * len(erc_members):(i + 1) * len(erc_members)]))
+        for i in range(erc_list_len)
+    ]
+    assert [token["erc_address"] for token in tokens] == [11, 12, 12, 13, 14]
+    assert tokens[0]["weight_low"] == to_wad("0.5")
+    assert tokens[0]["initial_liquidity_low"] == 100000 * 10 ** 18
+    assert tokens[4]["initial_liquidity_low"] == 3 * 10 ** 18
@@ -0,0 +1,25 @@
+from .oz_utils import contract_cache_key
+
+
+def write_contracts(root, library_body):
+    package = root / "cache_test_contracts"
+    package.mkdir(exist_ok=True)
+    (package / "main.cairo").write_text(
+        "%lang starknet\n"
+        "from starkware.cairo.common.uint256 import Uint256\n"
+        "from cache_test_contracts.library import helper\n"
+    )
+    (package / "library.cairo").write_text(library_body)
+    return package / "main.cairo"
+
+
+def test_contract_cache_key_follows_imports(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    main = write_contracts(tmp_path, "func helper():\n    return ()\nend\n")
+
+    key = contract_cache_key(main)
+    assert contract_cache_key(main) == key
+
+    # editing an imported file invalidates the contract importing it
+    write_contracts(tmp_path, "func helper():\n    ret\nend\n")
+    assert contract_cache_key(main) != key
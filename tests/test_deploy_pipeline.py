@@ -0,0 +1,109 @@
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from scripts import deploy_pipeline
+from scripts.deploy_pipeline import PipelineContext, Step, _ordered, declare, deploy, run_pipeline
+
+
+def names(steps):
+    return [step.name for step in steps]
+
+
+def test_ordered_puts_dependencies_first():
+    steps = [
+        Step("setup", None, depends_on=["deploy", "declare_pool"]),
+        Step("deploy", None, depends_on=["declare_router"]),
+        Step("declare_router", None),
+        Step("declare_pool", None),
+    ]
+    assert names(_ordered(steps)) == ["declare_router", "deploy", "declare_pool", "setup"]
+
+
+def test_ordered_rejects_cycles_and_unknown_steps():
+    with pytest.raises(ValueError, match="dependency cycle"):
+        _ordered([Step("a", None, depends_on=["b"]), Step("b", None, depends_on=["a"])])
+    with pytest.raises(ValueError, match="depends on unknown step c"):
+        _ordered([Step("a", None, depends_on=["c"])])
+
+
+@pytest.mark.asyncio
+async def test_run_pipeline_resumes_from_progress(tmp_path):
+    progress_file = str(tmp_path / "localhost.pipeline.json")
+    with open(progress_file, "w") as file:
+        json.dump({"declare": {"result": "0x1", "seconds": 1.0}}, file)
+
+    calls = []
+
+    def declare(context, results):
+        raise AssertionError("declare is already done")
+
+    def deploy(context, results):
+        calls.append("deploy")
+        return f"{results['declare']}:deployed"
+
+    def setup(context, results):
+        calls.append("setup")
+        return f"{results['deploy']}:setup"
+
+    steps = [
+        Step("setup", setup, depends_on=["deploy"]),
+        Step("deploy", deploy, depends_on=["declare"]),
+        Step("declare", declare),
+    ]
+    progress = await run_pipeline(steps, None, progress_file)
+
+    assert calls == ["deploy", "setup"]
+    assert progress["setup"]["result"] == "0x1:deployed:setup"
+    with open(progress_file) as file:
+        assert json.load(file) == progress
+
+    # a finished pipeline runs nothing
+    await run_pipeline(steps, None, progress_file)
+    assert calls == ["deploy", "setup"]
+
+
+class FakeNre:
+    """Records how many nile declares and deploys overlap."""
+
+    network = "localhost"
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def _write(self, result):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.01)
+        with self.lock:
+            self.active -= 1
+        return result
+
+    def declare(self, contract, alias):
+        return self._write(f"0x{len(alias):x}")
+
+    def deploy(self, contract, arguments, alias):
+        return self._write((f"0x{len(alias):x}", f"{contract}.json"))
+
+
+@pytest.mark.asyncio
+async def test_nile_writes_are_serialized(tmp_path, monkeypatch):
+    monkeypatch.setattr(deploy_pipeline, "wait_for_declaration", lambda class_hash, network: None)
+    monkeypatch.setattr(deploy_pipeline, "wait_for_deployment", lambda address, network: None)
+    nre = FakeNre()
+    context = PipelineContext(nre, SimpleNamespace(address="0x1"))
+
+    steps = [
+        *[Step(f"declare_{i}", declare("Proxy", f"class_{i}")) for i in range(4)],
+        *[Step(f"deploy_{i}", deploy("Proxy", f"proxy_{i}", lambda c, r: [])) for i in range(4)],
+    ]
+    progress = await run_pipeline(steps, context, str(tmp_path / "localhost.pipeline.json"))
+
+    assert len(progress) == len(steps)
+    assert nre.max_active == 1
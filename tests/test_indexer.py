@@ -0,0 +1,120 @@
+import json
+
+from starkware.starknet.public.abi import get_selector_from_name
+
+from mammoth.indexer import Indexer, ROUTER_ABI
+
+ROUTER = 0x123
+POOL = 0x456
+TUSDC, FC = 0x10, 0x20
+
+
+class FakeClient:
+    def __init__(self, blocks):
+        self.blocks = blocks
+
+    def get_block(self, block_number=None):
+        if block_number is None:
+            block_number = len(self.blocks) - 1
+        return self.blocks[block_number]
+
+    def latest_block_number(self):
+        return len(self.blocks) - 1
+
+
+def raw_event(name, data, from_address=ROUTER):
+    return {
+        "from_address": hex(from_address),
+        "keys": [hex(get_selector_from_name(name))],
+        "data": [hex(x) for x in data],
+    }
+
+
+def block(block_number, *events):
+    return {
+        "block_number": block_number,
+        "timestamp": 1000 + block_number,
+        "transaction_receipts": [{"transaction_hash": hex(block_number), "events": list(events)}],
+    }
+
+
+BLOCKS = [
+    block(0, raw_event("pool_deployed", [POOL, 7])),
+    block(
+        1,
+        raw_event("pool_created", [
+            POOL, 11, 12, 18, 2 * 10 ** 16, 0, 2 * 10 ** 16, 0,
+            2,
+            TUSDC, 5 * 10 ** 17, 0, 3000 * 10 ** 18, 0,
+            FC, 5 * 10 ** 17, 0, 20 * 10 ** 18, 0,
+            3000 * 10 ** 18, 0,
+        ]),
+        # events from other contracts are ignored
+        raw_event("swap_called", [TUSDC, FC, POOL, 1, 0], from_address=0x999),
+    ),
+    block(2, raw_event("swap_called", [TUSDC, FC, POOL, 7 * 10 ** 18, 0])),
+    block(3, raw_event("swap_exact_out_called", [TUSDC, FC, POOL, 3 * 10 ** 18, 0, 10 ** 18, 0])),
+    block(4, raw_event("deposit_single_called", [FC, POOL, 0, 1])),
+]
+
+
+def test_indexer_decodes_router_events(tmp_path):
+    indexer = Indexer(tmp_path / "events.db", ROUTER, FakeClient(BLOCKS))
+
+    assert indexer.sync() == 5
+
+    events = indexer.events()
+    assert [name for _, name, _ in events] == [
+        "pool_deployed", "pool_created", "swap_called", "swap_exact_out_called",
+        "deposit_single_called"]
+
+    _, _, created = events[1]
+    assert created["swap_fee"] == 2 * 10 ** 16
+    assert created["tokens_len"] == 2
+    assert [token["erc_address"] for token in created["tokens"]] == [TUSDC, FC]
+
+    swap = indexer.events(name="swap_called", pool=POOL)
+    assert swap == [(2, "swap_called", {
+        "token_in": TUSDC, "token_out": FC, "pool": POOL, "amount_swapped_in": 7 * 10 ** 18})]
+
+    # exact out swaps keep both amounts, the amount column holds the amount in
+    exact_out = indexer.events(name="swap_exact_out_called")
+    assert exact_out[0][2]["amount_swapped_in"] == 3 * 10 ** 18
+    assert exact_out[0][2]["amount_swapped_out"] == 10 ** 18
+
+    # Uint256 high words are combined and kept exact
+    amount, = indexer.connection.execute(
+        "SELECT amount FROM events WHERE name = 'deposit_single_called'").fetchone()
+    assert int(amount) == 1 << 128
+
+    volume, = indexer.connection.execute(
+        "SELECT SUM(amount_decimal) FROM events WHERE name = 'swap_called' AND token_in = ?",
+        (hex(TUSDC),)).fetchone()
+    assert volume == 7
+
+
+def test_indexer_catches_up_incrementally(tmp_path):
+    client = FakeClient(BLOCKS[:3])
+    indexer = Indexer(tmp_path / "events.db", ROUTER, client)
+    assert indexer.sync() == 3
+    assert indexer.last_block() == 2
+
+    # a new indexer on the same file resumes after the stored cursor
+    client.blocks = BLOCKS
+    resumed = Indexer(tmp_path / "events.db", ROUTER, client)
+    assert resumed.sync() == 2
+    assert resumed.last_block() == 4
+    assert len(resumed.events()) == 5
+
+    # re-indexing a stored block does not duplicate rows
+    resumed.index_block(BLOCKS[2])
+    assert len(resumed.events()) == 5
+
+
+def test_indexer_uses_router_abi():
+    with open(ROUTER_ABI) as file:
+        abi = json.load(file)
+    names = {entry["name"] for entry in abi if entry["type"] == "event"}
+    assert {
+        "pool_created", "swap_called", "swap_exact_out_called", "deposit_proportional_called",
+    } <= names
@@ -2,10 +2,67 @@ import pytest
 import math
 from hypothesis import given, strategies as st, settings
 from starkware.starknet.testing.contract import StarknetContract
+from starkware.starknet.business_logic.state.state import BlockInfo
+from starkware.starknet.core.os.contract_address.contract_address import (
+    calculate_contract_address_from_hash
+)
 
-from .oz_utils import to_uint, from_uint, str_to_felt
+from mammoth import balancer_math, fixed_point
+from .oz_utils import to_uint, from_uint, str_to_felt, assert_revert, assert_event_emitted
 from .conftest import DECIMALS
-\
+
+# a block timestamp the tests never reach
+NO_DEADLINE = 2 ** 64
+# the largest Uint256, swaps with it as max spot price skip the spot price checks
+NO_MAX_SPOT_PRICE = 2 ** 256 - 1
+
+
+async def deploy_new_pool(signer, starknet, user_account, user, router_address, pool_abi):
+    deploy_pool_return = await signer.send_transaction(
+        account=user_account,
+        to=router_address,
+        selector_name="deploy_pool",
+        calldata=[str_to_felt("DEFAULTv0"), user],
+    )
+
+    pool_address = deploy_pool_return.result.response[0]
+    pool_contract = StarknetContract(starknet.state, pool_abi, pool_address, deploy_pool_return)
+    return pool_address, pool_contract
+
+
+async def create_new_pool(signer, starknet, user_account, user, router_address, pool_abi, tokens):
+    """Deploy and create a pool of tokens, a list of (erc20 address, weight, initial liquidity)."""
+    pool_address, pool_contract = await deploy_new_pool(
+        signer, starknet, user_account, user, router_address, pool_abi)
+
+    erc_list = []
+    for erc_address, weight, liquidity in tokens:
+        await signer.send_transaction(
+            account=user_account,
+            to=erc_address,
+            selector_name="approve",
+            calldata=[pool_address, *to_uint(liquidity)],
+        )
+        erc_list += [erc_address, *to_uint(weight), *to_uint(liquidity)]
+
+    await signer.send_transaction(
+        account=user_account,
+        to=router_address,
+        selector_name="create_pool",
+        calldata=[
+            pool_address, str_to_felt("MAMMOTH_LP"), str_to_felt("MLP"), 18, user,
+            *to_uint(2 * 10 ** 16), *to_uint(2 * 10 ** 16), len(tokens), *erc_list,
+        ],
+    )
+    return pool_address, pool_contract
+
+
+async def router_view(signer, user_account, router_address, selector_name, calldata):
+    """Response of a router view, sent through the account like the other router tests."""
+    router_return = await signer.send_transaction(
+        account=user_account, to=router_address, selector_name=selector_name, calldata=calldata)
+    return router_return.result.response
+
 
 @pytest.mark.asyncio
 async def test_deploy_pool(signer_factory, starknet_factory, account_factory, router_factory, pool_factory, class_hash_factory):
@@ -35,16 +92,12 @@ async def test_deploy_pool(signer_factory, starknet_factory, account_factory, ro
 
     assert pool_hash_return.result[0] == [1]
 
-    deploy_pool_return = await signer.send_transaction(
-        account=user_account,
-        to=router_address,
-        selector_name="deploy_pool",
-        calldata=[str_to_felt("DEFAULTv0"), user],
-    )
+    pool_address, _ = await deploy_new_pool(
+        signer, starknet, user_account, user, router_address, pool_abi)
 
-    pool_address = deploy_pool_return.result
-    pool_factory['pool_address'] = pool_address.response[0]
-    pool_factory['pool_contract'] = StarknetContract(starknet.state, pool_abi, pool_address.response[0], deploy_pool_return)
+    # every deployment gets a fresh salt
+    assert pool_address != 0
+    assert pool_address != pool_factory['pool_address']
 
 
 @pytest.mark.asyncio
@@ -83,9 +136,10 @@ async def test_approve_pool_for_transfer(
 @pytest.mark.asyncio
 async def test_create_pool(
     signer_factory,
+    starknet_factory,
     account_factory,
     router_factory,
-    pool_factory,
+    class_hash_factory,
     tusdc_factory,
     fc_factory,
     teeth_factory,
@@ -93,13 +147,22 @@ async def test_create_pool(
     signer = signer_factory
     user_account, user_address = account_factory
     router_contract, router_address = router_factory
-    pool_address = pool_factory['pool_address']
-    pool_contract = pool_factory['pool_contract']
+    _, _, _, pool_abi = class_hash_factory
     tusdc_contract, tusdc_address = tusdc_factory
     fc_contract, fc_address = fc_factory
     teeth_contract, teeth_address = teeth_factory
 
-    print(dir(pool_factory['pool_contract']))
+    # the shared fixture pool is already created, so start from a new one
+    pool_address, pool_contract = await deploy_new_pool(
+        signer, starknet_factory, user_account, user_address, router_address, pool_abi)
+
+    for erc_address in [tusdc_address, fc_address, teeth_address]:
+        await signer.send_transaction(
+            account=user_account,
+            to=erc_address,
+            selector_name="approve",
+            calldata=[pool_address, *to_uint(800000 * DECIMALS)],
+        )
 
     swap_fee = to_uint(2 * DECIMALS/(10**2))  # .02%
     exit_fee = to_uint(2 * DECIMALS/(10**2)) # .02%
@@ -333,6 +396,114 @@ async def test_view_in_given_out(
     )
 
 
+@pytest.mark.asyncio
+async def test_view_batch_quotes(
+    pool_factory, tusdc_factory, fc_factory, teeth_factory
+):
+    pool_contract = pool_factory['pool_contract']
+    _, tusdc_address = tusdc_factory
+    _, fc_address = fc_factory
+    _, teeth_address = teeth_factory
+
+    quotes = [
+        (to_uint(1 * DECIMALS), tusdc_address, fc_address),
+        (to_uint(5 * DECIMALS), tusdc_address, fc_address),
+        (to_uint(2 * DECIMALS), fc_address, teeth_address),
+    ]
+
+    amounts_out = await pool_contract.view_out_given_in_batch(quotes).call()
+    amounts_in = await pool_contract.view_in_given_out_batch(quotes).call()
+
+    assert len(amounts_out.result[0]) == len(quotes)
+    assert len(amounts_in.result[0]) == len(quotes)
+
+    for quote, amount_out, amount_in in zip(quotes, amounts_out.result[0], amounts_in.result[0]):
+        single_out = await pool_contract.view_out_given_in(*quote).call()
+        single_in = await pool_contract.view_in_given_out(*quote).call()
+
+        assert amount_out == single_out.result[0]
+        assert amount_in == single_in.result[0]
+
+
+@pytest.mark.asyncio
+async def test_get_pool_state(
+    pool_factory, tusdc_factory, fc_factory, teeth_factory
+):
+    pool_contract = pool_factory['pool_contract']
+    _, tusdc_address = tusdc_factory
+    _, fc_address = fc_factory
+    _, teeth_address = teeth_factory
+
+    pool_state = await pool_contract.get_pool_state().call()
+    swap_fee, exit_fee, total_weight, lp_supply, token_states = pool_state.result
+
+    pool_info = await pool_contract.get_pool_into(tusdc_address).call()
+    assert (swap_fee, exit_fee, total_weight) == pool_info.result
+
+    supply = await pool_contract.totalSupply().call()
+    assert lp_supply == supply.result[0]
+
+    assert sorted(state[0] for state in token_states) == sorted(
+        [tusdc_address, fc_address, teeth_address])
+
+    for erc_address, balance, weight in token_states:
+        erc_balance = await pool_contract.get_ERC20_balance(erc_address).call()
+        erc_weight = await pool_contract.get_token_weight(erc_address).call()
+
+        assert balance == erc_balance.result[0]
+        assert weight == erc_weight.result[0]
+
+
+@pytest.mark.asyncio
+async def test_get_normalized_weight(pool_factory, tusdc_factory, fc_factory, teeth_factory):
+    pool_contract = pool_factory['pool_contract']
+
+    for _, erc_address in (tusdc_factory, fc_factory, teeth_factory):
+        erc_weight = await pool_contract.get_token_weight(erc_address).call()
+        weight = from_uint(erc_weight.result[0])
+
+        normalized = await pool_contract.get_normalized_weight(erc_address).call()
+        weight_ratio, complement = map(from_uint, normalized.result)
+
+        assert weight_ratio == fixed_point.div(weight, DECIMALS)
+        assert complement == DECIMALS - weight_ratio
+
+
+@pytest.mark.asyncio
+async def test_router_view_batch_quotes(
+    signer_factory, account_factory, router_factory, pool_factory, tusdc_factory, fc_factory
+):
+    signer = signer_factory
+    user_account, _ = account_factory
+    _, router_address = router_factory
+    pool_address = pool_factory['pool_address']
+    pool_contract = pool_factory['pool_contract']
+    _, tusdc_address = tusdc_factory
+    _, fc_address = fc_factory
+
+    amounts = [1 * DECIMALS, 3 * DECIMALS]
+
+    router_return = await signer.send_transaction(
+        account=user_account,
+        to=router_address,
+        selector_name="view_out_given_in_batch",
+        calldata=[
+            pool_address,
+            len(amounts),
+            *[x for amount in amounts for x in (*to_uint(amount), tusdc_address, fc_address)],
+        ],
+    )
+
+    response = router_return.result.response
+    assert response[0] == len(amounts)
+
+    for i, amount in enumerate(amounts):
+        single_out = await pool_contract.view_out_given_in(
+            to_uint(amount), tusdc_address, fc_address
+        ).call()
+        assert from_uint(response[1 + 2 * i: 3 + 2 * i]) == from_uint(single_out.result[0])
+
+
 # @given(
 #    x=st.integers(min_value=1, max_value=999),
 # )
@@ -588,6 +759,9 @@ async def test_mammoth_swap(
             pool_address,
             tusdc_address,
             fc_address,
+            *fc_for_tusdc.result[0],
+            *to_uint(NO_MAX_SPOT_PRICE),
+            NO_DEADLINE,
         ],
     )
 
@@ -604,3 +778,528 @@ async def test_mammoth_swap(
     assert from_uint(initial_fc_balance.result[0]) - from_uint(
         new_fc_balance.result[0]
     ) == from_uint(fc_for_tusdc.result[0])
+
+
+@pytest.mark.asyncio
+async def test_mammoth_swap_exact_out(
+    signer_factory,
+    starknet_factory,
+    account_factory,
+    router_factory,
+    pool_factory,
+    tusdc_factory,
+    fc_factory,
+):
+    signer = signer_factory
+    user_account, user = account_factory
+    pool_address = pool_factory['pool_address']
+    pool_contract = pool_factory['pool_contract']
+    _, router_address = router_factory
+    _, tusdc_address = tusdc_factory
+    _, fc_address = fc_factory
+
+    await signer.send_transaction(
+        account=user_account,
+        to=tusdc_address,
+        selector_name="mint",
+        calldata=[user, *to_uint(10 * DECIMALS)],
+    )
+    initial_fc_balance = await pool_contract.get_ERC20_balance(fc_address).call()
+    initial_tusdc_balance = await pool_contract.get_ERC20_balance(tusdc_address).call()
+
+    amount_out = DECIMALS // 100
+    tusdc_for_fc = await pool_contract.view_in_given_out(
+        to_uint(amount_out), tusdc_address, fc_address
+    ).call()
+    amount_in = from_uint(tusdc_for_fc.result[0])
+
+    def swap_exact_out(max_amount_in, deadline):
+        return signer.send_transaction(
+            account=user_account,
+            to=router_address,
+            selector_name="mammoth_swap_exact_out",
+            calldata=[
+                *to_uint(amount_out), user, pool_address, tusdc_address, fc_address,
+                *to_uint(max_amount_in), *to_uint(NO_MAX_SPOT_PRICE), deadline,
+            ],
+        )
+
+    await assert_revert(
+        swap_exact_out(amount_in - 1, NO_DEADLINE),
+        reverted_with="SWAP INPUT ABOVE MAXIMUM : ROUTER LEVEL",
+    )
+
+    # the router only spends the approvals of the account that sends the swap
+    await assert_revert(
+        signer.send_transaction(
+            account=user_account,
+            to=router_address,
+            selector_name="mammoth_swap_exact_out",
+            calldata=[
+                *to_uint(amount_out), pool_address, pool_address, tusdc_address, fc_address,
+                *to_uint(amount_in), *to_uint(NO_MAX_SPOT_PRICE), NO_DEADLINE,
+            ],
+        ),
+        reverted_with="CALLER IS NOT USER : ROUTER LEVEL",
+    )
+
+    swap_return = await swap_exact_out(amount_in, NO_DEADLINE)
+    assert swap_return.result.response == list(to_uint(amount_in))
+    assert_event_emitted(
+        swap_return, router_address, "swap_exact_out_called",
+        [tusdc_address, fc_address, pool_address, *to_uint(amount_in), *to_uint(amount_out)])
+
+    new_tusdc_balance = await pool_contract.get_ERC20_balance(tusdc_address).call()
+    new_fc_balance = await pool_contract.get_ERC20_balance(fc_address).call()
+    assert from_uint(new_tusdc_balance.result[0]) - from_uint(
+        initial_tusdc_balance.result[0]) == amount_in
+    assert from_uint(initial_fc_balance.result[0]) - from_uint(
+        new_fc_balance.result[0]) == amount_out
+
+    # both swap variants refuse to run after their deadline
+    starknet_factory.state.state.block_info = BlockInfo.create_for_testing(
+        block_number=1, block_timestamp=1000)
+    await assert_revert(
+        swap_exact_out(2 * amount_in, 999),
+        reverted_with="SWAP DEADLINE PASSED : ROUTER LEVEL",
+    )
+    await assert_revert(
+        signer.send_transaction(
+            account=user_account,
+            to=router_address,
+            selector_name="mammoth_swap",
+            calldata=[
+                *to_uint(amount_in), user, pool_address, tusdc_address, fc_address,
+                *to_uint(0), *to_uint(NO_MAX_SPOT_PRICE), 999,
+            ],
+        ),
+        reverted_with="SWAP DEADLINE PASSED : ROUTER LEVEL",
+    )
+
+
+@pytest.mark.asyncio
+async def test_swap_max_spot_price(
+    signer_factory,
+    account_factory,
+    router_factory,
+    pool_factory,
+    tusdc_factory,
+    fc_factory,
+    teeth_factory,
+):
+    signer = signer_factory
+    user_account, user = account_factory
+    pool_address = pool_factory['pool_address']
+    pool_contract = pool_factory['pool_contract']
+    _, router_address = router_factory
+    _, tusdc_address = tusdc_factory
+    _, fc_address = fc_factory
+    _, teeth_address = teeth_factory
+
+    # every ordered pair, priced with the python port
+    pool_state = (await pool_contract.get_pool_state().call()).result
+    swap_fee = from_uint(pool_state.swap_fee)
+    tokens = {
+        state.erc_address: (from_uint(state.balance), from_uint(state.weight))
+        for state in pool_state.token_states
+    }
+    spot_prices = (await pool_contract.view_spot_prices().call()).result.spot_prices
+    assert len(spot_prices) == len(tokens) * (len(tokens) - 1)
+    for spot_price in spot_prices:
+        assert spot_price.erc20_address_in != spot_price.erc20_address_out
+        assert from_uint(spot_price.spot_price) == balancer_math.get_spot_price(
+            *tokens[spot_price.erc20_address_in], *tokens[spot_price.erc20_address_out],
+            swap_fee)
+    assert {(p.erc20_address_in, p.erc20_address_out) for p in spot_prices} == {
+        (a, b) for a in tokens for b in tokens if a != b}
+
+    await signer.send_transaction(
+        account=user_account,
+        to=tusdc_address,
+        selector_name="mint",
+        calldata=[user, *to_uint(10 * DECIMALS)],
+    )
+    amount_in = DECIMALS
+    spot_price_before = from_uint(
+        (await pool_contract.view_spot_price(tusdc_address, fc_address).call()).result[0])
+    amount_out = from_uint((await pool_contract.view_out_given_in(
+        to_uint(amount_in), tusdc_address, fc_address).call()).result[0])
+    spot_price_after = balancer_math.get_spot_price(
+        tokens[tusdc_address][0] + amount_in, tokens[tusdc_address][1],
+        tokens[fc_address][0] - amount_out, tokens[fc_address][1], swap_fee)
+    assert spot_price_after > spot_price_before
+
+    def swap(max_spot_price):
+        return signer.send_transaction(
+            account=user_account,
+            to=router_address,
+            selector_name="mammoth_swap",
+            calldata=[
+                *to_uint(amount_in), user, pool_address, tusdc_address, fc_address,
+                *to_uint(0), *to_uint(max_spot_price), NO_DEADLINE,
+            ],
+        )
+
+    await assert_revert(
+        swap(spot_price_before - 1),
+        reverted_with="SPOT PRICE ABOVE MAXIMUM BEFORE SWAP : POOL LEVEL",
+    )
+    await assert_revert(
+        swap(spot_price_after - 1),
+        reverted_with="SPOT PRICE ABOVE MAXIMUM AFTER SWAP : POOL LEVEL",
+    )
+
+    # a trade up to exactly the bound goes through
+    await swap(spot_price_after)
+    assert from_uint(
+        (await pool_contract.view_spot_price(tusdc_address, fc_address).call()).result[0]
+    ) == spot_price_after
+
+
+@pytest.mark.asyncio
+async def test_mammoth_swap_path(
+    signer_factory,
+    account_factory,
+    router_factory,
+    pool_factory,
+    tusdc_factory,
+    fc_factory,
+    teeth_factory,
+):
+    signer = signer_factory
+    user_account, user = account_factory
+    pool_address = pool_factory['pool_address']
+    pool_contract = pool_factory['pool_contract']
+    _, router_address = router_factory
+    _, tusdc_address = tusdc_factory
+    _, fc_address = fc_factory
+    teeth_contract, teeth_address = teeth_factory
+
+    amount_in = 2 * DECIMALS
+    path = [
+        (pool_address, tusdc_address, fc_address),
+        (pool_address, fc_address, teeth_address),
+    ]
+    flat_path = [x for hop in path for x in hop]
+
+    await signer.send_transaction(
+        account=user_account,
+        to=tusdc_address,
+        selector_name="mint",
+        calldata=[user, *to_uint(amount_in)],
+    )
+
+    # the path quote prices every hop against the current pool state
+    path_quote = await signer.send_transaction(
+        account=user_account,
+        to=router_address,
+        selector_name="view_out_given_in_path",
+        calldata=[*to_uint(amount_in), len(path), *flat_path],
+    )
+    first_hop = await pool_contract.view_out_given_in(
+        to_uint(amount_in), tusdc_address, fc_address
+    ).call()
+    second_hop = await pool_contract.view_out_given_in(
+        first_hop.result[0], fc_address, teeth_address
+    ).call()
+    assert from_uint(path_quote.result.response) == from_uint(second_hop.result[0])
+
+    # executing moves the fc balance between hops, replay it with the reference math
+    state = (await pool_contract.get_pool_state().call()).result
+    tokens = {
+        erc: (from_uint(balance), from_uint(weight))
+        for erc, balance, weight in state.token_states
+    }
+    swap_fee = from_uint(state.swap_fee)
+    tusdc_balance, tusdc_weight = tokens[tusdc_address]
+    fc_balance, fc_weight = tokens[fc_address]
+    teeth_balance, teeth_weight = tokens[teeth_address]
+
+    fc_out = balancer_math.get_out_given_in(
+        amount_in, tusdc_balance, tusdc_weight, fc_balance, fc_weight, swap_fee
+    )
+    expected_out = balancer_math.get_out_given_in(
+        fc_out, fc_balance - fc_out, fc_weight, teeth_balance, teeth_weight, swap_fee
+    )
+
+    # slippage check reverts the whole path
+    await assert_revert(
+        signer.send_transaction(
+            account=user_account,
+            to=router_address,
+            selector_name="mammoth_swap_path",
+            calldata=[*to_uint(amount_in), user, *to_uint(expected_out + 1), len(path), *flat_path],
+        ),
+        reverted_with="SWAP OUTPUT BELOW MINIMUM",
+    )
+
+    # disconnected paths are rejected
+    await assert_revert(
+        signer.send_transaction(
+            account=user_account,
+            to=router_address,
+            selector_name="mammoth_swap_path",
+            calldata=[
+                *to_uint(amount_in),
+                user,
+                *to_uint(0),
+                2,
+                pool_address,
+                tusdc_address,
+                fc_address,
+                pool_address,
+                tusdc_address,
+                teeth_address,
+            ],
+        ),
+        reverted_with="SWAP PATH NOT CONNECTED",
+    )
+
+    await assert_revert(
+        signer.send_transaction(
+            account=user_account,
+            to=router_address,
+            selector_name="mammoth_swap_path",
+            calldata=[*to_uint(amount_in), pool_address, *to_uint(0), len(path), *flat_path],
+        ),
+        reverted_with="CALLER IS NOT USER : ROUTER LEVEL",
+    )
+
+    initial_teeth = await teeth_contract.balanceOf(user).call()
+
+    swap_return = await signer.send_transaction(
+        account=user_account,
+        to=router_address,
+        selector_name="mammoth_swap_path",
+        calldata=[*to_uint(amount_in), user, *to_uint(expected_out), len(path), *flat_path],
+    )
+    assert from_uint(swap_return.result.response) == expected_out
+
+    new_teeth = await teeth_contract.balanceOf(user).call()
+    assert (
+        from_uint(new_teeth.result[0]) - from_uint(initial_teeth.result[0])
+        == expected_out
+    )
+
+
+@pytest.mark.asyncio
+async def test_sync_and_skim(signer_factory, account_factory, pool_factory, tusdc_factory):
+    signer = signer_factory
+    user_account, user = account_factory
+    pool_address = pool_factory['pool_address']
+    pool_contract = pool_factory['pool_contract']
+    tusdc_contract, tusdc_address = tusdc_factory
+
+    initial_reserve = await pool_contract.get_ERC20_balance(tusdc_address).call()
+    initial_reserve = from_uint(initial_reserve.result[0])
+
+    # tokens sent straight to the pool are held but not priced
+    await signer.send_transaction(
+        account=user_account,
+        to=tusdc_address,
+        selector_name="mint",
+        calldata=[pool_address, *to_uint(5 * DECIMALS)],
+    )
+    reserve = await pool_contract.get_ERC20_balance(tusdc_address).call()
+    excess = await pool_contract.get_ERC20_excess(tusdc_address).call()
+    assert from_uint(reserve.result[0]) == initial_reserve
+    assert from_uint(excess.result[0]) == 5 * DECIMALS
+
+    initial_user_balance = await tusdc_contract.balanceOf(user).call()
+    skim_return = await signer.send_transaction(
+        account=user_account,
+        to=pool_address,
+        selector_name="skim",
+        calldata=[tusdc_address, user],
+    )
+    assert from_uint(skim_return.result.response) == 5 * DECIMALS
+
+    new_user_balance = await tusdc_contract.balanceOf(user).call()
+    assert (
+        from_uint(new_user_balance.result[0]) - from_uint(initial_user_balance.result[0])
+        == 5 * DECIMALS
+    )
+    excess = await pool_contract.get_ERC20_excess(tusdc_address).call()
+    assert from_uint(excess.result[0]) == 0
+
+    await signer.send_transaction(
+        account=user_account,
+        to=tusdc_address,
+        selector_name="mint",
+        calldata=[pool_address, *to_uint(3 * DECIMALS)],
+    )
+    await signer.send_transaction(
+        account=user_account,
+        to=pool_address,
+        selector_name="sync",
+        calldata=[tusdc_address],
+    )
+    reserve = await pool_contract.get_ERC20_balance(tusdc_address).call()
+    pool_balance = await tusdc_contract.balanceOf(pool_address).call()
+    assert from_uint(reserve.result[0]) == initial_reserve + 3 * DECIMALS
+    assert reserve.result[0] == pool_balance.result[0]
+
+
+@pytest.mark.asyncio
+async def test_router_pool_enumeration(
+    signer_factory,
+    starknet_factory,
+    account_factory,
+    router_factory,
+    class_hash_factory,
+    pool_factory,
+    tusdc_factory,
+    fc_factory,
+    teeth_factory,
+):
+    signer = signer_factory
+    user_account, user = account_factory
+    _, router_address = router_factory
+    _, _, _, pool_abi = class_hash_factory
+    pool_address = pool_factory['pool_address']
+    _, tusdc_address = tusdc_factory
+    _, fc_address = fc_factory
+    _, teeth_address = teeth_factory
+
+    async def view(selector_name, *calldata):
+        return await router_view(signer, user_account, router_address, selector_name, calldata)
+
+    assert await view("get_num_pools") == [1]
+    assert await view("get_pools", 0, 10) == [1, pool_address]
+
+    new_pool_address, _ = await create_new_pool(
+        signer, starknet_factory, user_account, user, router_address, pool_abi,
+        [(tusdc_address, DECIMALS // 2, 100 * DECIMALS), (fc_address, DECIMALS // 2, DECIMALS)])
+
+    assert await view("get_num_pools") == [2]
+    assert await view("get_pools", 0, 10) == [2, pool_address, new_pool_address]
+    assert await view("get_pools", 1, 1) == [1, new_pool_address]
+    assert await view("get_pools", 2, 10) == [0]
+
+    assert await view("get_num_pools_for_token", tusdc_address) == [2]
+    assert await view("get_pools_for_token", tusdc_address, 0, 10) == [
+        2, pool_address, new_pool_address]
+    assert await view("get_pools_for_token", fc_address, 0, 1) == [1, pool_address]
+    assert await view("get_pools_for_token", teeth_address, 0, 10) == [1, pool_address]
+    assert await view("get_pools_for_token", new_pool_address, 0, 10) == [0]
+
+
+@pytest.mark.asyncio
+async def test_router_pair_index(
+    signer_factory,
+    starknet_factory,
+    account_factory,
+    router_factory,
+    class_hash_factory,
+    pool_factory,
+    tusdc_factory,
+    fc_factory,
+    teeth_factory,
+):
+    signer = signer_factory
+    user_account, user = account_factory
+    _, router_address = router_factory
+    _, _, _, pool_abi = class_hash_factory
+    pool_address = pool_factory['pool_address']
+    _, tusdc_address = tusdc_factory
+    _, fc_address = fc_factory
+    _, teeth_address = teeth_factory
+
+    async def view(selector_name, *calldata):
+        return await router_view(signer, user_account, router_address, selector_name, calldata)
+
+    new_pool_address, _ = await create_new_pool(
+        signer, starknet_factory, user_account, user, router_address, pool_abi,
+        [(fc_address, DECIMALS // 2, DECIMALS), (teeth_address, DECIMALS // 2, DECIMALS)])
+
+    # either order of the pair finds the same pools
+    assert await view("get_num_pools_for_pair", fc_address, teeth_address) == [2]
+    assert await view("get_num_pools_for_pair", teeth_address, fc_address) == [2]
+    assert await view("get_pools_for_pair", teeth_address, fc_address, 0, 10) == [
+        2, pool_address, new_pool_address]
+    assert await view("get_pools_for_pair", fc_address, teeth_address, 1, 10) == [
+        1, new_pool_address]
+
+    assert await view("get_pools_for_pair", tusdc_address, fc_address, 0, 10) == [1, pool_address]
+    assert await view("get_pools_for_pair", tusdc_address, teeth_address, 0, 10) == [
+        1, pool_address]
+    assert await view("get_pools_for_pair", tusdc_address, new_pool_address, 0, 10) == [0]
+
+
+@pytest.mark.asyncio
+async def test_deploy_and_create_pools(
+    signer_factory,
+    starknet_factory,
+    account_factory,
+    router_factory,
+    class_hash_factory,
+    tusdc_factory,
+    fc_factory,
+    teeth_factory,
+):
+    signer = signer_factory
+    user_account, user = account_factory
+    _, router_address = router_factory
+    _, _, _, pool_abi = class_hash_factory
+    _, tusdc_address = tusdc_factory
+    _, fc_address = fc_factory
+    _, teeth_address = teeth_factory
+
+    async def view(selector_name, *calldata):
+        return await router_view(signer, user_account, router_address, selector_name, calldata)
+
+    pools = [
+        [(tusdc_address, DECIMALS // 2, 100 * DECIMALS), (fc_address, DECIMALS // 2, DECIMALS)],
+        [(fc_address, DECIMALS // 4, DECIMALS), (teeth_address, 3 * DECIMALS // 4, 3 * DECIMALS)],
+    ]
+
+    # the pool addresses are known before the transaction, so the approvals go in the same one
+    proxy_hash, pool_hash, salt = await view("get_deployment_info", str_to_felt("DEFAULTv0"))
+    expected_addresses = [
+        calculate_contract_address_from_hash(
+            salt=salt + index, class_hash=proxy_hash, constructor_calldata=[pool_hash, user],
+            deployer_address=router_address)
+        for index in range(len(pools))
+    ]
+
+    approvals, configs, erc_list = [], [], []
+    for pool_address, tokens in zip(expected_addresses, pools):
+        configs += [
+            str_to_felt("DEFAULTv0"), user, str_to_felt("MAMMOTH_LP"), str_to_felt("MLP"), 18,
+            *to_uint(2 * 10 ** 16), *to_uint(2 * 10 ** 16), len(tokens),
+        ]
+        for erc_address, weight, liquidity in tokens:
+            approvals.append((erc_address, "approve", [pool_address, *to_uint(liquidity)]))
+            erc_list += [erc_address, *to_uint(weight), *to_uint(liquidity)]
+
+    num_tokens = sum(len(tokens) for tokens in pools)
+    num_pools = (await view("get_num_pools"))[0]
+
+    # the token count of the configs must match erc_list, here the last token (5 felts) is missing
+    await assert_revert(
+        signer.send_transactions(user_account, [
+            *approvals,
+            (router_address, "deploy_and_create_pools",
+             [user, len(pools), *configs, num_tokens - 1, *erc_list[:-5]]),
+        ]),
+        reverted_with="POOL CONFIG TOKENS MISMATCH : ROUTER LEVEL",
+    )
+
+    create_return = await signer.send_transactions(user_account, [
+        *approvals,
+        (router_address, "deploy_and_create_pools",
+         [user, len(pools), *configs, num_tokens, *erc_list]),
+    ])
+    # the approvals' responses come first
+    assert create_return.result.response[len(approvals):] == [len(pools), *expected_addresses]
+
+    assert await view("get_num_pools") == [num_pools + len(pools)]
+    assert await view("get_pools", num_pools, 10) == [len(pools), *expected_addresses]
+    assert (await view("get_deployment_info", str_to_felt("DEFAULTv0")))[2] == salt + len(pools)
+
+    for pool_address, tokens in zip(expected_addresses, pools):
+        pool_contract = StarknetContract(
+            starknet_factory.state, pool_abi, pool_address, create_return)
+        for erc_address, weight, liquidity in tokens:
+            balance = await pool_contract.get_ERC20_balance(erc_address).call()
+            assert from_uint(balance.result[0]) == liquidity
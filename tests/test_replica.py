@@ -0,0 +1,116 @@
+from mammoth import balancer_math
+from mammoth.config import DECIMALS
+from mammoth.replica import PoolReplica
+from mammoth.routing import Pool
+
+POOL = 100
+USDC, ETH = 1, 2
+SWAP_FEE = 2 * 10 ** 16
+EXIT_FEE = 10 ** 16
+HALF = 5 * 10 ** 17
+
+
+def pool_created():
+    return {
+        "pool": POOL,
+        "swap_fee": SWAP_FEE,
+        "exit_fee": EXIT_FEE,
+        "initial_lp_minted": 1000 * DECIMALS,
+        "tokens": [
+            {"erc_address": erc, "weight_low": HALF, "weight_high": 0,
+             "initial_liquidity_low": 1000 * DECIMALS, "initial_liquidity_high": 0}
+            for erc in (USDC, ETH)
+        ],
+    }
+
+
+class FakeIndexer:
+    def __init__(self, events):
+        self.stored = events
+
+    def events_since(self, position=None):
+        return [event for event in self.stored if position is None or event[0] > position]
+
+
+def test_pool_created_and_swap():
+    replica = PoolReplica()
+    replica.apply("pool_created", pool_created())
+    replica.apply("swap_called", {
+        "pool": POOL, "token_in": USDC, "token_out": ETH, "amount_swapped_in": 10 * DECIMALS})
+
+    amount_out = balancer_math.get_out_given_in(
+        10 * DECIMALS, 1000 * DECIMALS, HALF, 1000 * DECIMALS, HALF, SWAP_FEE)
+    pool = replica.pools[POOL]
+    assert pool.tokens[USDC] == (1010 * DECIMALS, HALF)
+    assert pool.tokens[ETH] == (1000 * DECIMALS - amount_out, HALF)
+    assert pool.lp_supply == 1000 * DECIMALS
+
+
+def test_exact_out_swap_applies_both_amounts():
+    replica = PoolReplica()
+    replica.apply("pool_created", pool_created())
+
+    amount_out = 10 * DECIMALS
+    amount_in = balancer_math.get_in_given_out(
+        amount_out, 1000 * DECIMALS, HALF, 1000 * DECIMALS, HALF, SWAP_FEE)
+    replica.apply("swap_exact_out_called", {
+        "pool": POOL, "token_in": USDC, "token_out": ETH,
+        "amount_swapped_in": amount_in, "amount_swapped_out": amount_out})
+
+    # in_given_out rounds up, recomputing the amount out from amount_in would not give it back
+    pool = replica.pools[POOL]
+    assert pool.tokens[USDC] == (1000 * DECIMALS + amount_in, HALF)
+    assert pool.tokens[ETH] == (1000 * DECIMALS - amount_out, HALF)
+
+
+def test_deposits_and_withdrawals_track_lp_supply():
+    replica = PoolReplica()
+    replica.apply("pool_created", pool_created())
+
+    minted = balancer_math.get_pool_minted_given_single_in(
+        50 * DECIMALS, 1000 * DECIMALS, 1000 * DECIMALS, HALF, DECIMALS, SWAP_FEE)
+    replica.apply("deposit_single_called", {
+        "pool": POOL, "token": USDC, "amount_deposited": 50 * DECIMALS})
+    assert replica.pools[POOL].lp_supply == 1000 * DECIMALS + minted
+
+    replica.apply("deposit_proportional_called", {"pool": POOL, "lp_out": 10 * DECIMALS})
+    replica.apply("withdraw_single_called", {
+        "pool": POOL, "token": ETH, "amount_withdrawn": 5 * DECIMALS})
+    replica.apply("withdraw_proportional_called", {"pool": POOL, "lp_in": 20 * DECIMALS})
+
+    pool = replica.pools[POOL]
+    assert pool.lp_supply == 1000 * DECIMALS + minted + 10 * DECIMALS - 5 * DECIMALS - 20 * DECIMALS
+    assert all(balance > 0 for balance, _ in pool.tokens.values())
+
+
+def test_sync_applies_each_event_once():
+    swap = {"pool": POOL, "token_in": USDC, "token_out": ETH, "amount_swapped_in": DECIMALS}
+    indexer = FakeIndexer([
+        ((1, 0, 0), "pool_deployed", {"pool_address": POOL}),
+        ((1, 0, 1), "pool_created", pool_created()),
+        ((2, 0, 0), "swap_called", swap),
+    ])
+    replica = PoolReplica()
+
+    assert replica.sync(indexer) == 3
+    balances = dict(replica.pools[POOL].tokens)
+    assert replica.sync(indexer) == 0
+    assert replica.pools[POOL].tokens == balances
+
+    indexer.stored.append(((3, 1, 0), "swap_called", swap))
+    assert replica.sync(indexer) == 1
+    assert replica.position == (3, 1, 0)
+    assert replica.pools[POOL].tokens[USDC][0] == 1002 * DECIMALS
+
+
+def test_reconcile_resets_drift():
+    replica = PoolReplica([Pool(POOL, SWAP_FEE, {
+        USDC: (1000 * DECIMALS, HALF), ETH: (1000 * DECIMALS, HALF)}, lp_supply=DECIMALS)])
+    chain = {USDC: 1000 * DECIMALS, ETH: 1001 * DECIMALS}
+
+    drifts = replica.reconcile(lambda pool, erc: chain[erc], lambda pool: DECIMALS)
+
+    assert [(d.erc20_address, d.replica, d.chain) for d in drifts] == [
+        (ETH, 1000 * DECIMALS, 1001 * DECIMALS)]
+    assert replica.pools[POOL].tokens[ETH] == (1001 * DECIMALS, HALF)
+    assert replica.reconcile(lambda pool, erc: chain[erc], lambda pool: DECIMALS) == []
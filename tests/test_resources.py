@@ -0,0 +1,41 @@
+import pytest
+
+from benchmarks.bench_resources import Bench
+from .conftest import DECIMALS
+from .oz_utils import to_uint
+
+PROPORTIONAL_CALLS = [
+    ("mammoth_proportional_deposit", "deposit_proportional_assets"),
+    ("mammoth_proportional_withdraw", "withdraw_proportional_assets"),
+]
+PROPORTIONAL_VIEWS = [
+    "view_proportional_deposits_given_pool_out",
+    "view_proportional_withdraw_given_pool_in",
+]
+
+
+# every extra token costs the same number of steps, within 10%
+@pytest.mark.asyncio
+async def test_proportional_steps_grow_linearly():
+    bench = Bench()
+    await bench.setup()
+    amount = to_uint(DECIMALS)
+
+    steps = {}
+    for num_tokens in range(2, 9):
+        pool_report = {}
+        pool_address, pool, _ = await bench.create_pool(num_tokens, {}, {})
+
+        for router_function, pool_function in PROPORTIONAL_CALLS:
+            await bench.measure_invoke(
+                {}, router_function, bench.router_address, [*amount, bench.user, pool_address],
+                inner=[(pool_address, pool_function)], inner_report=pool_report)
+        for name in PROPORTIONAL_VIEWS:
+            await bench.measure_call(pool_report, pool, name, amount)
+
+        for name, resources in pool_report.items():
+            steps.setdefault(name, []).append(resources["n_steps"])
+
+    for name, counts in steps.items():
+        increments = [after - before for before, after in zip(counts, counts[1:])]
+        assert max(increments) - min(increments) <= min(increments) / 10, (name, counts)
@@ -0,0 +1,173 @@
+import asyncio
+from types import SimpleNamespace
+
+from mammoth import balancer_math, routing
+from mammoth.config import DECIMALS
+from mammoth.routing import Pool, SmartOrderRouter, fetch_pool_addresses
+from tests.routing_cases import SWAP_FEE, random_pools
+
+USDC, ETH, FC = 1, 2, 3
+THIRD = 333333333333333333
+
+
+def two_token_pool(address, a_balance, b_balance):
+    return Pool(
+        address,
+        SWAP_FEE,
+        {USDC: (a_balance, 5 * 10 ** 17), ETH: (b_balance, 5 * 10 ** 17)},
+    )
+
+
+def test_route_splits_across_identical_pools():
+    pools = [two_token_pool(10, 1000 * DECIMALS, 1000 * DECIMALS),
+             two_token_pool(11, 1000 * DECIMALS, 1000 * DECIMALS)]
+    amount_in = 200 * DECIMALS
+
+    route = SmartOrderRouter(pools).route(USDC, ETH, amount_in)
+
+    assert len(route.legs) == 2
+    assert sum(leg.amount_in for leg in route.legs) == amount_in
+    assert [leg.amount_in for leg in route.legs] == [amount_in // 2, amount_in // 2]
+
+    single_pool = balancer_math.get_out_given_in(
+        amount_in, 1000 * DECIMALS, 5 * 10 ** 17, 1000 * DECIMALS, 5 * 10 ** 17, SWAP_FEE)
+    assert route.amount_out > single_pool
+
+
+def test_route_uses_multi_hop_when_direct_pool_is_shallow():
+    pools = [
+        two_token_pool(10, 10 * DECIMALS, 10 * DECIMALS),
+        Pool(11, SWAP_FEE, {USDC: (10000 * DECIMALS, THIRD), FC: (10000 * DECIMALS, THIRD)}),
+        Pool(12, SWAP_FEE, {FC: (10000 * DECIMALS, THIRD), ETH: (10000 * DECIMALS, THIRD)}),
+    ]
+    router = SmartOrderRouter(pools)
+
+    assert router.paths(USDC, ETH) == [
+        [(10, USDC, ETH)],
+        [(11, USDC, FC), (12, FC, ETH)],
+    ]
+
+    route = router.route(USDC, ETH, 100 * DECIMALS)
+    multi_hop = [leg for leg in route.legs if len(leg.path) == 2]
+    assert multi_hop and multi_hop[0].amount_in > 90 * DECIMALS
+    assert route.amount_out > 90 * DECIMALS
+
+
+def test_route_legs_are_exact_in_execution_order():
+    pools = random_pools(20, 5)
+    router = SmartOrderRouter(pools)
+    route = router.route(1, 2, 5000 * DECIMALS)
+
+    balances = {
+        (pool.address, erc): balance for pool in pools for erc, (balance, _) in pool.tokens.items()
+    }
+    by_address = {pool.address: pool for pool in pools}
+    for leg in route.legs:
+        amount = leg.amount_in
+        for pool_address, erc_in, erc_out in leg.path:
+            pool = by_address[pool_address]
+            out = balancer_math.get_out_given_in(
+                amount,
+                balances[(pool_address, erc_in)],
+                pool.tokens[erc_in][1],
+                balances[(pool_address, erc_out)],
+                pool.tokens[erc_out][1],
+                pool.swap_fee,
+            )
+            balances[(pool_address, erc_in)] += amount
+            balances[(pool_address, erc_out)] -= out
+            amount = out
+        assert amount == leg.amount_out
+
+    assert sum(leg.amount_in for leg in route.legs) == 5000 * DECIMALS
+
+
+def test_route_calls():
+    pools = [two_token_pool(10, 1000 * DECIMALS, 1000 * DECIMALS)]
+    route = SmartOrderRouter(pools).route(USDC, ETH, 5 * DECIMALS)
+    leg, = route.legs
+
+    calls = route.calls(router_address=77, user_address=88, slippage=10 ** 16)
+
+    min_out = leg.amount_out * 99 // 100
+    assert calls == [
+        (77, "mammoth_swap_path", [5 * DECIMALS, 0, 88, min_out, 0, 1, 10, USDC, ETH]),
+    ]
+
+
+def route_work(monkeypatch, n_pools):
+    """Number of paths from token 1 to 2, the calls counted while routing and the route"""
+    router = SmartOrderRouter(random_pools(n_pools, 10))
+    router.route(1, 2, DECIMALS)
+
+    calls = {"paths": 0, "search": 0, "exact": 0}
+
+    def counted(name, function):
+        def wrapper(*args):
+            calls[name] += 1
+            return function(*args)
+        return wrapper
+
+    with monkeypatch.context() as patch:
+        patch.setattr(
+            SmartOrderRouter, "_extend_paths", counted("paths", SmartOrderRouter._extend_paths))
+        patch.setattr(routing, "_out_given_in", counted("search", routing._out_given_in))
+        patch.setattr(
+            balancer_math, "get_out_given_in", counted("exact", balancer_math.get_out_given_in))
+        route = router.route(1, 2, 1000 * DECIMALS)
+
+    return len(router.paths(1, 2)), calls, route
+
+
+def test_route_work_does_not_grow_with_pools(monkeypatch):
+    few_paths, few_calls, few_route = route_work(monkeypatch, 20)
+    many_paths, many_calls, many_route = route_work(monkeypatch, 200)
+    assert many_paths > 50 * few_paths
+
+    # paths are enumerated once per pair and the float search quotes every
+    # path in one array operation per chunk and hop, however many there are
+    assert few_calls["paths"] == many_calls["paths"] == 0
+    assert few_calls["search"] == many_calls["search"]
+
+    # the exact math runs once per executed hop
+    for calls, route in [(few_calls, few_route), (many_calls, many_route)]:
+        assert calls["exact"] == sum(len(leg.path) for leg in route.legs)
+
+
+class FakeRouter:
+    """Serves get_pools / get_pools_for_token pages like the router views."""
+
+    def __init__(self, pools_by_token):
+        self.pools_by_token = pools_by_token
+        self.pools = sorted({pool for pools in pools_by_token.values() for pool in pools})
+        self.calls = 0
+
+    def _page(self, pools, offset, limit):
+        self.calls += 1
+        result = SimpleNamespace(pools=pools[offset:offset + limit])
+
+        async def call():
+            return SimpleNamespace(result=result)
+        return SimpleNamespace(call=call)
+
+    def get_pools(self, offset, limit):
+        return self._page(self.pools, offset, limit)
+
+    def get_pools_for_token(self, erc20_address, offset, limit):
+        return self._page(self.pools_by_token.get(erc20_address, []), offset, limit)
+
+    def get_pools_for_pair(self, erc20_address_a, erc20_address_b, offset, limit):
+        pools_b = self.pools_by_token.get(erc20_address_b, [])
+        pools = [pool for pool in self.pools_by_token.get(erc20_address_a, []) if pool in pools_b]
+        return self._page(pools, offset, limit)
+
+
+def test_fetch_pool_addresses():
+    router = FakeRouter({1: list(range(100, 350)), 2: [100, 101]})
+
+    assert asyncio.run(fetch_pool_addresses(router, page_size=100)) == list(range(100, 350))
+    assert router.calls == 3
+    assert asyncio.run(fetch_pool_addresses(router, 2, page_size=100)) == [100, 101]
+    assert asyncio.run(fetch_pool_addresses(router, 3)) == []
+    assert asyncio.run(fetch_pool_addresses(router, 2, 1)) == [100, 101]
+    assert asyncio.run(fetch_pool_addresses(router, 1, 3)) == []
@@ -0,0 +1,40 @@
+from types import SimpleNamespace
+
+from nile.signer import Signer, get_transaction_hash
+from starkware.crypto.signature.signature import verify
+from starkware.starknet.public.abi import get_selector_from_name
+
+from scripts import script_utils
+
+
+def test_send_multicall_signs_with_nile_signer(monkeypatch):
+    sent = {}
+
+    def call_or_invoke(**kwargs):
+        sent.update(kwargs)
+        return "Transaction hash: 0x99"
+
+    monkeypatch.setattr(script_utils, "call_or_invoke", call_or_invoke)
+    account = SimpleNamespace(address="0x1234", signer=Signer(12345), network="localhost")
+
+    # targets and calldata may be ints or hex strings
+    output = script_utils.send_multicall(account, [
+        (0xABC, "approve", [0x5, 7, 0]),
+        ("0xdef", "transfer", ["0x6", 8]),
+    ], nonce=3)
+    assert script_utils.get_tx_hash(output) == "0x99"
+
+    call_array = [
+        (0xABC, get_selector_from_name("approve"), 0, 3),
+        (0xDEF, get_selector_from_name("transfer"), 3, 2),
+    ]
+    calldata = [5, 7, 0, 6, 8]
+    assert sent["contract"] == account.address
+    assert (sent["type"], sent["method"]) == ("invoke", "__execute__")
+    assert sent["params"] == [
+        str(x) for x in [2, *[x for call in call_array for x in call], 5, *calldata, 3]]
+
+    message_hash = get_transaction_hash(
+        0x1234, call_array, calldata, 3, script_utils.MAX_FEE)
+    sig_r, sig_s = (int(x) for x in sent["signature"])
+    assert verify(message_hash, sig_r, sig_s, account.signer.public_key)